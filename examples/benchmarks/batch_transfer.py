@@ -0,0 +1,55 @@
+"""Compares the number of batches moved to the device per second by `ignite._utils.convert_tensor`, with one copy
+per tensor and with the coalesced path (`coalesce=True`), for batches made of many small tensors.
+"""
+import time
+from argparse import ArgumentParser
+
+import torch
+
+from ignite._utils import convert_tensor
+
+
+def create_batch(num_tensors, numel):
+    # dict features of mixed dtypes, as produced by tabular or ragged datasets
+    return {
+        'features': {'f{}'.format(i): torch.rand(numel) for i in range(num_tensors)},
+        'ids': [torch.randint(0, 1000, (numel,)) for _ in range(num_tensors // 4)],
+        'target': torch.rand(1),
+    }
+
+
+def measure(batch, device, non_blocking, coalesce, num_iters):
+    for _ in range(10):
+        convert_tensor(batch, device=device, non_blocking=non_blocking, coalesce=coalesce)
+    torch.cuda.synchronize()
+    start = time.time()
+    for _ in range(num_iters):
+        convert_tensor(batch, device=device, non_blocking=non_blocking, coalesce=coalesce)
+    torch.cuda.synchronize()
+    return num_iters / (time.time() - start)
+
+
+def run(num_tensors, numel, num_iters):
+    batch = create_batch(num_tensors, numel)
+    print("Batch of {} tensors of {} elements".format(num_tensors + num_tensors // 4 + 1, numel))
+    for non_blocking in [False, True]:
+        for coalesce in [False, True]:
+            rate = measure(batch, 'cuda', non_blocking, coalesce, num_iters)
+            print("non_blocking={!s:5s} coalesce={!s:5s}: {:8.1f} batches/s".format(non_blocking, coalesce, rate))
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--num_tensors', type=int, default=64,
+                        help='number of float tensors of the batch (default: 64)')
+    parser.add_argument('--numel', type=int, default=256,
+                        help='number of elements of each tensor (default: 256)')
+    parser.add_argument('--num_iters', type=int, default=1000,
+                        help='number of transfers measured (default: 1000)')
+
+    args = parser.parse_args()
+
+    if not torch.cuda.is_available():
+        raise RuntimeError("This benchmark requires a cuda device")
+
+    run(args.num_tensors, args.numel, args.num_iters)
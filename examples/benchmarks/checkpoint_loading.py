@@ -0,0 +1,77 @@
+"""Compares resume time and peak memory of loading a checkpoint with `torch.load` and with
+`ignite.handlers.load_mmap_state_dict`.
+
+Each measurement runs in a fresh process so that peak resident set sizes are not shared.
+"""
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, SUPPRESS
+
+import torch
+from torch import nn
+
+from ignite.handlers import save_mmap_checkpoint, load_mmap_state_dict
+
+
+def create_model(size_mb):
+    width = 2048
+    num_layers = max(1, int(size_mb * 1024 * 1024 / (4 * width * width)))
+    return nn.Sequential(*[nn.Linear(width, width) for _ in range(num_layers)])
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load(mode, path, size_mb):
+    model = create_model(size_mb)
+    baseline = peak_rss_mb()
+    start = time.time()
+    if mode == 'torch':
+        model.load_state_dict(torch.load(path))
+    else:
+        load_mmap_state_dict(model, path, assign=(mode == 'mmap_assign'))
+    # touch all parameters, as the first forward pass would do
+    checksum = sum(p.sum().item() for p in model.parameters())
+    elapsed = time.time() - start
+    print("{:12s} load: {:6.2f}s  peak RSS: {:8.1f} MB (model alone: {:8.1f} MB)  checksum: {:.4f}"
+          .format(mode, elapsed, peak_rss_mb(), baseline, checksum))
+
+
+def run(size_mb):
+    dirname = tempfile.mkdtemp()
+    try:
+        model = create_model(size_mb)
+        torch_path = os.path.join(dirname, 'model_torch.pth')
+        mmap_path = os.path.join(dirname, 'model_mmap.pth')
+        torch.save(model.state_dict(), torch_path)
+        save_mmap_checkpoint(model.state_dict(), mmap_path)
+        del model
+
+        for mode, path in [('torch', torch_path), ('mmap', mmap_path), ('mmap_assign', mmap_path)]:
+            subprocess.check_call([sys.executable, __file__, '--size_mb', str(size_mb),
+                                   '--load', mode, '--path', path])
+    finally:
+        shutil.rmtree(dirname)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--size_mb', type=int, default=512,
+                        help='approximate size of the model parameters in MB (default: 512)')
+    # internal arguments used to run a single measurement in a subprocess
+    parser.add_argument('--load', type=str, default=None, help=SUPPRESS)
+    parser.add_argument('--path', type=str, default=None, help=SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.load is None:
+        run(args.size_mb)
+    else:
+        load(args.load, args.path, args.size_mb)
@@ -1,4 +1,5 @@
 import sys
+from collections import OrderedDict
 
 import torch
 from torch._six import string_classes
@@ -10,6 +11,11 @@ if IS_PYTHON2:
 else:
     import collections.abc as collections
 
+try:
+    import dataclasses
+except ImportError:
+    dataclasses = None
+
 
 def _to_hours_mins_secs(time_taken):
     """Convert seconds to hours, mins, and seconds."""
@@ -18,14 +24,54 @@ def _to_hours_mins_secs(time_taken):
     return hours, mins, secs
 
 
-def convert_tensor(input_, device=None, non_blocking=False):
-    """Move tensors to relevant device."""
+def convert_tensor(input_, device=None, non_blocking=False, coalesce=False):
+    """Move tensors to relevant device.
+
+    If `coalesce` is True, the cpu tensors of the same dtype are packed in a single (pinned, for cuda) staging buffer
+    which is copied to the device at once, and views of the copy are returned. This saves the per-copy overhead for
+    batches of many small tensors, but each returned tensor keeps the whole buffer alive.
+    """
+    if coalesce and device and torch.device(device).type != 'cpu':
+        leaves, spec = tree_flatten(input_)
+        tensors = [_apply_to_leaf(leaf, torch.Tensor, lambda tensor: tensor) for leaf in leaves]
+        indices = [i for i, leaf in enumerate(leaves) if isinstance(leaf, torch.Tensor)]
+        converted = _coalesced_to([leaves[i] for i in indices], torch.device(device), non_blocking)
+        for i, tensor in zip(indices, converted):
+            tensors[i] = tensor
+        return tree_unflatten(tensors, spec)
+
     def _func(tensor):
         return tensor.to(device=device, non_blocking=non_blocking) if device else tensor
 
     return apply_to_tensor(input_, _func)
 
 
+def _coalesced_to(tensors, device, non_blocking=False):
+    """Copy the tensors to `device` with one transfer per dtype of the cpu tensors."""
+    result = list(tensors)
+    groups = {}
+    for i, tensor in enumerate(tensors):
+        if tensor.device.type == 'cpu' and tensor.layout == torch.strided and not tensor.requires_grad:
+            groups.setdefault(tensor.dtype, []).append(i)
+        else:
+            result[i] = tensor.to(device=device, non_blocking=non_blocking)
+
+    pin_memory = device.type == 'cuda' and torch.cuda.is_available()
+    for dtype, indices in groups.items():
+        if len(indices) == 1:
+            result[indices[0]] = tensors[indices[0]].to(device=device, non_blocking=non_blocking)
+            continue
+        numels = [tensors[i].numel() for i in indices]
+        staging = torch.empty(sum(numels), dtype=dtype, pin_memory=pin_memory)
+        torch.cat([tensors[i].reshape(-1) for i in indices], out=staging)
+        # a non blocking copy from pinned memory does not wait for the transfer, the staging buffer is kept alive
+        # by the caching host allocator until the copy is done
+        flat = staging.to(device=device, non_blocking=non_blocking)
+        for i, chunk in zip(indices, flat.split(numels)):
+            result[i] = chunk.view(tensors[i].shape)
+    return result
+
+
 def apply_to_tensor(input_, func):
     """Apply a function on a tensor or mapping, or sequence of tensors.
     """
@@ -35,17 +81,154 @@ def apply_to_tensor(input_, func):
 def apply_to_type(input_, input_type, func):
     """Apply a function on a object of `input_type` or mapping, or sequence of objects of `input_type`.
     """
-    if isinstance(input_, input_type):
-        return func(input_)
-    elif isinstance(input_, string_classes):
-        return input_
-    elif isinstance(input_, collections.Mapping):
-        return {k: apply_to_type(sample, input_type, func) for k, sample in input_.items()}
-    elif isinstance(input_, collections.Sequence):
-        return [apply_to_type(sample, input_type, func) for sample in input_]
-    else:
-        raise TypeError(("input must contain {}, dicts or lists; found {}"
-                         .format(input_type, type(input_))))
+    leaves, spec = tree_flatten(input_)
+    return tree_unflatten([_apply_to_leaf(leaf, input_type, func) for leaf in leaves], spec)
+
+
+def _apply_to_leaf(leaf, input_type, func):
+    if isinstance(leaf, input_type):
+        return func(leaf)
+    elif isinstance(leaf, string_classes):
+        return leaf
+    raise TypeError(("input must contain {}, dicts or lists; found {}"
+                     .format(input_type, type(leaf))))
+
+
+class TreeSpec(object):
+    """Structure of a nested object flattened by :func:`tree_flatten`.
+
+    Specs are cached by layout (the types of the containers, their keys and the types of the keys, and their
+    fields), so that objects with the same layout, e.g. the batches of a dataloader, share the same spec.
+    """
+    def __init__(self, layout):
+        self.layout = layout
+        self.num_leaves = _num_leaves(layout)
+
+    def unflatten(self, leaves):
+        leaves = list(leaves)
+        if len(leaves) != self.num_leaves:
+            raise ValueError("Expected {} leaves, got {}".format(self.num_leaves, len(leaves)))
+        return _build(self.layout, iter(leaves))
+
+    def __repr__(self):
+        return "TreeSpec({!r})".format(self.layout)
+
+
+_LEAF = None
+_SPEC_CACHE = {}
+_SPEC_CACHE_SIZE = 1024
+
+# kinds of nodes, resolved once per type
+_KIND_LEAF, _KIND_DICT, _KIND_MAPPING, _KIND_LIST, _KIND_TUPLE, _KIND_SEQUENCE, _KIND_NAMEDTUPLE, _KIND_DATACLASS = \
+    range(8)
+_KIND_CACHE = {dict: _KIND_DICT, OrderedDict: _KIND_DICT, list: _KIND_LIST, tuple: _KIND_TUPLE}
+
+
+def tree_flatten(obj):
+    """Flatten nested dicts, lists, tuples, namedtuples and dataclasses into the list of their leaves and a
+    :class:`TreeSpec`.
+
+    Other mappings are rebuilt as dicts and other sequences (except strings), e.g. the structseqs returned by
+    `torch.max`, as lists.
+
+    The kind of each node (leaf or container) is resolved once per type, so that flattening a batch only costs a
+    dict lookup per node instead of a chain of `isinstance` checks.
+
+    Returns:
+        tuple: `(leaves, spec)`, see :func:`tree_unflatten`.
+    """
+    leaves = []
+    layout = _flatten(obj, leaves)
+    spec = _SPEC_CACHE.get(layout)
+    if spec is None:
+        if len(_SPEC_CACHE) >= _SPEC_CACHE_SIZE:
+            _SPEC_CACHE.clear()
+        spec = _SPEC_CACHE[layout] = TreeSpec(layout)
+    return leaves, spec
+
+
+def tree_unflatten(leaves, spec):
+    """Rebuild the object flattened by :func:`tree_flatten`, with new `leaves`."""
+    return spec.unflatten(leaves)
+
+
+def _kind(cls):
+    kind = _KIND_CACHE.get(cls)
+    if kind is None:
+        if issubclass(cls, string_classes):
+            kind = _KIND_LEAF
+        elif issubclass(cls, collections.Mapping):
+            kind = _KIND_MAPPING
+        elif issubclass(cls, tuple) and hasattr(cls, '_fields'):
+            kind = _KIND_NAMEDTUPLE
+        elif issubclass(cls, collections.Sequence):
+            kind = _KIND_SEQUENCE
+        elif dataclasses is not None and dataclasses.is_dataclass(cls):
+            kind = _KIND_DATACLASS
+        else:
+            kind = _KIND_LEAF
+        _KIND_CACHE[cls] = kind
+    return kind
+
+
+def _flatten(obj, leaves):
+    """Append the leaves of `obj` to `leaves` and return its layout."""
+    cls = type(obj)
+    kind = _kind(cls)
+    if kind == _KIND_LEAF:
+        leaves.append(obj)
+        return _LEAF
+    elif kind == _KIND_DICT or kind == _KIND_MAPPING:
+        keys = tuple(obj.keys())
+        # keys which compare equal but have different types (e.g. 1 and True) give different layouts
+        key_types = tuple(type(k) for k in keys)
+        return (cls if kind == _KIND_DICT else dict), (keys, key_types), tuple(_flatten(obj[k], leaves) for k in keys)
+    elif kind == _KIND_DATACLASS:
+        names = tuple(f.name for f in dataclasses.fields(obj) if f.init)
+        return cls, names, tuple(_flatten(getattr(obj, name), leaves) for name in names)
+    elif kind == _KIND_SEQUENCE:
+        cls = list
+    return cls, None, tuple(_flatten(v, leaves) for v in obj)
+
+
+def _num_leaves(layout):
+    if layout is _LEAF:
+        return 1
+    return sum(_num_leaves(child) for child in layout[2])
+
+
+def _build(layout, leaves):
+    if layout is _LEAF:
+        return next(leaves)
+    cls, keys, children = layout
+    values = [_build(child, leaves) for child in children]
+    if cls in (list, tuple):
+        return cls(values)
+    kind = _kind(cls)
+    if kind == _KIND_DICT:
+        return cls(zip(keys[0], values))
+    elif kind == _KIND_NAMEDTUPLE:
+        return cls(*values)
+    return cls(**dict(zip(keys, values)))
+
+
+def _replace(obj, leaf_type, fn):
+    """Copy of the dicts, lists and tuples of `obj` where objects of `leaf_type` are replaced by `fn(leaf)`.
+
+    Unlike :func:`apply_to_type`, container types (e.g. `OrderedDict`, tuples) are preserved and other objects are
+    returned as is.
+    """
+    if isinstance(obj, leaf_type):
+        return fn(obj)
+    elif isinstance(obj, dict):
+        result = type(obj)((k, _replace(v, leaf_type, fn)) for k, v in obj.items())
+        if hasattr(obj, '_metadata'):
+            # keep the version metadata of `torch.nn.Module.state_dict`
+            result._metadata = obj._metadata
+        return result
+    elif type(obj) in (list, tuple):
+        return type(obj)(_replace(v, leaf_type, fn) for v in obj)
+    return obj
 
 
 def to_onehot(indices, num_classes):
@@ -1,7 +1,10 @@
 # coding: utf-8
 
 from ignite.contrib.engines.tbptt import create_supervised_tbptt_trainer
+from ignite.contrib.engines.tbptt import create_supervised_tbptt_evaluator
 from ignite.contrib.engines.tbptt import Tbptt_Events
+from ignite.contrib.engines.tbptt import StreamBatches
 
 
-__all__ = ["create_supervised_tbptt_trainer", "Tbptt_Events"]
+__all__ = ["create_supervised_tbptt_trainer", "create_supervised_tbptt_evaluator",
+           "Tbptt_Events", "StreamBatches"]
@@ -3,9 +3,10 @@
 from enum import Enum
 
 import torch
+from torch.nn.utils.rnn import pack_padded_sequence
 
 from ignite._utils import convert_tensor, apply_to_tensor
-from ignite.engine import Engine
+from ignite.engine import Engine, Events
 
 
 class Tbptt_Events(Enum):
@@ -19,16 +20,58 @@ class Tbptt_Events(Enum):
     TIME_ITERATION_COMPLETED = "time_iteration_completed"
 
 
-def _prepare_tbptt_batch(batch, tbptt_step, dim=0, device=None):
+def _prepare_tbptt_batch(batch, tbptt_step, dim=0, device=None, packed=False):
     """Prepare batch for tbptt trainer.
 
     Batch come from the dataloader. It is split in chunks along the time
     dimension and fed to the truncated backpropagation throught time trainer.
+    Chunks are returned as `(x_t, y_t, batch_size_t)`, where `batch_size_t` is
+    None unless the batch holds the lengths of its sequences.
     """
+    if len(batch) == 3:
+        return _prepare_tbptt_batch_with_lengths(batch, tbptt_step, dim=dim,
+                                                 device=device, packed=packed)
     x, y = batch
     x = convert_tensor(x, device=device)
     y = convert_tensor(y, device=device)
-    return zip(x.split(tbptt_step, dim=dim), y.split(tbptt_step, dim=dim))
+    return [(x_t, y_t, None) for x_t, y_t in
+            zip(x.split(tbptt_step, dim=dim), y.split(tbptt_step, dim=dim))]
+
+
+def _prepare_tbptt_batch_with_lengths(batch, tbptt_step, dim=0, device=None,
+                                      packed=False):
+    """Prepare a batch of padded sequences of different lengths.
+
+    Sequences are sorted by decreasing length, so that the sequences which are
+    finished before the start of a chunk are the last ones of the batch and
+    can be dropped from the chunk. Chunks made only of padding are skipped.
+    """
+    if dim not in (0, 1):
+        raise ValueError("Sequence lengths are only supported for a time "
+                         "dimension of 0 or 1")
+    x, y, lengths = batch
+    batch_dim = 1 - dim
+    # Lengths stay on the cpu, the chunk sizes are computed without
+    # synchronization
+    lengths = torch.as_tensor(lengths, dtype=torch.long).cpu()
+    lengths, order = lengths.sort(descending=True)
+    x = convert_tensor(x, device=device)
+    y = convert_tensor(y, device=device)
+    x = x.index_select(batch_dim, order.to(x.device))
+    y = y.index_select(batch_dim, order.to(y.device))
+
+    chunks = []
+    for start in range(0, int(lengths[0]), tbptt_step):
+        batch_size_t = int((lengths > start).sum())
+        step = min(tbptt_step, x.shape[dim] - start)
+        x_t = x.narrow(dim, start, step).narrow(batch_dim, 0, batch_size_t)
+        y_t = y.narrow(dim, start, step).narrow(batch_dim, 0, batch_size_t)
+        if packed:
+            lengths_t = (lengths[:batch_size_t] - start).clamp(max=step)
+            x_t = pack_padded_sequence(x_t, lengths_t, batch_first=dim == 1)
+            y_t = pack_padded_sequence(y_t, lengths_t, batch_first=dim == 1)
+        chunks.append((x_t, y_t, batch_size_t))
+    return chunks
 
 
 def _detach_hidden(hidden):
@@ -40,13 +83,81 @@ def _detach_hidden(hidden):
     return apply_to_tensor(hidden, torch.Tensor.detach)
 
 
+def _narrow_hidden(hidden, batch_size, dim=1):
+    """Keep the hidden vector of the first `batch_size` sequences."""
+    return apply_to_tensor(hidden, lambda t: t.narrow(dim, 0, batch_size))
+
+
+class StreamBatches(object):
+    """Batches of a contiguous stream of tokens for stateful language modelling.
+
+    The stream is cut in `batch_size` contiguous sub-streams, the remainder
+    being dropped, and each batch holds the next `seq_len` tokens of every
+    sub-stream: the sequence `i` of a batch is the continuation of the
+    sequence `i` of the previous batch, so that the hidden state can be
+    carried over from batch to batch (see `stateful` in
+    :func:`create_supervised_tbptt_trainer`). Targets are the inputs shifted
+    by one token.
+
+    Args:
+        stream (`torch.Tensor`): 1D tensor of tokens.
+        batch_size (int): number of sub-streams.
+        seq_len (int): number of time steps of each batch (the last batch may
+            be shorter).
+        dim (int, optional): time dimension of the batches, 0 (default) for
+            `(seq_len, batch_size)` tensors, 1 for `(batch_size, seq_len)`.
+
+    Examples:
+
+    .. code-block:: python
+
+        data = StreamBatches(corpus_tokens, batch_size=32, seq_len=1024)
+        trainer = create_supervised_tbptt_trainer(model, optimizer, loss_fn,
+                                                  tbtt_step=64, stateful=True)
+        trainer.run(data, max_epochs=10)
+
+    """
+
+    def __init__(self, stream, batch_size, seq_len, dim=0):
+        if stream.ndimension() != 1:
+            raise ValueError("Argument stream should be a 1D tensor")
+        if dim not in (0, 1):
+            raise ValueError("Argument dim should be 0 or 1")
+        num_steps = stream.numel() // batch_size
+        if num_steps < 2:
+            raise ValueError("Stream is too short for a batch size of {}"
+                             .format(batch_size))
+        # (batch_size, num_steps), each row is a contiguous sub-stream
+        self.streams = stream[:num_steps * batch_size].view(batch_size, -1)
+        self.seq_len = seq_len
+        self.dim = dim
+
+    def __len__(self):
+        num_steps = self.streams.shape[1] - 1
+        return (num_steps + self.seq_len - 1) // self.seq_len
+
+    def __iter__(self):
+        num_steps = self.streams.shape[1] - 1
+        for start in range(0, num_steps, self.seq_len):
+            stop = min(start + self.seq_len, num_steps)
+            x = self.streams[:, start:stop]
+            y = self.streams[:, start + 1:stop + 1]
+            if self.dim == 0:
+                x, y = x.t(), y.t()
+            yield x.contiguous(), y.contiguous()
+
+
 def create_supervised_tbptt_trainer(
     model,
     optimizer,
     loss_fn,
     tbtt_step,
     dim=0,
-    device=None
+    device=None,
+    stateful=False,
+    accumulation_steps=1,
+    packed=False,
+    hidden_batch_dim=1
 ):
     """Create a trainer for truncated backprop through time supervised models.
 
@@ -62,6 +173,35 @@ def create_supervised_tbptt_trainer(
     time steps of the sequence, while backpropagating through the same
     `tbtt_step` time steps.
 
+    The losses of the time chunks are accumulated on the device and read once
+    per batch. The `Tbptt_Events` are only fired, and the loss of each chunk
+    only stored in `engine.state.output`, if handlers are registered for them.
+
+    If `stateful` is True, the (detached) hidden state at the end of a batch is
+    used as initial hidden state of the next batch, which requires data laid
+    out as contiguous streams, e.g. with :class:`StreamBatches`. It is stored
+    in `engine.state.hidden`, reset to None at the start of each epoch, and
+    can be reset by any handler by setting `engine.state.hidden = None`.
+
+    With `accumulation_steps` greater than 1, each chunk is still
+    backpropagated on its own, so that memory stays bounded by `tbtt_step`,
+    but the gradients of `accumulation_steps` consecutive chunks are
+    accumulated before an optimizer step. The loss of each chunk is divided by
+    the number of chunks of its accumulation window, so that the step uses the
+    average gradient.
+
+    Batches of padded sequences of different lengths can be given as
+    `(x, y, lengths)`, `lengths` holding the length of each sequence. The
+    sequences are then sorted by decreasing length and, in each chunk, the
+    sequences that are already finished are dropped from the inputs, the
+    targets and the hidden state (sliced along `hidden_batch_dim`), so that no
+    compute is spent on chunks of padding. The padding of the sequences that
+    end inside a chunk is still fed to the model and to `loss_fn`, unless
+    `packed` is True: the chunks are then given to the model and to `loss_fn`
+    as `torch.nn.utils.rnn.PackedSequence`, which both should accept, e.g.
+    with `loss_fn = lambda y_pred, y: F.cross_entropy(y_pred.data, y.data)`.
+    Sequence lengths are not supported with `stateful`.
+
     Args:
         model (`torch.nn.Module`): the model to train
         optimizer (`torch.optim.Optimizer`): the optimizer to use
@@ -70,47 +210,170 @@ def create_supervised_tbptt_trainer(
         dim (int): axis representing the time dimension
         device (str, optional): device type specification (default: None).
             Applies to both model and batches.
+        stateful (bool, optional): if True, carry the hidden state from batch
+            to batch (default: False).
+        accumulation_steps (int, optional): number of chunks per optimizer
+            step (default: 1). If None, the optimizer steps once per batch.
+        packed (bool, optional): if True, chunks of batches with sequence
+            lengths are packed (default: False).
+        hidden_batch_dim (int, optional): batch dimension of the hidden state
+            tensors (default: 1, as for `torch.nn.RNN`, `LSTM` and `GRU`).
 
     Returns:
         Engine: a trainer engine with supervised update function
 
     """
+    if accumulation_steps is not None and accumulation_steps < 1:
+        raise ValueError("Argument accumulation_steps should be a positive "
+                         "integer or None")
+
     if device:
         model.to(device)
 
     def _update(engine, batch):
-        loss_list = []
-        hidden = None
+        loss_sum = 0
+        num_chunks = 0
+        hidden = engine.state.hidden if stateful else None
+        # Chunk losses are only read on the host if a handler needs them
+        fire_time_events = any(e in engine._event_handlers for e in Tbptt_Events)
 
+        model.train()
         # Batches split in time chunks
+        if stateful and len(batch) == 3:
+            raise ValueError("Sequence lengths are not supported by a "
+                             "stateful trainer")
         batch_splits = _prepare_tbptt_batch(
-            batch, tbtt_step, dim=dim, device=device
+            batch, tbtt_step, dim=dim, device=device, packed=packed
         )
-        for x_t, y_t in batch_splits:
+        window = accumulation_steps or len(batch_splits)
+        for i, (x_t, y_t, batch_size_t) in enumerate(batch_splits):
             # Fire event for start of iteration
-            engine.fire_event(Tbptt_Events.TIME_ITERATION_STARTED)
+            if fire_time_events:
+                engine.fire_event(Tbptt_Events.TIME_ITERATION_STARTED)
+            # Number of chunks of the current accumulation window
+            window_start = i - i % window
+            window_size = min(window, len(batch_splits) - window_start)
             # Forward, backward and
-            model.train()
-            optimizer.zero_grad()
+            if i == window_start:
+                optimizer.zero_grad()
             if hidden is None:
                 y_pred_t, hidden = model(x_t)
             else:
                 hidden = _detach_hidden(hidden)
+                if batch_size_t is not None:
+                    # Drop the hidden state of the finished sequences
+                    hidden = _narrow_hidden(hidden, batch_size_t,
+                                            dim=hidden_batch_dim)
                 y_pred_t, hidden = model(x_t, hidden)
             loss_t = loss_fn(y_pred_t, y_t)
-            loss_t.backward()
-            optimizer.step()
+            if window_size > 1:
+                (loss_t / window_size).backward()
+            else:
+                loss_t.backward()
+            if i == window_start + window_size - 1:
+                optimizer.step()
+
+            # Losses are accumulated on the device, without synchronization
+            loss_sum = loss_sum + loss_t.detach()
+            num_chunks += 1
 
-            # Setting state of engine for consistent behaviour
-            engine.state.output = loss_t.item()
-            loss_list.append(loss_t.item())
+            if fire_time_events:
+                # Setting state of engine for consistent behaviour
+                engine.state.output = loss_t.item()
+                # Fire event for end of iteration
+                engine.fire_event(Tbptt_Events.TIME_ITERATION_COMPLETED)
 
-            # Fire event for end of iteration
-            engine.fire_event(Tbptt_Events.TIME_ITERATION_COMPLETED)
+        if stateful:
+            engine.state.hidden = _detach_hidden(hidden)
 
         # return average loss over the time splits
-        return sum(loss_list) / len(loss_list)
+        return (loss_sum / num_chunks).item()
 
     engine = Engine(_update)
     engine.register_events(*Tbptt_Events)
+
+    if stateful:
+        @engine.on(Events.EPOCH_STARTED)
+        def _reset_hidden(engine):
+            engine.state.hidden = None
+
+    return engine
+
+
+def create_supervised_tbptt_evaluator(
+    model,
+    tbtt_step,
+    metrics={},
+    dim=0,
+    device=None,
+    packed=False,
+    hidden_batch_dim=1
+):
+    """Create an evaluator for long sequences, processed by time chunks.
+
+    The sequences of a batch are fed to the model `tbtt_step` time steps at a
+    time, under `torch.no_grad`, the hidden state being carried over from
+    chunk to chunk, so that the peak memory is proportional to `tbtt_step`
+    rather than to the length of the sequences. The output of each chunk,
+    `(y_pred_t, y_t)`, is set in `engine.state.output` and the
+    `Tbptt_Events.TIME_ITERATION_COMPLETED` event is fired, on which the
+    metrics are updated. The output of the batch is the output of its last
+    chunk.
+
+    Batches of padded sequences of different lengths can be given as
+    `(x, y, lengths)`, as for :func:`create_supervised_tbptt_trainer`.
+
+    Args:
+        model (`torch.nn.Module`): the model to evaluate
+        tbtt_step (int): the length of time chunks (last one may be smaller)
+        metrics (dict of str - :class:`ignite.metrics.Metric`): a map of metric
+            names to Metrics, updated with the output of each chunk
+        dim (int): axis representing the time dimension
+        device (str, optional): device type specification (default: None).
+            Applies to both model and batches.
+        packed (bool, optional): if True, chunks of batches with sequence
+            lengths are packed (default: False).
+        hidden_batch_dim (int, optional): batch dimension of the hidden state
+            tensors (default: 1, as for `torch.nn.RNN`, `LSTM` and `GRU`).
+
+    Returns:
+        Engine: an evaluator engine with chunked inference function
+
+    """
+    if device:
+        model.to(device)
+
+    def _inference(engine, batch):
+        hidden = None
+        output = None
+        model.eval()
+        with torch.no_grad():
+            batch_splits = _prepare_tbptt_batch(
+                batch, tbtt_step, dim=dim, device=device, packed=packed
+            )
+            for x_t, y_t, batch_size_t in batch_splits:
+                engine.fire_event(Tbptt_Events.TIME_ITERATION_STARTED)
+                if hidden is None:
+                    y_pred_t, hidden = model(x_t)
+                else:
+                    if batch_size_t is not None:
+                        # Drop the hidden state of the finished sequences
+                        hidden = _narrow_hidden(hidden, batch_size_t,
+                                                dim=hidden_batch_dim)
+                    y_pred_t, hidden = model(x_t, hidden)
+                output = y_pred_t, y_t
+                engine.state.output = output
+                engine.fire_event(Tbptt_Events.TIME_ITERATION_COMPLETED)
+        return output
+
+    engine = Engine(_inference)
+    engine.register_events(*Tbptt_Events)
+
+    for name, metric in metrics.items():
+        engine.add_event_handler(Events.EPOCH_STARTED, metric.started)
+        engine.add_event_handler(Tbptt_Events.TIME_ITERATION_COMPLETED,
+                                 metric.iteration_completed)
+        engine.add_event_handler(Events.EPOCH_COMPLETED, metric.completed,
+                                 name)
+
     return engine
@@ -1,7 +1,10 @@
 
 from ignite.contrib.handlers.param_scheduler import ParamScheduler, CyclicalScheduler, \
-    LinearCyclicalScheduler, CosineAnnealingScheduler
+    LinearCyclicalScheduler, CosineAnnealingScheduler, PiecewiseLinear, ConcatScheduler, LRScheduler, \
+    create_lr_scheduler_with_warmup
 
 from ignite.contrib.handlers.tqdm_logger import ProgressBar
 
-__all__ = ['ProgressBar']
+from ignite.contrib.handlers.lr_finder import FastaiLRFinder
+
+__all__ = ['ProgressBar', 'FastaiLRFinder']
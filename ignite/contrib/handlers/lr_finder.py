@@ -0,0 +1,185 @@
+from __future__ import division
+
+import contextlib
+import copy
+import logging
+
+import numpy as np
+import torch
+
+from ignite._utils import _replace
+from ignite.contrib.handlers.param_scheduler import ParamScheduler, PiecewiseLinear
+from ignite.engine import Events
+
+
+class _ExponentialScheduler(ParamScheduler):
+    """Increases the parameter exponentially from `start_value` to `end_value` in `num_events` events."""
+    def __init__(self, optimizer, param_name, start_value, end_value, num_events):
+        super(_ExponentialScheduler, self).__init__(optimizer, param_name)
+        self.start_value = start_value
+        self.end_value = end_value
+        self._num_steps = max(num_events - 1, 1)
+
+    def _values_at(self, event_indices):
+        return self.start_value * (self.end_value / self.start_value) ** (event_indices / self._num_steps)
+
+    def get_param(self):
+        return float(self._values_at(self.event_index))
+
+    def simulate_values(self, num_events):
+        return self._values_at(np.arange(num_events))
+
+
+class FastaiLRFinder(object):
+    """
+    Learning rate range finder: the learning rate is increased at each iteration while the loss is recorded,
+    so that a good learning rate can be chosen from a single short run, see `Cyclical Learning Rates for
+    Training Neural Networks <https://arxiv.org/abs/1506.01186>`_ and the `fastai` library.
+
+    When attached, the handler snapshots the states of the model and of the optimizer in memory, ramps the
+    learning rate with a :class:`ignite.contrib.handlers.ParamScheduler`, records the smoothed loss, stops the run
+    when the loss diverges or after `num_iter` iterations and finally restores the original states.
+
+    Examples:
+
+    .. code-block:: python
+
+        lr_finder = FastaiLRFinder()
+        with lr_finder.attach(trainer, model, optimizer, end_lr=10.0) as trainer_with_lr_finder:
+            trainer_with_lr_finder.run(train_loader)
+
+        results = lr_finder.get_results()  # {'lr': [...], 'loss': [...]}
+        optimizer.param_groups[0]['lr'] = lr_finder.lr_suggestion()
+        trainer.run(train_loader, max_epochs=10)
+
+    """
+    def __init__(self):
+        self._history = None
+        self._best_loss = None
+        self._diverge_flag = False
+        self._logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+    def _run_started(self, engine, optimizer, start_lr, end_lr, num_iter, step_mode):
+        self._history = {'lr': [], 'loss': []}
+        self._best_loss = None
+        self._diverge_flag = False
+
+        if num_iter is None:
+            num_iter = len(engine.state.dataloader) * engine.state.max_epochs
+        elif hasattr(engine.state.dataloader, '__len__') and \
+                num_iter > len(engine.state.dataloader) * engine.state.max_epochs:
+            self._logger.warning("Run is shorter than num_iter={}, the learning rate will not reach end_lr"
+                                 .format(num_iter))
+        self._num_iter = num_iter
+
+        if start_lr is None:
+            start_lr = optimizer.param_groups[0]['lr']
+            if step_mode == 'exp' and start_lr <= 0:
+                raise ValueError("The learning rate of the optimizer should be positive with step_mode='exp', "
+                                 "or start_lr should be given")
+        if step_mode == 'exp':
+            self._lr_schedule = _ExponentialScheduler(optimizer, 'lr', start_lr, end_lr, num_iter)
+        else:
+            self._lr_schedule = PiecewiseLinear(optimizer, 'lr', [(0, start_lr), (max(num_iter - 1, 1), end_lr)])
+        self._logger.info("Running LR finder for {} iterations".format(num_iter))
+
+    def _set_lr(self, engine):
+        self._lr_schedule(engine)
+
+    def _log_lr_and_loss(self, engine, output_transform, smooth_f, diverge_th):
+        loss = float(output_transform(engine.state.output))
+        self._history['lr'].append(self._lr_schedule.optimizer.param_groups[0]['lr'])
+        if len(self._history['loss']) > 0:
+            loss = smooth_f * loss + (1 - smooth_f) * self._history['loss'][-1]
+        self._history['loss'].append(loss)
+
+        if self._best_loss is None or loss < self._best_loss:
+            self._best_loss = loss
+
+        if not np.isfinite(loss) or loss > diverge_th * self._best_loss:
+            self._diverge_flag = True
+            self._logger.info("Stopping early, the loss has diverged")
+            engine.terminate()
+        elif engine.state.iteration >= self._num_iter:
+            engine.terminate()
+
+    @contextlib.contextmanager
+    def attach(self, engine, model, optimizer, output_transform=lambda output: output, num_iter=None,
+               start_lr=None, end_lr=10.0, step_mode='exp', smooth_f=0.05, diverge_th=5.0):
+        """Attaches the LR finder to a trainer, as a context manager. The trainer should be run inside the
+        context, after which the handlers are removed and the states of `model` and `optimizer` are restored.
+
+        Args:
+            engine (Engine): the trainer.
+            model (`torch.nn.Module`): the trained model.
+            optimizer (`torch.optim.Optimizer`): the optimizer of the model.
+            output_transform (callable, optional): a callable that is used to transform the `engine`'s
+                `process_function`'s output into the loss (a number or a 0-dim tensor).
+            num_iter (int, optional): number of iterations of the range test. By default, all the iterations
+                of the run.
+            start_lr (float, optional): initial learning rate, positive with `step_mode='exp'`. By default, the
+                current learning rate of the optimizer.
+            end_lr (float, optional): learning rate at the end of the range test (default: 10).
+            step_mode (str, optional): 'exp' (default) to increase the learning rate exponentially, or 'linear'.
+            smooth_f (float, optional): smoothing factor of the exponential moving average of the loss, in
+                `[0, 1)` (default: 0.05).
+            diverge_th (float, optional): the run stops when the smoothed loss exceeds `diverge_th` times the
+                best smoothed loss (default: 5).
+
+        Returns:
+            the engine, with the handlers of the LR finder attached.
+        """
+        if step_mode not in ('exp', 'linear'):
+            raise ValueError("Argument step_mode should be 'exp' or 'linear', got {}".format(step_mode))
+
+        if not (0 <= smooth_f < 1):
+            raise ValueError("Argument smooth_f should be in [0, 1)")
+
+        if diverge_th < 1:
+            raise ValueError("Argument diverge_th should be at least 1")
+
+        if num_iter is not None and num_iter < 1:
+            raise ValueError("Argument num_iter should be a positive integer")
+
+        if step_mode == 'exp' and start_lr is not None and start_lr <= 0:
+            raise ValueError("Argument start_lr should be positive with step_mode='exp'")
+
+        model_state = _replace(model.state_dict(), torch.Tensor, lambda t: t.detach().clone())
+        optimizer_state = copy.deepcopy(optimizer.state_dict())
+
+        handlers = [
+            (Events.STARTED, self._run_started, (optimizer, start_lr, end_lr, num_iter, step_mode)),
+            (Events.ITERATION_STARTED, self._set_lr, ()),
+            (Events.ITERATION_COMPLETED, self._log_lr_and_loss, (output_transform, smooth_f, diverge_th)),
+        ]
+        for event_name, handler, args in handlers:
+            engine.add_event_handler(event_name, handler, *args)
+
+        try:
+            yield engine
+        finally:
+            for event_name, handler, _ in handlers:
+                if engine.has_event_handler(handler, event_name):
+                    engine.remove_event_handler(handler, event_name)
+            model.load_state_dict(model_state)
+            optimizer.load_state_dict(optimizer_state)
+            engine.should_terminate = False
+
+    def get_results(self):
+        """Returns the history of the range test, a `dict` with the learning rates under `'lr'` and the smoothed
+        losses under `'loss'`."""
+        return self._history
+
+    def lr_suggestion(self):
+        """Returns the suggested learning rate, at which the smoothed loss decreases the fastest."""
+        if self._history is None or len(self._history['loss']) < 2:
+            raise RuntimeError("The LR finder should be run for at least 2 iterations before suggesting a "
+                               "learning rate")
+        losses = np.array(self._history['loss'])
+        if self._diverge_flag:
+            # the last loss is the diverged one
+            losses = losses[:-1]
+        if len(losses) < 2:
+            return self._history['lr'][0]
+        return self._history['lr'][int(np.argmin(np.diff(losses))) + 1]
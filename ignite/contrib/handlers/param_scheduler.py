@@ -1,30 +1,63 @@
 from __future__ import division
 
+import warnings
+from collections import deque
+
 import numpy as np
 
+try:
+    from torch.optim.lr_scheduler import LRScheduler as _LRScheduler
+except ImportError:
+    from torch.optim.lr_scheduler import _LRScheduler
+
 
 class ParamScheduler(object):
     """Updates an optimizer's parameter value during training.
+
+    Args:
+        optimizer (`torch.optim.Optimizer`): the optimizer whose parameter is updated.
+        param_name (str): name of the parameter in the optimizer's `param_groups`.
+        save_history (bool, optional): if True, the values of the parameter of each param group are stored in
+            `engine.state.param_history[param_name]` at each event.
+        history_size (int, optional): if not None, only the last `history_size` values are kept in the history,
+            which is then a bounded ring buffer (`collections.deque`) instead of a list growing with the number of
+            events.
+
+    Subclasses implement :meth:`get_param`, and may implement :meth:`simulate_values` so that the values can be
+    precomputed with :meth:`precompute` and looked up at each event.
     """
-    def __init__(self, optimizer, param_name, save_history=False):
+    _state_attrs = ('event_index', 'num_events')
+
+    def __init__(self, optimizer, param_name, save_history=False, history_size=None):
         self.optimizer = optimizer
         self.param_name = param_name
         self.save_history = save_history
+        self.history_size = history_size
         self.event_index = 0
+        self.num_events = 0  # number of events since the beginning, never reset
+        self._values = None
 
     def __call__(self, engine):
-        value = self.get_param()
+        if self._values is not None and self.num_events < len(self._values):
+            value = float(self._values[self.num_events])
+        else:
+            value = self.get_param()
         for param_group in self.optimizer.param_groups:
             param_group[self.param_name] = value
 
+        self._end_event(engine)
+
+    def _end_event(self, engine):
         if self.save_history:
             if not hasattr(engine.state, 'param_history'):
                 setattr(engine.state, 'param_history', {})
-            engine.state.param_history.setdefault(self.param_name, [])
+            history = engine.state.param_history.setdefault(
+                self.param_name, [] if self.history_size is None else deque(maxlen=self.history_size))
             values = [pg[self.param_name] for pg in self.optimizer.param_groups]
-            engine.state.param_history[self.param_name].append(values)
+            history.append(values)
 
         self.event_index += 1
+        self.num_events += 1
 
     def get_param(self):
         """Method to get current optimizer's parameter value
@@ -32,6 +65,42 @@ class ParamScheduler(object):
         """
         raise NotImplementedError()
 
+    def simulate_values(self, num_events):
+        """Computes the values of the parameter for the first `num_events` events, without modifying the
+        scheduler.
+
+        Args:
+            num_events (int): number of events.
+
+        Returns:
+            numpy.ndarray: array of shape `(num_events,)`.
+        """
+        raise NotImplementedError()
+
+    def precompute(self, num_events):
+        """Precomputes the values of the parameter for the first `num_events` events with :meth:`simulate_values`,
+        so that each event only looks up its value. Values of later events are computed with :meth:`get_param`.
+
+        Args:
+            num_events (int): number of events, e.g. `max_epochs * len(data)` for a scheduler called on
+                `Events.ITERATION_STARTED`.
+        """
+        self._values = np.asarray(self.simulate_values(num_events), dtype=np.float64)
+
+    def state_dict(self):
+        """Returns the state of the scheduler as a `dict`, to be saved with the optimizer in checkpoints."""
+        return {name: getattr(self, name) for name in self._state_attrs}
+
+    def load_state_dict(self, state_dict):
+        """Restores the state of the scheduler from a `dict` returned by :meth:`state_dict`, so that the schedule
+        resumes where it stopped.
+
+        Args:
+            state_dict (dict): the state of the scheduler.
+        """
+        for name in self._state_attrs:
+            setattr(self, name, state_dict[name])
+
 
 class CyclicalScheduler(ParamScheduler):
     """Updates an optimizer's parameter value over a cycle of some size.
@@ -39,6 +108,8 @@ class CyclicalScheduler(ParamScheduler):
     NOTE: If the scheduler is bound to an 'ITERATION_*' event, 'cycle_size' should usually be
     the number of batches in an epoch.
     """
+    _state_attrs = ParamScheduler._state_attrs + ('cycle', 'cycle_size')
+
     def __init__(self,
                  optimizer,
                  param_name,
@@ -46,13 +117,16 @@ class CyclicalScheduler(ParamScheduler):
                  end_value,
                  cycle_size,
                  cycle_mult=1,
-                 save_history=False):
-        super(CyclicalScheduler, self).__init__(optimizer, param_name, save_history=save_history)
+                 save_history=False,
+                 history_size=None):
+        super(CyclicalScheduler, self).__init__(optimizer, param_name, save_history=save_history,
+                                                history_size=history_size)
         self.start_value = start_value
         self.end_value = end_value
         self.cycle_size = cycle_size
         self.cycle_mult = cycle_mult
         self.cycle = 0
+        self._initial_cycle_size = cycle_size
 
     def __call__(self, engine):
         if self.event_index != 0 and self.event_index % self.cycle_size == 0:
@@ -62,6 +136,29 @@ class CyclicalScheduler(ParamScheduler):
 
         return super(CyclicalScheduler, self).__call__(engine)
 
+    def get_param(self):
+        return float(self._get_cycle_values(self.event_index / self.cycle_size))
+
+    def _get_cycle_values(self, cycle_progress):
+        """Values of the parameter at the given progress in the cycle, in `[0, 1)`, as a scalar or an array."""
+        raise NotImplementedError()
+
+    def simulate_values(self, num_events):
+        events = np.arange(num_events)
+        if self.cycle_mult == 1:
+            cycle_sizes = np.full(num_events, self._initial_cycle_size, dtype=np.float64)
+            event_indices = events % self._initial_cycle_size
+        else:
+            sizes = [self._initial_cycle_size]
+            while sum(sizes) < num_events:
+                sizes.append(sizes[-1] * self.cycle_mult)
+            sizes = np.array(sizes, dtype=np.float64)
+            starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+            cycles = np.searchsorted(starts, events, side='right') - 1
+            cycle_sizes = sizes[cycles]
+            event_indices = events - starts[cycles]
+        return np.broadcast_to(self._get_cycle_values(event_indices / cycle_sizes), (num_events,)).astype(np.float64)
+
 
 class LinearCyclicalScheduler(CyclicalScheduler):
     """
@@ -71,9 +168,8 @@ class LinearCyclicalScheduler(CyclicalScheduler):
     def __init__(self, *args, **kwargs):
         super(LinearCyclicalScheduler, self).__init__(*args, **kwargs)
 
-    def get_param(self):
-        cycle_progress = self.event_index / self.cycle_size
-        return self.end_value + (self.start_value - self.end_value) * abs(cycle_progress - 0.5) * 2
+    def _get_cycle_values(self, cycle_progress):
+        return self.end_value + (self.start_value - self.end_value) * np.abs(cycle_progress - 0.5) * 2
 
 
 class CosineAnnealingScheduler(CyclicalScheduler):
@@ -83,6 +179,270 @@ class CosineAnnealingScheduler(CyclicalScheduler):
     def __init__(self, *args, **kwargs):
         super(CosineAnnealingScheduler, self).__init__(*args, **kwargs)
 
-    def get_param(self):
-        cycle_progress = self.event_index / self.cycle_size
+    def _get_cycle_values(self, cycle_progress):
         return self.start_value + ((self.end_value - self.start_value) / 2) * (1 + np.cos(np.pi * cycle_progress))
+
+
+class PiecewiseLinear(ParamScheduler):
+    """
+    Piecewise linear parameter scheduler: the value is interpolated linearly between consecutive milestones,
+    and is constant before the first and after the last milestone.
+
+    Args:
+        optimizer (`torch.optim.Optimizer`): the optimizer whose parameter is updated.
+        param_name (str): name of the parameter in the optimizer's `param_groups`.
+        milestones_values (list of tuples (int, float)): list of `(event_index, value)` pairs, with increasing
+            event indices.
+        save_history (bool, optional): see :class:`ParamScheduler`.
+        history_size (int, optional): see :class:`ParamScheduler`.
+
+    Examples:
+
+    .. code-block:: python
+
+        # lr goes from 0.1 to 0.5 over 10 events, then decreases to 0 at event 100
+        scheduler = PiecewiseLinear(optimizer, 'lr', milestones_values=[(0, 0.1), (10, 0.5), (100, 0.0)])
+        trainer.add_event_handler(Events.ITERATION_STARTED, scheduler)
+
+    """
+    def __init__(self, optimizer, param_name, milestones_values, save_history=False, history_size=None):
+        super(PiecewiseLinear, self).__init__(optimizer, param_name, save_history=save_history,
+                                              history_size=history_size)
+        if len(milestones_values) < 1:
+            raise ValueError("Argument milestones_values should be a non-empty list of (event_index, value)")
+
+        milestones, values = zip(*milestones_values)
+        if any(m < 0 for m in milestones) or any(b <= a for a, b in zip(milestones[:-1], milestones[1:])):
+            raise ValueError("Milestones should be non-negative and increasing, got {}".format(milestones))
+
+        self.milestones = np.array(milestones, dtype=np.float64)
+        self.values = np.array(values, dtype=np.float64)
+
+    def get_param(self):
+        return float(np.interp(self.event_index, self.milestones, self.values))
+
+    def simulate_values(self, num_events):
+        return np.interp(np.arange(num_events), self.milestones, self.values)
+
+
+class LRScheduler(ParamScheduler):
+    """
+    Wraps a native `torch.optim.lr_scheduler` object, so that it can be combined with the other schedulers, e.g. in
+    a :class:`ConcatScheduler`. The wrapped scheduler is stepped at each event but the first one, at which the
+    learning rates are set to its initial ones.
+
+    Args:
+        lr_scheduler (`torch.optim.lr_scheduler._LRScheduler`): the scheduler to wrap.
+        save_history (bool, optional): see :class:`ParamScheduler`.
+        history_size (int, optional): see :class:`ParamScheduler`.
+
+    Examples:
+
+    .. code-block:: python
+
+        step_scheduler = StepLR(optimizer, step_size=3, gamma=0.1)
+        scheduler = LRScheduler(step_scheduler)
+        trainer.add_event_handler(Events.ITERATION_STARTED, scheduler)
+
+    """
+    def __init__(self, lr_scheduler, save_history=False, history_size=None):
+        if not isinstance(lr_scheduler, _LRScheduler):
+            raise TypeError("Argument lr_scheduler should be a subclass of torch.optim.lr_scheduler._LRScheduler, "
+                            "got {}".format(type(lr_scheduler)))
+
+        self.lr_scheduler = lr_scheduler
+        self._start_lrs = None
+        super(LRScheduler, self).__init__(lr_scheduler.optimizer, 'lr', save_history=save_history,
+                                          history_size=history_size)
+
+    def __call__(self, engine):
+        if self.num_events > 0:
+            self.lr_scheduler.step()
+        else:
+            self._set_initial_lrs()
+        self._end_event(engine)
+
+    def _initial_lrs(self):
+        if self._start_lrs is not None:
+            return self._start_lrs
+        if hasattr(self.lr_scheduler, 'get_last_lr'):
+            return self.lr_scheduler.get_last_lr()
+        return self.lr_scheduler.base_lrs
+
+    def _set_initial_lrs(self):
+        # the learning rates may have been changed since the creation of the wrapped scheduler, e.g. by a warmup
+        for param_group, lr in zip(self.optimizer.param_groups, self._initial_lrs()):
+            param_group['lr'] = lr
+
+    def _restart_from(self, lr):
+        """Restarts the wrapped scheduler from the learning rate `lr` for all the param groups."""
+        for param_group in self.optimizer.param_groups:
+            param_group['lr'] = lr
+            param_group['initial_lr'] = lr
+        # the next steps of chainable schedulers start from the current learning rates, the closed forms from the
+        # base ones
+        self.lr_scheduler.base_lrs = [lr] * len(self.optimizer.param_groups)
+        self._start_lrs = [lr] * len(self.optimizer.param_groups)
+
+    def get_param(self):
+        return self.optimizer.param_groups[0]['lr']
+
+    def simulate_values(self, num_events):
+        """Computes the learning rates of the first param group for the next `num_events` events, from the
+        current state of the wrapped scheduler, which is restored afterwards."""
+        state_dict = self.lr_scheduler.state_dict()
+        lrs = [param_group['lr'] for param_group in self.optimizer.param_groups]
+        values = []
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                for i in range(num_events):
+                    if self.num_events + i > 0:
+                        self.lr_scheduler.step()
+                    else:
+                        self._set_initial_lrs()
+                    values.append(self.optimizer.param_groups[0]['lr'])
+        finally:
+            self.lr_scheduler.load_state_dict(state_dict)
+            for param_group, lr in zip(self.optimizer.param_groups, lrs):
+                param_group['lr'] = lr
+        return np.array(values, dtype=np.float64)
+
+    def precompute(self, num_events):
+        raise NotImplementedError("LRScheduler steps the wrapped scheduler at each event")
+
+    def state_dict(self):
+        state_dict = super(LRScheduler, self).state_dict()
+        state_dict['lr_scheduler'] = self.lr_scheduler.state_dict()
+        return state_dict
+
+    def load_state_dict(self, state_dict):
+        super(LRScheduler, self).load_state_dict(state_dict)
+        self.lr_scheduler.load_state_dict(state_dict['lr_scheduler'])
+
+
+class ConcatScheduler(ParamScheduler):
+    """
+    Runs several schedulers of the same parameter one after the other: the scheduler `i` is used for
+    `durations[i]` events, and the last one for all the remaining events.
+
+    Args:
+        schedulers (list of :class:`ParamScheduler`): schedulers of the same optimizer and parameter.
+        durations (list of int): number of events of each scheduler but the last one.
+        save_history (bool, optional): see :class:`ParamScheduler`.
+        history_size (int, optional): see :class:`ParamScheduler`.
+
+    Examples:
+
+    .. code-block:: python
+
+        # linear warmup over 100 iterations, then cyclical learning rate with cycles of 1000 iterations
+        warmup = PiecewiseLinear(optimizer, 'lr', milestones_values=[(0, 0.0), (99, 0.4)])
+        cyclical = LinearCyclicalScheduler(optimizer, 'lr', 0.4, 0.01, 1000)
+        scheduler = ConcatScheduler([warmup, cyclical], durations=[100])
+        trainer.add_event_handler(Events.ITERATION_STARTED, scheduler)
+
+    """
+    def __init__(self, schedulers, durations, save_history=False, history_size=None):
+        if len(schedulers) < 2:
+            raise ValueError("Argument schedulers should be a list of at least two schedulers")
+
+        if not all(isinstance(s, ParamScheduler) for s in schedulers):
+            raise TypeError("Argument schedulers should be a list of ParamScheduler")
+
+        if len(durations) != len(schedulers) - 1 or any(not isinstance(d, int) or d < 1 for d in durations):
+            raise ValueError("Argument durations should be a list of {} positive integers"
+                             .format(len(schedulers) - 1))
+
+        optimizer, param_name = schedulers[0].optimizer, schedulers[0].param_name
+        if any(s.optimizer is not optimizer or s.param_name != param_name for s in schedulers):
+            raise ValueError("Schedulers should update the same parameter of the same optimizer")
+
+        super(ConcatScheduler, self).__init__(optimizer, param_name, save_history=save_history,
+                                              history_size=history_size)
+        self.schedulers = schedulers
+        self.durations = durations
+        self._switch_events = np.cumsum(durations)
+
+    def _current_scheduler(self):
+        return self.schedulers[int(np.searchsorted(self._switch_events, self.event_index, side='right'))]
+
+    def __call__(self, engine):
+        self._current_scheduler()(engine)
+        self._end_event(engine)
+
+    def get_param(self):
+        return self._current_scheduler().get_param()
+
+    def simulate_values(self, num_events):
+        values = []
+        remaining = num_events
+        for scheduler, duration in zip(self.schedulers, list(self.durations) + [num_events]):
+            values.append(scheduler.simulate_values(min(duration, remaining)))
+            remaining -= len(values[-1])
+            if remaining == 0:
+                break
+        return np.concatenate(values)
+
+    def precompute(self, num_events):
+        remaining = num_events
+        for scheduler, duration in zip(self.schedulers, list(self.durations) + [num_events]):
+            if not isinstance(scheduler, LRScheduler):
+                scheduler.precompute(min(duration, remaining))
+            remaining -= min(duration, remaining)
+
+    def state_dict(self):
+        state_dict = super(ConcatScheduler, self).state_dict()
+        state_dict['schedulers'] = [s.state_dict() for s in self.schedulers]
+        return state_dict
+
+    def load_state_dict(self, state_dict):
+        super(ConcatScheduler, self).load_state_dict(state_dict)
+        for scheduler, scheduler_state in zip(self.schedulers, state_dict['schedulers']):
+            scheduler.load_state_dict(scheduler_state)
+
+
+def create_lr_scheduler_with_warmup(lr_scheduler, warmup_start_value, warmup_end_value, warmup_duration,
+                                    save_history=False, history_size=None):
+    """
+    Creates a scheduler with a linear warmup of the learning rate from `warmup_start_value` to `warmup_end_value`
+    during `warmup_duration` events, followed by `lr_scheduler`.
+
+    Args:
+        lr_scheduler (:class:`ParamScheduler` or `torch.optim.lr_scheduler._LRScheduler`): the scheduler used
+            after the warmup. A native PyTorch scheduler is wrapped in a :class:`LRScheduler` and restarted from
+            `warmup_end_value` (its base learning rates are set to `warmup_end_value`).
+        warmup_start_value (float): learning rate at the first event.
+        warmup_end_value (float): learning rate at the last event of the warmup.
+        warmup_duration (int): number of events of the warmup, at least 2.
+        save_history (bool, optional): see :class:`ParamScheduler`.
+        history_size (int, optional): see :class:`ParamScheduler`.
+
+    Returns:
+        ConcatScheduler: the scheduler, to attach to the engine.
+
+    Examples:
+
+    .. code-block:: python
+
+        step_scheduler = StepLR(optimizer, step_size=len(train_loader), gamma=0.5)
+        scheduler = create_lr_scheduler_with_warmup(step_scheduler, warmup_start_value=0.0, warmup_end_value=0.4,
+                                                    warmup_duration=500)
+        trainer.add_event_handler(Events.ITERATION_STARTED, scheduler)
+
+    """
+    if not isinstance(warmup_duration, int) or warmup_duration < 2:
+        raise ValueError("Argument warmup_duration should be an integer of at least 2")
+
+    if isinstance(lr_scheduler, _LRScheduler):
+        lr_scheduler = LRScheduler(lr_scheduler)
+        # the native scheduler takes over from the end of the warmup
+        lr_scheduler._restart_from(warmup_end_value)
+
+    if not isinstance(lr_scheduler, ParamScheduler):
+        raise TypeError("Argument lr_scheduler should be a ParamScheduler or a torch.optim.lr_scheduler._LRScheduler")
+
+    warmup = PiecewiseLinear(lr_scheduler.optimizer, lr_scheduler.param_name,
+                             milestones_values=[(0, warmup_start_value), (warmup_duration - 1, warmup_end_value)])
+    return ConcatScheduler([warmup, lr_scheduler], durations=[warmup_duration],
+                           save_history=save_history, history_size=history_size)
@@ -1,3 +1,10 @@
+import threading
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
 try:
     from tqdm import tqdm
 except ImportError:
@@ -10,6 +17,20 @@ class ProgressBar:
     """
     TQDM progress bar handler to log training progress and computed metrics.
 
+    The bar is refreshed at a bounded rate: the description and the metrics are only formatted when a refresh
+    happens, so that the cost per iteration is negligible for fast models. The first iteration of each epoch is
+    always displayed.
+
+    Args:
+        refresh_interval (float, optional): minimum number of seconds between two refreshes (default: 0.1).
+            If None, the rate is only limited by `refresh_every`.
+        refresh_every (int, optional): if not None, the bar is refreshed at most every `refresh_every`
+            iterations. If both `refresh_interval` and `refresh_every` are None, the bar is refreshed on every
+            iteration.
+        background (bool, optional): if True, the bar is rendered every `refresh_interval` seconds by a
+            separate thread, reading a snapshot of the progress published by the engine's thread without locking.
+            The handler called on every iteration then only stores the snapshot.
+
     Examples:
 
         Create a progress bar that shows you some metrics as they are computed,
@@ -24,35 +45,125 @@ class ProgressBar:
         When adding attaching the progress bar to an engine, it is recommend that you replace
         every print operation in the engine's handlers triggered every iteration with
         ``pbar.log_message`` to guarantee the correct format of the stdout.
+
+        If the data has no `len()`, the bar shows the number of iterations and the rate instead of the percentage.
     """
 
-    def __init__(self):
-        self.pbar = None
+    def __init__(self, refresh_interval=0.1, refresh_every=None, background=False):
+        if refresh_interval is not None and refresh_interval < 0:
+            raise ValueError("Argument refresh_interval should be positive or None")
 
-    def _reset(self, engine):
-        self.pbar = tqdm(
-            total=len(engine.state.dataloader),
-            leave=False,
-            bar_format='{desc}[{n_fmt}/{total_fmt}] {percentage:3.0f}%|{bar}{postfix} [{elapsed}<{remaining}]')
+        if refresh_every is not None and refresh_every < 1:
+            raise ValueError("Argument refresh_every should be a positive integer or None")
+
+        if background and not refresh_interval:
+            raise ValueError("Argument background requires a positive refresh_interval")
 
-    def _close(self, engine):
-        self.pbar.close()
         self.pbar = None
+        self._refresh_interval = refresh_interval
+        self._refresh_every = refresh_every
+        self._background = background
+        self._n = 0  # iterations of the current epoch
+        self._last_refresh_time = None
+        self._last_refresh_n = 0
+        # background rendering
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
 
-    def _update(self, engine, metric_names=None):
-        if self.pbar is None:
-            self._reset(engine)
+    def _reset(self, engine):
+        try:
+            total = len(engine.state.dataloader)
+        except TypeError:
+            total = None
+
+        if total is not None:
+            bar_format = '{desc}[{n_fmt}/{total_fmt}] {percentage:3.0f}%|{bar}{postfix} [{elapsed}<{remaining}]'
+        else:
+            bar_format = '{desc}[{n_fmt}] {rate_fmt}{postfix} [{elapsed}]'
+
+        # refreshes are rate limited by this handler, each update is displayed
+        self.pbar = tqdm(total=total, leave=False, bar_format=bar_format, mininterval=0, miniters=1)
+        self._n = 0
+        self._last_refresh_time = None
+        self._last_refresh_n = 0
 
-        self.pbar.set_description('Epoch {}'.format(engine.state.epoch))
+    def _close(self, engine):
+        with self._lock:
+            self._snapshot = None
+            if self.pbar is not None:
+                self.pbar.close()
+            self.pbar = None
 
+    @staticmethod
+    def _check_metrics(engine, metric_names):
         if metric_names is not None:
             if not all(metric in engine.state.metrics for metric in metric_names):
                 raise KeyError("metrics not found in engine.state.metrics")
 
-            metrics = {name: '{:.2e}'.format(engine.state.metrics[name]) for name in metric_names}
-            self.pbar.set_postfix(**metrics)
+    def _refresh(self, epoch, n, metrics, metric_names):
+        self.pbar.set_description('Epoch {}'.format(epoch), refresh=False)
+
+        if metric_names is not None:
+            values = {name: '{:.2e}'.format(metrics[name]) for name in metric_names if name in metrics}
+            self.pbar.set_postfix(refresh=False, **values)
+
+        self.pbar.update(n - self._last_refresh_n)
+        self._last_refresh_n = n
+
+    def _should_refresh(self):
+        if self._last_refresh_time is None:
+            return True
+        if self._refresh_every is not None and self._n - self._last_refresh_n < self._refresh_every:
+            return False
+        if self._refresh_interval is not None and perf_counter() - self._last_refresh_time < self._refresh_interval:
+            return False
+        return True
 
-        self.pbar.update()
+    def _update(self, engine, metric_names=None):
+        if self.pbar is None:
+            self._reset(engine)
+
+        self._n += 1
+        if self._should_refresh():
+            self._check_metrics(engine, metric_names)
+            self._refresh(engine.state.epoch, self._n, engine.state.metrics, metric_names)
+            self._last_refresh_time = perf_counter()
+
+    def _publish(self, engine, metric_names=None):
+        if self.pbar is None:
+            with self._lock:
+                self._reset(engine)
+            self._check_metrics(engine, metric_names)
+            if self._thread is None:
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._render_loop, args=(metric_names,))
+                self._thread.daemon = True
+                self._thread.start()
+
+        self._n += 1
+        # a single assignment of an immutable tuple, read as a whole by the rendering thread
+        self._snapshot = (engine.state.epoch, self._n, engine.state.metrics)
+
+    def _render_loop(self, metric_names):
+        while not self._stop_event.wait(self._refresh_interval):
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is not None and self.pbar is not None:
+                    self._refresh(snapshot[0], snapshot[1], snapshot[2], metric_names)
+
+    def _stop(self, engine):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _on_exception(self, engine, e):
+        # the rendering thread is stopped even if the run does not complete
+        self._stop(engine)
+        self._close(engine)
+        raise e
 
     @staticmethod
     def log_message(message):
@@ -76,4 +187,9 @@ class ProgressBar:
             raise TypeError("metric_names should be a list, got {} instead".format(type(metric_names)))
 
         engine.add_event_handler(Events.EPOCH_COMPLETED, self._close)
-        engine.add_event_handler(Events.ITERATION_COMPLETED, self._update, metric_names)
+        if self._background:
+            engine.add_event_handler(Events.ITERATION_COMPLETED, self._publish, metric_names)
+            engine.add_event_handler(Events.COMPLETED, self._stop)
+            engine.add_event_handler(Events.EXCEPTION_RAISED, self._on_exception)
+        else:
+            engine.add_event_handler(Events.ITERATION_COMPLETED, self._update, metric_names)
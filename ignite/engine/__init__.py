@@ -1,6 +1,7 @@
 import torch
 
 from ignite.engine.engine import Engine, State, Events
+from ignite.engine.cached_data import CachedData
 from ignite._utils import convert_tensor
 
 
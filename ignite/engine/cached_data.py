@@ -0,0 +1,158 @@
+import logging
+import mmap
+import tempfile
+
+import torch
+
+from ignite._utils import tree_flatten, tree_unflatten
+
+
+class CachedData(object):
+    """Wraps the data of :meth:`ignite.engine.Engine.run` to record the batches on the first full pass and replay
+    them on the next ones, e.g. on the next runs of an evaluator, so that the data are not read and decoded again.
+
+    The tensors of the batches (found in dicts, lists, tuples, namedtuples and dataclasses) are copied to the cpu
+    and stored:
+
+    - in memory with `storage='memory'`,
+    - in shared memory with `storage='shared'`, so that they can be sent to other processes without copy,
+    - in a temporary memory-mapped file with `storage='mmap'`, in `dirname` (by default, the default temporary
+      directory); the file is deleted when the cache is cleared.
+
+    Only a complete pass is replayed: if the iteration stops before the end of the data, e.g. with
+    :meth:`ignite.engine.Engine.terminate`, the recorded batches are dropped and the next pass records again. Data
+    should not be shuffled nor randomly augmented, as the same batches are replayed in the same order. The batches
+    of the recording pass can be modified in place, but the replayed batches should not be.
+
+    Args:
+        data (Iterable): collection of batches, e.g. a `torch.utils.data.DataLoader`.
+        storage (str, optional): 'memory' (default), 'shared' or 'mmap'.
+        dirname (str, optional): directory of the memory-mapped file, with `storage='mmap'`.
+        max_bytes (int, optional): maximum size of the recorded tensors. If the data do not fit, the cache is evicted
+            and the batches are read from `data` on every pass. By default, there is no limit.
+
+    Examples:
+
+    .. code-block:: python
+
+        evaluator = create_supervised_evaluator(model, metrics={'accuracy': CategoricalAccuracy()})
+        cached_val_loader = CachedData(val_loader, storage='mmap', max_bytes=8 * 1024 ** 3)
+
+        @trainer.on(Events.EPOCH_COMPLETED)
+        def validate(trainer):
+            evaluator.run(cached_val_loader)
+
+    """
+    def __init__(self, data, storage='memory', dirname=None, max_bytes=None):
+        if storage not in ('memory', 'shared', 'mmap'):
+            raise ValueError("Argument storage should be 'memory', 'shared' or 'mmap', got {}".format(storage))
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("Argument max_bytes should be a non-negative integer")
+        self.data = data
+        self.storage = storage
+        self.dirname = dirname
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.evicted = False
+        self._batches = None
+        self._file = None
+        self._logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+    @property
+    def cached(self):
+        """True if the batches are replayed from the cache."""
+        return self._batches is not None
+
+    def clear(self):
+        """Drops the recorded batches, the next pass reads and records the data again."""
+        self._batches = None
+        self.nbytes = 0
+        self.evicted = False
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self):
+        if self._batches is not None:
+            return len(self._batches)
+        return len(self.data)
+
+    def __iter__(self):
+        if self._batches is not None:
+            return self._replay()
+        if self.evicted:
+            return iter(self.data)
+        return self._record()
+
+    def _replay(self):
+        for leaves, spec in self._batches:
+            yield tree_unflatten(leaves, spec)
+
+    def _store(self, tensor, f):
+        if self.storage == 'mmap':
+            tensor = tensor.detach().cpu().contiguous()
+            offset = f.tell()
+            if tensor.numel() > 0:
+                f.write(tensor.reshape(-1).view(torch.uint8).numpy())
+            return _MmapTensor(tensor.dtype, tuple(tensor.shape), offset, tensor.numel() * tensor.element_size())
+        # copied, so that the cache does not share memory with the batches of the recording pass, which may be
+        # modified in place, nor moves them to shared memory
+        tensor = tensor.detach().to('cpu', copy=True)
+        if self.storage == 'shared':
+            tensor.share_memory_()
+        return tensor
+
+    def _record(self):
+        batches = []
+        nbytes = 0
+        f = tempfile.TemporaryFile(dir=self.dirname) if self.storage == 'mmap' else None
+        completed = False
+        try:
+            for batch in self.data:
+                if batches is not None:
+                    leaves, spec = tree_flatten(batch)
+                    nbytes += sum(x.numel() * x.element_size() for x in leaves if isinstance(x, torch.Tensor))
+                    if self.max_bytes is not None and nbytes > self.max_bytes:
+                        self._logger.warning("Data do not fit in {} bytes, the cache is evicted"
+                                             .format(self.max_bytes))
+                        self.evicted = True
+                        batches = None
+                    else:
+                        leaves = [self._store(x, f) if isinstance(x, torch.Tensor) else x for x in leaves]
+                        batches.append((leaves, spec))
+                yield batch
+            completed = batches is not None
+        finally:
+            if completed:
+                if f is not None:
+                    batches = _map_batches(batches, f)
+                    self._file = f
+                self._batches = batches
+                self.nbytes = nbytes
+                self._logger.info("Cached {} batches ({} bytes) in {}".format(len(batches), nbytes, self.storage))
+            elif f is not None:
+                f.close()
+
+
+class _MmapTensor(object):
+    """Placeholder of a tensor written in the memory-mapped file of :class:`CachedData`."""
+    def __init__(self, dtype, shape, offset, nbytes):
+        self.dtype = dtype
+        self.shape = shape
+        self.offset = offset
+        self.nbytes = nbytes
+
+
+def _map_batches(batches, f):
+    """Replaces the placeholders of `batches` by views of the memory-mapped file `f`."""
+    f.flush()
+    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY) if f.tell() > 0 else None
+
+    def _load(ref):
+        if ref.nbytes == 0:
+            return torch.empty(ref.shape, dtype=ref.dtype)
+        data = torch.frombuffer(buffer, dtype=torch.uint8, count=ref.nbytes, offset=ref.offset)
+        return data.view(ref.dtype).view(ref.shape)
+
+    return [([_load(x) if isinstance(x, _MmapTensor) else x for x in leaves], spec) for leaves, spec in batches]
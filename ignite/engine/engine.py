@@ -142,6 +142,47 @@ class Engine(object):
         self._event_handlers[event_name].append((handler, args, kwargs))
         self._logger.debug("added handler for event %s ", event_name)
 
+    def has_event_handler(self, handler, event_name=None):
+        """Check if the specified event has the specified handler.
+
+        Args:
+            handler (Callable): the callable event handler.
+            event_name: The event the handler attached to. Set this
+                to ``None`` to search all events.
+        """
+        if event_name is not None:
+            if event_name not in self._event_handlers:
+                return False
+            events = [event_name]
+        else:
+            events = list(self._event_handlers)
+        for e in events:
+            for h, _, _ in self._event_handlers[e]:
+                if h == handler:
+                    return True
+        return False
+
+    def remove_event_handler(self, handler, event_name):
+        """Remove event handler `handler` from registered handlers of the engine
+
+        Args:
+            handler (Callable): the callable event handler that should be removed
+            event_name: The event the handler attached to.
+
+        """
+        if event_name not in self._event_handlers:
+            raise ValueError("Input event name '{}' does not exist".format(event_name))
+
+        new_event_handlers = [(h, args, kwargs) for h, args, kwargs in self._event_handlers[event_name]
+                              if h != handler]
+        if len(new_event_handlers) == len(self._event_handlers[event_name]):
+            raise ValueError("Input handler '{}' is not found among registered event handlers".format(handler))
+        if len(new_event_handlers) > 0:
+            self._event_handlers[event_name] = new_event_handlers
+        else:
+            # `_handle_exception` checks for the presence of the event
+            del self._event_handlers[event_name]
+
     def _check_signature(self, fn, fn_description, *args, **kwargs):
         exception_msg = None
 
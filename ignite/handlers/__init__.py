@@ -1,4 +1,7 @@
-from ignite.handlers.checkpoint import ModelCheckpoint
+from ignite.handlers.checkpoint import ModelCheckpoint, load_checkpoint
+from ignite.handlers.mmap_checkpoint import save_mmap_checkpoint, load_mmap_checkpoint, load_mmap_state_dict
+from ignite.handlers.sharded_checkpoint import ShardedCheckpoint, load_sharded_checkpoint
+from ignite.handlers.emergency_checkpoint import EmergencyCheckpoint
 from ignite.handlers.timing import Timer
 from ignite.handlers.early_stopping import EarlyStopping
 from ignite.handlers.terminate_on_nan import TerminateOnNan
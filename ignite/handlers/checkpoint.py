@@ -1,8 +1,317 @@
+import bz2
+import copy
+import hashlib
+import io
+import logging
 import os
+import pickle
+import struct
 import tempfile
+import threading
+import zlib
+from multiprocessing.pool import ThreadPool
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
 
 import torch
 
+from ignite._utils import _replace
+from ignite.engine import Events
+from ignite.handlers.mmap_checkpoint import _MMAP_MAGIC, _read_mmap_checkpoint, _write_mmap_checkpoint
+
+
+def _snapshot(obj):
+    """Copy of `obj` that does not share memory with it, tensors being copied to CPU memory."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    elif isinstance(obj, dict):
+        result = type(obj)((k, _snapshot(v)) for k, v in obj.items())
+        if hasattr(obj, '_metadata'):
+            # keep the version metadata of `torch.nn.Module.state_dict`
+            result._metadata = copy.deepcopy(obj._metadata)
+        return result
+    elif type(obj) in (list, tuple):
+        return type(obj)(_snapshot(v) for v in obj)
+    return copy.deepcopy(obj)
+
+
+class _AsyncWriter(object):
+    """Runs tasks in order on a background thread, with a bounded number of pending tasks.
+
+    An exception raised by a task is re-raised by the next call to `submit` or `flush`, and the tasks queued after
+    the failed one are dropped.
+    """
+    def __init__(self, max_pending):
+        self._tasks = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = None
+
+    def _run(self):
+        while True:
+            fn, args = self._tasks.get()
+            try:
+                if self._error is None:
+                    fn(*args)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._tasks.task_done()
+
+    def _raise_error(self):
+        if self._error is not None:
+            # the tasks queued after the failed one are all dropped before accepting new ones
+            self._tasks.join()
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, fn, *args):
+        self._raise_error()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ModelCheckpointWriter")
+            self._thread.daemon = True
+            self._thread.start()
+        # blocks while `max_pending` tasks are in flight
+        self._tasks.put((fn, args))
+
+    def flush(self):
+        self._tasks.join()
+        self._raise_error()
+
+
+_MANIFEST_MAGIC = b"IGNITE_MANIFEST\n"
+_COMPRESSED_MAGIC = b"IGNITE_COMPRESS\n"
+_COMPRESSION_CHUNK_SIZE = 4 * 1024 * 1024
+
+_CODECS = {'zlib': zlib, 'bz2': bz2}
+if lzma is not None:
+    _CODECS['lzma'] = lzma
+
+
+class _TensorRef(object):
+    """Placeholder of a tensor stored as a blob in a manifest."""
+    def __init__(self, digest):
+        self.digest = digest
+
+
+def _fsync_dir(dirname):
+    try:
+        fd = os.open(dirname, os.O_RDONLY)
+    except OSError:
+        # directories can not be opened on some platforms, e.g. Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(dirname, path, write_fn, fsync=False):
+    tmp = tempfile.NamedTemporaryFile(delete=False, dir=dirname)
+    try:
+        write_fn(tmp.file)
+        if fsync:
+            tmp.file.flush()
+            os.fsync(tmp.file.fileno())
+    except BaseException:
+        tmp.close()
+        os.remove(tmp.name)
+        raise
+    else:
+        tmp.close()
+        os.rename(tmp.name, path)
+        if fsync:
+            _fsync_dir(dirname)
+
+
+def _map_chunks(fn, chunks, num_threads):
+    if num_threads > 1 and len(chunks) > 1:
+        pool = ThreadPool(min(num_threads, len(chunks)))
+        try:
+            return pool.map(fn, chunks)
+        finally:
+            pool.close()
+            pool.join()
+    return [fn(chunk) for chunk in chunks]
+
+
+def _compress(data, codec, num_threads):
+    """Compresses `data` by independent chunks, in parallel threads (codecs release the GIL)."""
+    # slices of `bytes`, as the codecs of Python 2 do not accept memoryviews
+    chunks = [data[i:i + _COMPRESSION_CHUNK_SIZE] for i in range(0, len(data), _COMPRESSION_CHUNK_SIZE)]
+    compressed = _map_chunks(_CODECS[codec].compress, chunks, num_threads)
+    header = _COMPRESSED_MAGIC + codec.encode() + b"\n" + struct.pack("<Q", len(compressed))
+    header += struct.pack("<{}Q".format(len(compressed)), *[len(c) for c in compressed])
+    return header, compressed
+
+
+def _decompress(f, num_threads):
+    codec = f.readline().strip().decode()
+    if codec not in _CODECS:
+        raise ValueError("Unknown compression codec '{}'".format(codec))
+    num_chunks = struct.unpack("<Q", f.read(8))[0]
+    lengths = struct.unpack("<{}Q".format(num_chunks), f.read(8 * num_chunks))
+    chunks = [f.read(n) for n in lengths]
+    return b"".join(_map_chunks(_CODECS[codec].decompress, chunks, num_threads))
+
+
+class _TensorStore(object):
+    """Content-addressed store of tensors.
+
+    Each distinct tensor (same dtype, shape and bytes) is written once in `blobs_dirname`, and reference counted
+    by the manifests using it. Blobs are removed when no manifest references them anymore.
+    """
+    def __init__(self, blobs_dirname, fsync=False):
+        self.blobs_dirname = blobs_dirname
+        self._fsync = fsync
+        self._refcounts = {}
+        self._manifest_digests = {}
+
+    @staticmethod
+    def _digest(tensor):
+        h = hashlib.sha1()
+        h.update("{}{}".format(tensor.dtype, tuple(tensor.shape)).encode())
+        h.update(tensor.reshape(-1).view(torch.uint8).numpy())
+        return h.hexdigest()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blobs_dirname, digest + ".pth")
+
+    def _put(self, tensor, digests, written):
+        tensor = tensor.detach().cpu().contiguous()
+        digest = self._digest(tensor)
+        path = self._blob_path(digest)
+        if digest not in self._refcounts and not os.path.exists(path):
+            _atomic_write(self.blobs_dirname, path, lambda f: torch.save(tensor, f), fsync=self._fsync)
+            written.append(path)
+        digests.append(digest)
+        return _TensorRef(digest)
+
+    def dump(self, obj, f, manifest_path):
+        digests = []
+        written = []
+        try:
+            manifest = {
+                "blobs_dirname": os.path.basename(self.blobs_dirname),
+                "object": _replace(obj, torch.Tensor, lambda t: self._put(t, digests, written)),
+            }
+            f.write(_MANIFEST_MAGIC)
+            pickle.dump(manifest, f, protocol=2)
+        except BaseException:
+            # the blobs written by this dump are not referenced by any manifest
+            for path in written:
+                os.remove(path)
+            raise
+        for digest in digests:
+            self._refcounts[digest] = self._refcounts.get(digest, 0) + 1
+        # a manifest saved again to the same path releases the blobs of the previous one
+        self.release(manifest_path)
+        self._manifest_digests[manifest_path] = digests
+
+    def scan(self, dirname, num_threads=1):
+        """Counts the references of the manifests already present in `dirname`, e.g. when resuming into a
+        populated directory, so that the blobs they use are not removed."""
+        blobs_basename = os.path.basename(self.blobs_dirname)
+        for fname in os.listdir(dirname):
+            path = os.path.join(dirname, fname)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                manifest = _read_manifest(f, num_threads)
+            if manifest is None or manifest["blobs_dirname"] != blobs_basename:
+                continue
+            digests = []
+            _replace(manifest["object"], _TensorRef, lambda ref: digests.append(ref.digest))
+            for digest in digests:
+                self._refcounts[digest] = self._refcounts.get(digest, 0) + 1
+            self._manifest_digests[path] = digests
+
+    def release(self, manifest_path):
+        for digest in self._manifest_digests.pop(manifest_path, []):
+            self._refcounts[digest] -= 1
+            if self._refcounts[digest] == 0:
+                del self._refcounts[digest]
+                os.remove(self._blob_path(digest))
+
+
+def _map_mmap_checkpoint(obj, map_location):
+    """Moves the (cpu) tensors of a memory-mapped checkpoint as `torch.load` would with `map_location`."""
+    if map_location is None:
+        return obj
+    if isinstance(map_location, dict):
+        map_location = map_location.get('cpu', 'cpu')
+    if callable(map_location):
+        raise ValueError("Argument map_location can not be a callable for memory-mappable checkpoints")
+    device = torch.device(map_location)
+    if device.type == 'cpu':
+        return obj
+    return _replace(obj, torch.Tensor, lambda t: t.to(device))
+
+
+def _read_manifest(f, num_threads):
+    """Returns the manifest stored in `f`, or None if `f` is not a manifest."""
+    magic = f.read(len(_MANIFEST_MAGIC))
+    if magic == _COMPRESSED_MAGIC:
+        return _read_manifest(io.BytesIO(_decompress(f, num_threads)), num_threads)
+    elif magic != _MANIFEST_MAGIC:
+        return None
+    return pickle.load(f)
+
+
+def _load(f, dirname, map_location, num_threads):
+    magic = f.read(len(_MANIFEST_MAGIC))
+    if magic == _COMPRESSED_MAGIC:
+        return _load(io.BytesIO(_decompress(f, num_threads)), dirname, map_location, num_threads)
+    elif magic == _MMAP_MAGIC:
+        return _map_mmap_checkpoint(_read_mmap_checkpoint(f), map_location)
+    elif magic != _MANIFEST_MAGIC:
+        f.seek(0)
+        return torch.load(f, map_location=map_location)
+
+    manifest = pickle.load(f)
+    blobs_dirname = os.path.join(dirname, manifest["blobs_dirname"])
+    cache = {}
+
+    def _load_blob(ref):
+        if ref.digest not in cache:
+            cache[ref.digest] = torch.load(os.path.join(blobs_dirname, ref.digest + ".pth"),
+                                           map_location=map_location)
+        return cache[ref.digest]
+
+    return _replace(manifest["object"], _TensorRef, _load_blob)
+
+
+def load_checkpoint(path, map_location=None, num_threads=4):
+    """Loads an object saved by :class:`ModelCheckpoint`.
+
+    Supports plain files written with `torch.save`, compressed files, memory-mappable files written with
+    `save_format='mmap'` (see :func:`ignite.handlers.load_mmap_checkpoint`) and manifests written with
+    `deduplicate=True`, whose tensors are read from the blobs directory next to the manifest.
+
+    Args:
+        path (str): path of the checkpoint file.
+        map_location (optional): passed to `torch.load`. For memory-mappable files, a device (or a string) or a
+            `dict` mapping 'cpu' to a device, to which the tensors are moved.
+        num_threads (int, optional): number of threads decompressing chunks of compressed files.
+
+    Returns:
+        the saved object.
+    """
+    with open(path, "rb") as f:
+        return _load(f, os.path.dirname(path), map_location, num_threads)
+
 
 class ModelCheckpoint(object):
     """ ModelCheckpoint handler can be used to periodically save objects to disk.
@@ -22,12 +331,12 @@ class ModelCheckpoint(object):
             for more details.
         save_interval (int, optional):
             if not None, objects will be saved to disk every `save_interval` calls to the handler.
-            Exactly one of (`save_interval`, `score_function`) arguments must be provided.
+            Exactly one of (`save_interval`, `score_function`, `max_overhead`/`max_time_at_risk`) must be provided.
         score_function (Callable, optional):
             if not None, it should be a function taking a single argument,
             an `ignite.engine.Engine` object,
             and return a score (`float`). Objects with highest scores will be retained.
-            Exactly one of (`save_interval`, `score_function`) arguments must be provided.
+            Exactly one of (`save_interval`, `score_function`, `max_overhead`/`max_time_at_risk`) must be provided.
         score_name (str, optional):
             if `score_function` not None, it is possible to store its absolute value using `score_name`. See Notes for
             more details.
@@ -44,6 +353,48 @@ class ModelCheckpoint(object):
             If True, will create directory 'dirname' if it doesnt exist.
         save_as_state_dict (bool, optional):
             If True, will save only the `state_dict` of the objects specified, otherwise the whole object will be saved.
+        async_save (bool, optional):
+            If True, objects are snapshotted (tensors of the `state_dict` are copied to CPU memory, whole objects are
+            deep-copied) and the handler returns immediately. Serialization, renaming and removal of old files are
+            performed in order by a background thread. Pending saves are flushed on `Events.COMPLETED` of the engine
+            the handler is called with, or by calling :meth:`flush`.
+        max_pending_saves (int, optional):
+            If `async_save` is True, maximum number of saves in flight. The handler blocks when this number is
+            reached.
+        deduplicate (bool, optional):
+            If True, tensors are stored once by content in the directory `{filename_prefix}_blobs` of `dirname`,
+            and each saved file is a small manifest referencing them, so that unchanged tensors (e.g. a frozen
+            backbone) are not written again. Blobs no longer referenced by the `n_saved` retained checkpoints, nor
+            by the manifests already present in `dirname`, are removed. Requires `save_as_state_dict=True`. Saved
+            files should be loaded with :func:`ignite.handlers.load_checkpoint`.
+        bundle (bool, optional):
+            If True, all the objects of a call are saved in a single file `{filename_prefix}_{step_number}.pth`
+            holding a `dict` mapping names to objects, instead of one file per object.
+        compression (str, optional):
+            If not None, name of the codec used to compress saved files: 'zlib', 'bz2' or 'lzma'. The serialized
+            data is split in chunks compressed in parallel by `compression_threads` threads. Compressed files
+            should be loaded with :func:`ignite.handlers.load_checkpoint`.
+        compression_threads (int, optional):
+            Number of threads used to compress chunks of the saved files.
+        fsync (bool, optional):
+            If True, saved files and their directory are flushed to disk with `os.fsync` before the handler
+            considers the save complete, so that a checkpoint survives a system crash. Only applies to atomic saves.
+        save_format (str, optional):
+            'torch' (default) to serialize with `torch.save`, or 'mmap' to write files in the memory-mappable
+            format of :func:`ignite.handlers.save_mmap_checkpoint`, which can be loaded lazily without an
+            intermediate in-memory copy. 'mmap' requires `save_as_state_dict=True` and can not be combined with
+            `deduplicate`.
+        max_overhead (float, optional):
+            If not None, the handler chooses by itself when to save: objects are saved as soon as the time spent
+            saving stays below this fraction of the wall time, e.g. 0.05 for 5%. The cost of a save is the time
+            the handler blocks the engine, measured on each save, and the time between saves is measured
+            between calls to the handler.
+        max_time_at_risk (float, optional):
+            If not None, the handler chooses by itself when to save, so that no more than this number of seconds
+            of work is lost if training stops, i.e. it saves when the next call to the handler would come after
+            this delay since the last save. If both `max_overhead` and `max_time_at_risk` are given, saving is
+            triggered by either of them, the work at risk taking precedence over the overhead budget.
+            Decisions are logged with the `logging` module at level INFO.
 
     Notes:
           This handler expects two arguments: an `Engine` object and a `dict`
@@ -62,6 +413,12 @@ class ModelCheckpoint(object):
           For example, `score_name="val_loss"` and `score_function` that returns `-loss` (as objects with highest scores
           will be retained), then saved models filenames will be `model_resnet_10_val_loss=0.1234.pth`.
 
+          In the adaptive modes (`max_overhead` or `max_time_at_risk`), the first call always saves, to measure
+          the cost of a save, and `step_number` is still the number of calls to the handler.
+
+          If `bundle` is True, the `{name}_` part is omitted from the filenames and the file contains a `dict`
+          mapping names to the saved objects.
+
     Examples:
         >>> import os
         >>> from ignite.engine import Engine, Events
@@ -81,7 +438,11 @@ class ModelCheckpoint(object):
                  n_saved=1,
                  atomic=True, require_empty=True,
                  create_dir=True,
-                 save_as_state_dict=False):
+                 save_as_state_dict=False,
+                 async_save=False, max_pending_saves=2,
+                 deduplicate=False,
+                 bundle=False, compression=None, compression_threads=4, fsync=False,
+                 save_format='torch', max_overhead=None, max_time_at_risk=None):
 
         self._dirname = dirname
         self._fname_prefix = filename_prefix
@@ -94,9 +455,48 @@ class ModelCheckpoint(object):
         self._iteration = 0
         self._save_as_state_dict = save_as_state_dict
 
-        if not (save_interval is None) ^ (score_function is None):
-            raise ValueError("Exactly one of `save_interval`, or `score_function` "
-                             "arguments must be provided.")
+        self._writer = _AsyncWriter(max_pending_saves) if async_save else None
+        self._removing = []  # list of tuples (priority, saved_objects) being removed by the writer
+        self._flushed_engines = []
+
+        if async_save and max_pending_saves < 1:
+            raise ValueError("Argument max_pending_saves should be a positive integer")
+
+        self._bundle = bundle
+        self._compression = compression
+        self._compression_threads = compression_threads
+        self._fsync = fsync
+
+        self._save_format = save_format
+
+        if save_format not in ('torch', 'mmap'):
+            raise ValueError("Argument save_format should be 'torch' or 'mmap'")
+
+        if save_format == 'mmap' and deduplicate:
+            raise ValueError("Argument save_format='mmap' can not be combined with deduplicate=True")
+
+        if save_format == 'mmap' and not save_as_state_dict:
+            raise ValueError("Argument save_format='mmap' requires save_as_state_dict=True")
+
+        if compression is not None and compression not in _CODECS:
+            raise ValueError("Argument compression should be None or one of {}".format(sorted(_CODECS)))
+
+        if deduplicate and not save_as_state_dict:
+            raise ValueError("Argument deduplicate requires save_as_state_dict=True")
+
+        self._max_overhead = max_overhead
+        self._max_time_at_risk = max_time_at_risk
+        adaptive = max_overhead is not None or max_time_at_risk is not None
+
+        if max_overhead is not None and not (0.0 < max_overhead < 1.0):
+            raise ValueError("Argument max_overhead should be in (0, 1)")
+
+        if max_time_at_risk is not None and max_time_at_risk <= 0:
+            raise ValueError("Argument max_time_at_risk should be positive")
+
+        if [save_interval is not None, score_function is not None, adaptive].count(True) != 1:
+            raise ValueError("Exactly one of `save_interval`, `score_function` or "
+                             "`max_overhead`/`max_time_at_risk` arguments must be provided.")
 
         if score_function is None and score_name is not None:
             raise ValueError("If `score_name` is provided, then `score_function` "
@@ -121,28 +521,120 @@ class ModelCheckpoint(object):
                                  "directory anyway, pass `require_empty=False`. "
                                  "".format(filename_prefix, dirname))
 
+        self._logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self._logger.addHandler(logging.NullHandler())
+        self._save_cost = None  # measured duration of the last save, in seconds
+        self._call_interval = None  # running average of the duration between calls, in seconds
+        self._last_call_time = None
+        self._last_save_time = None
+
+        self._tensor_store = None
+        if deduplicate:
+            blobs_dirname = os.path.join(dirname, "{}_blobs".format(filename_prefix))
+            if not os.path.exists(blobs_dirname):
+                os.makedirs(blobs_dirname)
+            self._tensor_store = _TensorStore(blobs_dirname, fsync=fsync)
+            self._tensor_store.scan(dirname, num_threads=compression_threads)
+
     def _save(self, obj, path):
         if not self._atomic:
-            self._internal_save(obj, path)
+            with open(path, "wb") as f:
+                self._internal_save(obj, f, path)
         else:
-            tmp = tempfile.NamedTemporaryFile(delete=False, dir=self._dirname)
-            try:
-                self._internal_save(obj, tmp.file)
-            except BaseException:
-                tmp.close()
-                os.remove(tmp.name)
-                raise
-            else:
-                tmp.close()
-                os.rename(tmp.name, path)
+            _atomic_write(self._dirname, path, lambda f: self._internal_save(obj, f, path), fsync=self._fsync)
 
-    def _internal_save(self, obj, path):
-        if not self._save_as_state_dict:
-            torch.save(obj, path)
+    def _internal_save(self, obj, f, path):
+        if self._compression is None:
+            self._serialize(obj, f, path)
+        else:
+            buffer = io.BytesIO()
+            self._serialize(obj, buffer, path)
+            header, chunks = _compress(buffer.getvalue(), self._compression, self._compression_threads)
+            f.write(header)
+            for chunk in chunks:
+                f.write(chunk)
+
+    def _serialize(self, obj, f, path):
+        if self._tensor_store is not None:
+            self._tensor_store.dump(obj, f, path)
+        elif self._save_format == 'mmap':
+            _write_mmap_checkpoint(obj, f)
         else:
-            if not hasattr(obj, "state_dict") or not callable(obj.state_dict):
-                raise ValueError("Object should have `state_dict` method")
-            torch.save(obj.state_dict(), path)
+            torch.save(obj, f)
+
+    def _get_payload(self, obj):
+        if not self._save_as_state_dict:
+            return obj
+        if not hasattr(obj, "state_dict") or not callable(obj.state_dict):
+            raise ValueError("Object should have `state_dict` method")
+        return obj.state_dict()
+
+    def _remove(self, paths):
+        for p in paths:
+            os.remove(p)
+            if self._tensor_store is not None:
+                self._tensor_store.release(p)
+
+    def flush(self):
+        """Blocks until all pending asynchronous saves are written to disk.
+
+        Re-raises the first exception that occured in the background writer, if any. The saves which were not
+        written are then forgotten by the handler.
+        """
+        if self._writer is not None:
+            self._call_writer(self._writer.flush)
+
+    def _call_writer(self, fn, *args):
+        try:
+            fn(*args)
+        except BaseException:
+            self._rollback()
+            raise
+
+    def _rollback(self):
+        """Forgets the saved files which were not written, and keeps track again of the files which were not
+        removed, after an error of the background writer."""
+        saved = []
+        for priority, paths in self._saved + self._removing:
+            paths = [p for p in paths if os.path.exists(p)]
+            if len(paths) > 0:
+                saved.append((priority, paths))
+        saved.sort(key=lambda item: item[0])
+        self._saved = saved
+        self._removing = []
+
+    def _flush_on_completed(self, engine):
+        self.flush()
+
+    def _should_save_adaptive(self, now):
+        """Decides whether the current call saves, in the adaptive modes."""
+        if self._last_call_time is not None:
+            interval = now - self._last_call_time
+            self._call_interval = interval if self._call_interval is None \
+                else 0.9 * self._call_interval + 0.1 * interval
+        self._last_call_time = now
+
+        if self._save_cost is None:
+            self._logger.info("Step %d: saving to measure the cost of a save", self._iteration)
+            return True
+
+        elapsed = now - self._last_save_time
+        if self._max_time_at_risk is not None and \
+                elapsed + self._call_interval + self._save_cost > self._max_time_at_risk:
+            self._logger.info("Step %d: saving, %.3gs of work at risk and the next call is expected "
+                              "after the limit of %.3gs", self._iteration, elapsed, self._max_time_at_risk)
+            return True
+
+        if self._max_overhead is not None:
+            # fraction of the wall time spent saving if a save happens now
+            overhead = self._save_cost / (elapsed + self._save_cost)
+            if overhead <= self._max_overhead:
+                self._logger.info("Step %d: saving, overhead would be %.2f%% of wall time (budget %.2f%%)",
+                                  self._iteration, 100 * overhead, 100 * self._max_overhead)
+                return True
+
+        self._logger.debug("Step %d: skipping save, %.3gs since last save", self._iteration, elapsed)
+        return False
 
     def __call__(self, engine, to_save):
         if len(to_save) == 0:
@@ -153,11 +645,25 @@ class ModelCheckpoint(object):
         if self._score_function is not None:
             priority = self._score_function(engine)
 
-        else:
+        elif self._save_interval is not None:
             priority = self._iteration
             if (self._iteration % self._save_interval) != 0:
                 return
 
+        else:
+            priority = self._iteration
+            if not self._should_save_adaptive(perf_counter()):
+                return
+            start_time = perf_counter()
+
+        if self._writer is not None and engine is not None and engine not in self._flushed_engines:
+            engine.add_event_handler(Events.COMPLETED, self._flush_on_completed)
+            self._flushed_engines.append(engine)
+
+        if self._writer is not None:
+            # errors of previous saves are raised before the state of the handler changes
+            self._call_writer(self._writer._raise_error)
+
         if (len(self._saved) < self._n_saved) or (self._saved[0][0] < priority):
             saved_objs = []
 
@@ -165,17 +671,38 @@ class ModelCheckpoint(object):
             if self._score_name is not None:
                 suffix = "_{}={:.7}".format(self._score_name, abs(priority))
 
-            for name, obj in to_save.items():
-                fname = '{}_{}_{}{}.pth'.format(self._fname_prefix, name, self._iteration, suffix)
+            if self._bundle:
+                fname = '{}_{}{}.pth'.format(self._fname_prefix, self._iteration, suffix)
+                payloads = [(fname, {name: self._get_payload(obj) for name, obj in to_save.items()})]
+            else:
+                payloads = [('{}_{}_{}{}.pth'.format(self._fname_prefix, name, self._iteration, suffix),
+                             self._get_payload(obj))
+                            for name, obj in to_save.items()]
+
+            for fname, payload in payloads:
                 path = os.path.join(self._dirname, fname)
 
-                self._save(obj=obj, path=path)
+                if self._writer is None:
+                    self._save(obj=payload, path=path)
+                else:
+                    self._call_writer(self._writer.submit, self._save, _snapshot(payload), path)
                 saved_objs.append(path)
 
             self._saved.append((priority, saved_objs))
             self._saved.sort(key=lambda item: item[0])
 
-        if len(self._saved) > self._n_saved:
-            _, paths = self._saved.pop(0)
-            for p in paths:
-                os.remove(p)
+            if self._save_interval is None and self._score_function is None:
+                self._last_save_time = perf_counter()
+                self._save_cost = self._last_save_time - start_time
+                # the duration of the save is not part of the interval between calls
+                self._last_call_time = self._last_save_time
+
+        while len(self._saved) > self._n_saved:
+            priority, paths = self._saved.pop(0)
+            if self._writer is None:
+                self._remove(paths)
+            else:
+                # until removed, the files are rolled back on an error of the writer
+                self._removing = [item for item in self._removing if any(os.path.exists(p) for p in item[1])]
+                self._removing.append((priority, paths))
+                self._call_writer(self._writer.submit, self._remove, paths)
@@ -0,0 +1,180 @@
+import logging
+import os
+import signal
+import threading
+
+import torch
+
+from ignite.engine import Events
+from ignite.handlers.checkpoint import _atomic_write
+
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+
+class EmergencyCheckpoint(object):
+    """EmergencyCheckpoint handler saves a resume checkpoint when the process is asked to stop, e.g. by
+    the SIGTERM sent to preempted jobs, or when an exception is raised during the run.
+
+    On reception of one of `signals`, the engine is asked to terminate after the current iteration, and the
+    checkpoint is written at the end of this iteration. If an exception is raised, the checkpoint is written
+    before the exception is propagated. The checkpoint is a single file
+    `{filename_prefix}_emergency_{iteration}.pth` holding a `dict` with the `state_dict` of each object of
+    `to_save` and, under the key `'engine'`, the `epoch`, `iteration` and `max_epochs` of the engine state.
+
+    The file is written atomically and flushed to disk, so that it is never damaged, even if the process is
+    killed during the save. If the save does not complete within `deadline` seconds from the signal, the
+    handler gives up waiting for it and lets the engine terminate.
+
+    Args:
+        dirname (str):
+            Directory path where the checkpoint will be saved. It is created if it does not exist.
+        filename_prefix (str):
+            Prefix for the filename of the checkpoint.
+        to_save (dict):
+            a `dict` mapping names (`str`) to objects with a `state_dict` method (e.g. model, optimizer).
+        signals (tuple, optional):
+            Signals triggering the checkpoint (default: `(signal.SIGTERM,)`). Signal handlers are installed when
+            the engine starts and the previous ones are restored when it completes. Signal handlers can only be
+            installed from the main thread.
+        deadline (float, optional):
+            Maximum number of seconds, from the reception of the signal, to wait for the checkpoint to be
+            written (default: 25).
+        save_on_exception (bool, optional):
+            If True (default), the checkpoint is also written on `Events.EXCEPTION_RAISED`. In any case, the
+            exception is re-raised by the handler.
+
+    Attributes:
+        interrupted (bool): True if one of `signals` was received during the run.
+        last_checkpoint (str): path of the last checkpoint written, or None.
+
+    Examples:
+
+    .. code-block:: python
+
+        handler = EmergencyCheckpoint('/tmp/models', 'resnet', {'model': model, 'optimizer': optimizer})
+        handler.attach(trainer)
+        trainer.run(data_loader, max_epochs=100)
+        if handler.interrupted:
+            sys.exit(1)
+
+    """
+
+    def __init__(self, dirname, filename_prefix, to_save, signals=(signal.SIGTERM,), deadline=25.0,
+                 save_on_exception=True):
+        if len(to_save) == 0:
+            raise RuntimeError("No objects to checkpoint found.")
+
+        for obj in to_save.values():
+            if not hasattr(obj, "state_dict") or not callable(obj.state_dict):
+                raise ValueError("Object should have `state_dict` method")
+
+        if deadline <= 0:
+            raise ValueError("Argument deadline should be positive")
+
+        self._dirname = dirname
+        self._fname_prefix = filename_prefix
+        self._to_save = to_save
+        self._signals = tuple(signals)
+        self._deadline = deadline
+        self._save_on_exception = save_on_exception
+        self._previous_handlers = {}
+        self._signal_time = None
+        self._saved = False
+        self._handled_exception_id = None
+        self.interrupted = False
+        self.last_checkpoint = None
+        self._logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self._logger.addHandler(logging.NullHandler())
+
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+
+    def attach(self, engine):
+        """Attaches the handler to an engine.
+
+        Args:
+            engine (Engine): the engine whose run is protected, typically the trainer.
+        """
+        engine.add_event_handler(Events.STARTED, self._install)
+        engine.add_event_handler(Events.ITERATION_COMPLETED, self._on_iteration_completed)
+        engine.add_event_handler(Events.COMPLETED, self._on_completed)
+        engine.add_event_handler(Events.EXCEPTION_RAISED, self._on_exception)
+
+    def _install(self, engine):
+        self.interrupted = False
+        self._signal_time = None
+        self._saved = False
+        self._handled_exception_id = None
+        for signum in self._signals:
+            try:
+                self._previous_handlers[signum] = signal.signal(signum, self._on_signal)
+            except ValueError:
+                self._logger.warning("Signal handlers can only be installed from the main thread, "
+                                     "emergency checkpoint is only written on exception")
+                return
+
+    def _uninstall(self, engine):
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+        self._previous_handlers = {}
+
+    def _on_completed(self, engine):
+        self._handled_exception_id = None
+        self._uninstall(engine)
+
+    def _on_signal(self, signum, frame):
+        # only set flags here, the checkpoint is written at the next iteration boundary
+        self._logger.warning("Received signal %d, saving a checkpoint after the current iteration", signum)
+        if self._signal_time is None:
+            self._signal_time = perf_counter()
+        self.interrupted = True
+
+    def _on_iteration_completed(self, engine):
+        # saved even if another handler already asked the engine to terminate in this iteration
+        if not self.interrupted or self._saved:
+            return
+        self._saved = True
+        engine.terminate()
+        self._save(engine, timeout=self._deadline - (perf_counter() - self._signal_time))
+
+    def _on_exception(self, engine, e):
+        # the exception is raised again by the engine from `run`, only save once. Only its id is kept, so that
+        # the exception and the frames of its traceback are not kept alive after the run
+        if id(e) != self._handled_exception_id:
+            self._handled_exception_id = id(e)
+            self._uninstall(engine)
+            if self._save_on_exception:
+                self._save(engine, timeout=self._deadline)
+        raise e
+
+    def _save(self, engine, timeout):
+        checkpoint = {name: obj.state_dict() for name, obj in self._to_save.items()}
+        checkpoint['engine'] = {'epoch': engine.state.epoch,
+                                'iteration': engine.state.iteration,
+                                'max_epochs': engine.state.max_epochs}
+        path = os.path.join(self._dirname,
+                            "{}_emergency_{}.pth".format(self._fname_prefix, engine.state.iteration))
+
+        errors = []
+
+        def _write():
+            try:
+                _atomic_write(self._dirname, path, lambda f: torch.save(checkpoint, f), fsync=True)
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=_write)
+        thread.daemon = True
+        thread.start()
+        thread.join(max(timeout, 0.0))
+
+        if thread.is_alive():
+            self._logger.error("Emergency checkpoint '%s' could not be written within the deadline", path)
+        elif len(errors) > 0:
+            self._logger.error("Emergency checkpoint '%s' could not be written: %s", path, errors[0])
+        else:
+            self._logger.warning("Emergency checkpoint written to '%s'", path)
+            self.last_checkpoint = path
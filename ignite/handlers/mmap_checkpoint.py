@@ -0,0 +1,147 @@
+import io
+import mmap
+import pickle
+import struct
+
+import torch
+
+from ignite._utils import _replace
+
+_MMAP_MAGIC = b"IGNITE_MMAP_V1\n\0"
+
+
+class _MmapTensorRef(object):
+    """Placeholder of a tensor stored in the data region of a memory-mappable checkpoint."""
+    def __init__(self, index):
+        self.index = index
+
+
+def _align(offset, alignment):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _write_mmap_checkpoint(obj, f, alignment=64):
+    tensors = []
+
+    def _add(tensor):
+        tensors.append(tensor.detach().cpu().contiguous())
+        return _MmapTensorRef(len(tensors) - 1)
+
+    structure = _replace(obj, torch.Tensor, _add)
+
+    # layout is relative to the start of the data region, itself aligned in the file
+    entries = []
+    offset = 0
+    for tensor in tensors:
+        offset = _align(offset, alignment)
+        nbytes = tensor.numel() * tensor.element_size()
+        entries.append((str(tensor.dtype).replace("torch.", ""), tuple(tensor.shape), offset, nbytes))
+        offset += nbytes
+
+    header = pickle.dumps({"object": structure, "tensors": entries, "alignment": alignment}, protocol=2)
+    f.write(_MMAP_MAGIC)
+    f.write(struct.pack("<Q", len(header)))
+    f.write(header)
+    position = len(_MMAP_MAGIC) + 8 + len(header)
+    data_start = _align(position, alignment)
+    f.write(b"\0" * (data_start - position))
+
+    position = 0
+    for tensor, (_, _, offset, nbytes) in zip(tensors, entries):
+        f.write(b"\0" * (offset - position))
+        if nbytes > 0:
+            f.write(tensor.reshape(-1).view(torch.uint8).numpy())
+        position = offset + nbytes
+
+
+def _read_mmap_checkpoint(f):
+    """Reads a checkpoint from `f`, positioned after the magic bytes.
+
+    If `f` is a file on disk, it is memory-mapped copy-on-write and tensors are views of the mapping: nothing is
+    read until accessed. Otherwise, the remaining content of `f` is read in memory.
+    """
+    header_size = struct.unpack("<Q", f.read(8))[0]
+    header = pickle.loads(f.read(header_size))
+    position = len(_MMAP_MAGIC) + 8 + header_size
+    data_start = _align(position, header["alignment"])
+
+    try:
+        fileno = f.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        fileno = None
+
+    if fileno is not None:
+        buffer = mmap.mmap(fileno, 0, access=mmap.ACCESS_COPY)
+        base = data_start
+    else:
+        f.read(data_start - position)
+        buffer = bytearray(f.read())
+        base = 0
+
+    def _load(ref):
+        dtype_name, shape, offset, nbytes = header["tensors"][ref.index]
+        dtype = getattr(torch, dtype_name)
+        if nbytes == 0:
+            return torch.empty(shape, dtype=dtype)
+        data = torch.frombuffer(buffer, dtype=torch.uint8, count=nbytes, offset=base + offset)
+        return data.view(dtype).view(shape)
+
+    return _replace(header["object"], _MmapTensorRef, _load)
+
+
+def save_mmap_checkpoint(obj, path, alignment=64):
+    """Saves `obj` in a memory-mappable format.
+
+    The tensors found in the `dict`, `list` and `tuple` containers of `obj` (e.g. a `state_dict`) are laid out
+    contiguously in a data region, each one aligned on `alignment` bytes, after a small pickled header describing
+    the structure of `obj`. Such a file can be loaded with :func:`load_mmap_checkpoint` without reading it in
+    memory first.
+
+    Args:
+        obj: object to save, typically a `state_dict` or a `dict` of `state_dict`.
+        path (str): path of the file to write.
+        alignment (int, optional): alignment in bytes of each tensor in the file (default: 64).
+    """
+    with open(path, "wb") as f:
+        _write_mmap_checkpoint(obj, f, alignment=alignment)
+
+
+def load_mmap_checkpoint(path):
+    """Loads a file written by :func:`save_mmap_checkpoint`.
+
+    The file is memory-mapped copy-on-write: the returned tensors are views of the mapping, their content is
+    paged in lazily by the operating system when accessed, and modifying them does not modify the file. Peak
+    memory is thus not increased by an intermediate in-memory copy of the file.
+
+    Args:
+        path (str): path of the checkpoint file.
+
+    Returns:
+        the saved object, with CPU tensors backed by the file.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(_MMAP_MAGIC)) != _MMAP_MAGIC:
+            raise ValueError("File '{}' is not a memory-mappable checkpoint".format(path))
+        return _read_mmap_checkpoint(f)
+
+
+def load_mmap_state_dict(module, path, strict=True, assign=False):
+    """Loads a `state_dict` saved with :func:`save_mmap_checkpoint` into an existing module.
+
+    Args:
+        module (`torch.nn.Module`): the module (or any object with a `load_state_dict` method, e.g. an optimizer).
+        path (str): path of the checkpoint file.
+        strict (bool, optional): passed to `load_state_dict` of modules.
+        assign (bool, optional): if True, the parameters and buffers of `module` are replaced by the memory-mapped
+            tensors instead of copied into, so that loading is zero-copy. Requires a module on CPU and a version
+            of PyTorch supporting `load_state_dict(..., assign=True)`.
+
+    Returns:
+        the value returned by `module.load_state_dict`.
+    """
+    state_dict = load_mmap_checkpoint(path)
+    if isinstance(module, torch.nn.Module):
+        if assign:
+            return module.load_state_dict(state_dict, strict=strict, assign=True)
+        return module.load_state_dict(state_dict, strict=strict)
+    return module.load_state_dict(state_dict)
@@ -0,0 +1,215 @@
+import os
+import pickle
+
+import torch
+import torch.distributed as dist
+
+from ignite._utils import _replace
+from ignite.handlers.checkpoint import _atomic_write
+
+
+class _ShardedTensorRef(object):
+    """Placeholder of a tensor stored in one of the shards of a sharded checkpoint."""
+    def __init__(self, index):
+        self.index = index
+
+
+def _partition(sizes, world_size):
+    """Assigns items of given sizes to `world_size` ranks, balancing the total size per rank.
+
+    The assignment only depends on `sizes`, so that all ranks compute the same one.
+    """
+    loads = [0] * world_size
+    ranks = [0] * len(sizes)
+    for index in sorted(range(len(sizes)), key=lambda i: (-sizes[i], i)):
+        rank = min(range(world_size), key=lambda r: (loads[r], r))
+        ranks[index] = rank
+        loads[rank] += sizes[index]
+    return ranks
+
+
+def _read_shard_fnames(manifest_path):
+    """Returns the shards listed by the manifest `manifest_path`, or an empty list if it does not exist."""
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, "rb") as f:
+        return pickle.load(f)["shards"]
+
+
+def _default_rank_and_world_size():
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank(), dist.get_world_size()
+    return 0, 1
+
+
+class ShardedCheckpoint(object):
+    """ShardedCheckpoint handler can be used to periodically save objects to disk from all the processes of a
+    distributed training, each process writing only a part of the tensors.
+
+    This handler accepts two arguments:
+
+        - an `ignite.engine.Engine` object
+        - a `dict` mapping names (`str`) to objects with a `state_dict` method (e.g. model, optimizer).
+
+    The tensors of all the `state_dict` are split between the processes, balancing the number of bytes each
+    process writes: process `rank` writes the file `{filename_prefix}_{step_number}_shard{rank}of{world_size}.pth`.
+    Once all shards are written, process 0 writes the manifest `{filename_prefix}_{step_number}_manifest.pth`,
+    describing the structure of the saved objects and the location of each tensor. The states are expected to be
+    replicated across processes, as with `torch.nn.parallel.DistributedDataParallel`.
+
+    A checkpoint can be loaded with :func:`load_sharded_checkpoint` by any number of processes, including a
+    single one. Saving it again with a different number of processes re-shards it. If a checkpoint saved with a
+    different number of processes is overwritten (e.g. when resuming in the same directory with
+    `require_empty=False`), its shards are removed.
+
+    Args:
+        dirname (str):
+            Directory path where objects will be saved. It must be shared by all the processes.
+        filename_prefix (str):
+            Prefix for the filenames to which objects will be saved.
+        save_interval (int, optional):
+            Objects will be saved to disk every `save_interval` calls to the handler.
+        n_saved (int, optional):
+            Number of checkpoints that should be kept on disk. Older files will be removed.
+        require_empty (bool, optional):
+            If True, will raise exception if there are any files starting with `filename_prefix`
+            in the directory 'dirname'
+        create_dir (bool, optional):
+            If True, will create directory 'dirname' if it doesnt exist.
+        rank (int, optional):
+            Rank of the current process. By default, the rank of the default `torch.distributed` process group,
+            or 0 if it is not initialized.
+        world_size (int, optional):
+            Number of processes. By default, the size of the default `torch.distributed` process group, or 1 if it
+            is not initialized.
+
+    Examples:
+
+    .. code-block:: python
+
+        handler = ShardedCheckpoint('/shared/checkpoints', 'resnet', save_interval=1, n_saved=2)
+        trainer.add_event_handler(Events.EPOCH_COMPLETED, handler, {'model': model, 'optimizer': optimizer})
+
+        # later, with any number of processes
+        state = load_sharded_checkpoint('/shared/checkpoints/resnet_10_manifest.pth')
+        model.load_state_dict(state['model'])
+        optimizer.load_state_dict(state['optimizer'])
+
+    """
+
+    def __init__(self, dirname, filename_prefix, save_interval=1, n_saved=1,
+                 require_empty=True, create_dir=True, rank=None, world_size=None):
+        default_rank, default_world_size = _default_rank_and_world_size()
+        self._rank = default_rank if rank is None else rank
+        self._world_size = default_world_size if world_size is None else world_size
+        self._dirname = dirname
+        self._fname_prefix = filename_prefix
+        self._save_interval = save_interval
+        self._n_saved = n_saved
+        self._saved = []  # list of tuples (manifest_path, shard_path)
+        self._iteration = 0
+
+        if not (0 <= self._rank < self._world_size):
+            raise ValueError("Argument rank should be in [0, world_size)")
+
+        if save_interval < 1:
+            raise ValueError("Argument save_interval should be a positive integer")
+
+        if create_dir and self._rank == 0:
+            if not os.path.exists(dirname):
+                os.makedirs(dirname)
+        self._barrier()
+
+        if not os.path.exists(dirname):
+            raise ValueError("Directory path '{}' is not found".format(dirname))
+
+        if require_empty:
+            matched = [fname
+                       for fname in os.listdir(dirname)
+                       if fname.startswith(self._fname_prefix)]
+
+            if len(matched) > 0:
+                raise ValueError("Files prefixed with {} are already present "
+                                 "in the directory {}. If you want to use this "
+                                 "directory anyway, pass `require_empty=False`. "
+                                 "".format(filename_prefix, dirname))
+        # all processes check the directory before any of them writes in it
+        self._barrier()
+
+    def _barrier(self):
+        if self._world_size > 1 and dist.is_available() and dist.is_initialized():
+            dist.barrier()
+
+    def _save(self, to_save):
+        tensors = []
+
+        def _add(tensor):
+            tensors.append(tensor)
+            return _ShardedTensorRef(len(tensors) - 1)
+
+        structure = {}
+        for name, obj in to_save.items():
+            if not hasattr(obj, "state_dict") or not callable(obj.state_dict):
+                raise ValueError("Object should have `state_dict` method")
+            structure[name] = _replace(obj.state_dict(), torch.Tensor, _add)
+
+        locations = _partition([t.numel() * t.element_size() for t in tensors], self._world_size)
+        shard_fnames = ['{}_{}_shard{}of{}.pth'.format(self._fname_prefix, self._iteration, r, self._world_size)
+                        for r in range(self._world_size)]
+
+        shard = {i: t.detach().cpu() for i, t in enumerate(tensors) if locations[i] == self._rank}
+        shard_path = os.path.join(self._dirname, shard_fnames[self._rank])
+        _atomic_write(self._dirname, shard_path, lambda f: torch.save(shard, f))
+
+        # the manifest is written once all the shards are, so that its presence marks a complete checkpoint
+        self._barrier()
+        manifest_path = os.path.join(self._dirname, '{}_{}_manifest.pth'.format(self._fname_prefix, self._iteration))
+        if self._rank == 0:
+            # a manifest overwritten by this one, e.g. saved before a restart with another world size, may list
+            # shards which are not overwritten by this checkpoint: they are removed once the manifest is replaced
+            stale_fnames = [fname for fname in _read_shard_fnames(manifest_path) if fname not in shard_fnames]
+            manifest = {"object": structure, "shards": shard_fnames, "locations": locations}
+            _atomic_write(self._dirname, manifest_path, lambda f: pickle.dump(manifest, f, protocol=2))
+            for fname in stale_fnames:
+                path = os.path.join(self._dirname, fname)
+                if os.path.exists(path):
+                    os.remove(path)
+        return manifest_path, shard_path
+
+    def _remove(self, manifest_path, shard_path):
+        if self._rank == 0:
+            os.remove(manifest_path)
+        os.remove(shard_path)
+
+    def __call__(self, engine, to_save):
+        if len(to_save) == 0:
+            raise RuntimeError("No objects to checkpoint found.")
+
+        self._iteration += 1
+        if (self._iteration % self._save_interval) != 0:
+            return
+
+        self._saved.append(self._save(to_save))
+        if len(self._saved) > self._n_saved:
+            self._remove(*self._saved.pop(0))
+
+
+def load_sharded_checkpoint(manifest_path, map_location=None):
+    """Loads a checkpoint saved by :class:`ShardedCheckpoint`, reassembling the tensors of all its shards.
+
+    Args:
+        manifest_path (str): path of the manifest file `{filename_prefix}_{step_number}_manifest.pth`.
+        map_location (optional): passed to `torch.load`.
+
+    Returns:
+        dict: a mapping from the names of the saved objects to their `state_dict`.
+    """
+    with open(manifest_path, "rb") as f:
+        manifest = pickle.load(f)
+
+    dirname = os.path.dirname(manifest_path)
+    tensors = {}
+    for fname in manifest["shards"]:
+        tensors.update(torch.load(os.path.join(dirname, fname), map_location=map_location))
+
+    return _replace(manifest["object"], _ShardedTensorRef, lambda ref: tensors[ref.index])
@@ -1,9 +1,29 @@
+import cmath
 import logging
 import numbers
 
 import torch
+from torch._six import string_classes
 
-from ignite._utils import apply_to_type
+from ignite._utils import tree_flatten, _replace
+
+
+def _all_finite(tensors):
+    """Returns a 0-dim bool tensor, True if all the given tensors (on the same device) are finite.
+
+    Uses a single fused reduction over the list of tensors when available: the infinity norm (max-abs) of a tensor
+    is finite if and only if all its values are finite. The per-tensor flags are combined without summing the norms,
+    which could overflow for large finite values. Otherwise, or if the private fused reduction fails, each tensor is
+    checked with `torch.isfinite`.
+    """
+    if hasattr(torch, "_foreach_norm"):
+        try:
+            norms = torch._foreach_norm(tensors, float("inf"))
+        except (RuntimeError, TypeError):
+            pass
+        else:
+            return torch.isfinite(torch.stack([n.float() for n in norms])).all()
+    return torch.stack([torch.isfinite(t).all() for t in tensors]).all()
 
 
 class TerminateOnNan(object):
@@ -13,11 +33,25 @@ class TerminateOnNan(object):
     there is at least a single number/tensor have NaN or Infinite value. For example, if the output is
     `[1.23, torch.tensor(...), torch.tensor(float('nan'))]` the handler will stop the training.
 
+    Reading the result of the check on the host synchronizes with the device. With `check_every` greater than 1,
+    a device-side "all finite" flag is accumulated over iterations and read only every `check_every` iterations
+    and at the end of each epoch (if the length of the data is known).
+
     Args:
         output_transform (Callable, optional): a callable that is used to transform the
             :class:`ignite.engine.Engine`'s `process_function`'s output into a number or `torch.tensor`
             or collection of them. This can be useful if, for example, you have a multi-output model and
             you want to check one or multiple values of the output.
+        check_every (int, optional): number of iterations between two checks of the flag on the host
+            (default: 1).
+        parameters (iterable of `torch.Tensor`, optional): if not None, parameters (e.g. `model.parameters()`)
+            whose values and gradients are also checked, with one fused reduction per device.
+        rollback (dict, optional): if not None, a `dict` mapping names to objects with `state_dict` and
+            `load_state_dict` methods (e.g. model, optimizer). Their state is copied after each successful check,
+            and when a NaN or infinite value is found they are restored to the last copy instead of stopping
+            the training. Iterations done since this copy are lost.
+        max_rollbacks (int, optional): maximum number of consecutive rollbacks without a successful check, after
+            which the training is stopped (default: 3).
 
 
     Examples:
@@ -26,27 +60,107 @@ class TerminateOnNan(object):
 
         trainer.add_event_handler(Events.ITERATION_COMPLETED, TerminateOnNan())
 
+        # check every 100 iterations, including the parameters and their gradients, and restore
+        # the last good state of the model and optimizer if needed
+        handler = TerminateOnNan(check_every=100, parameters=model.parameters(),
+                                 rollback={'model': model, 'optimizer': optimizer})
+        trainer.add_event_handler(Events.ITERATION_COMPLETED, handler)
+
     """
 
-    def __init__(self, output_transform=lambda x: x):
+    def __init__(self, output_transform=lambda x: x, check_every=1, parameters=None, rollback=None,
+                 max_rollbacks=3):
+        if check_every < 1:
+            raise ValueError("Argument check_every should be a positive integer")
+
+        if rollback is not None:
+            for obj in rollback.values():
+                if not callable(getattr(obj, "state_dict", None)) or \
+                        not callable(getattr(obj, "load_state_dict", None)):
+                    raise ValueError("Objects to rollback should have `state_dict` and `load_state_dict` methods")
+
         self._logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
         self._logger.addHandler(logging.StreamHandler())
         self._output_transform = output_transform
+        self._check_every = check_every
+        self._parameters = list(parameters) if parameters is not None else None
+        self._rollback = rollback
+        self._max_rollbacks = max_rollbacks
+        self._num_rollbacks = 0
+        self._good_state = None
+        self._reset_flags()
+
+    def _reset_flags(self):
+        self._finite = True  # result of the checks of python numbers
+        self._device_flags = {}  # device -> 0-dim bool tensor
+        self._num_pending = 0
+
+    def _accumulate(self, tensors):
+        by_device = {}
+        for t in tensors:
+            by_device.setdefault(t.device, []).append(t.detach())
+        for device, device_tensors in by_device.items():
+            flag = _all_finite(device_tensors)
+            if device in self._device_flags:
+                flag = flag & self._device_flags[device]
+            self._device_flags[device] = flag
+
+    def _update_flags(self, output):
+        tensors = []
+
+        leaves, _ = tree_flatten(output)
+        for x in leaves:
+            if isinstance(x, torch.Tensor):
+                if x.is_floating_point() or x.is_complex():
+                    tensors.append(x)
+            elif isinstance(x, numbers.Number):
+                # cmath also accepts complex numbers
+                if cmath.isnan(x) or cmath.isinf(x):
+                    self._finite = False
+            elif not isinstance(x, string_classes):
+                raise TypeError("Output must contain numbers or tensors; found {}".format(type(x)))
+
+        if self._parameters is not None:
+            tensors.extend(p for p in self._parameters)
+            tensors.extend(p.grad for p in self._parameters if p.grad is not None)
+
+        self._accumulate([t for t in tensors if t.numel() > 0])
+        self._num_pending += 1
+
+    def _is_check_iteration(self, engine):
+        if self._num_pending >= self._check_every:
+            return True
+        try:
+            epoch_length = len(engine.state.dataloader)
+        except (AttributeError, TypeError):
+            return False
+        return epoch_length > 0 and engine.state.iteration % epoch_length == 0
 
     def __call__(self, engine):
         output = self._output_transform(engine.state.output)
+        self._update_flags(output)
 
-        def raise_error(x):
+        if not self._is_check_iteration(engine):
+            return
 
-            if isinstance(x, numbers.Number):
-                x = torch.tensor(x)
+        finite = self._finite and all(bool(flag) for flag in self._device_flags.values())
+        self._reset_flags()
 
-            if isinstance(x, torch.Tensor) and not bool(torch.isfinite(x).all()):
-                raise RuntimeError("Infinite or NaN tensor found")
+        if finite:
+            self._num_rollbacks = 0
+            if self._rollback is not None:
+                self._good_state = {name: _replace(obj.state_dict(), torch.Tensor, lambda t: t.detach().clone())
+                                    for name, obj in self._rollback.items()}
+            return
 
-        try:
-            apply_to_type(output, (numbers.Number, torch.Tensor), raise_error)
-        except RuntimeError:
-            self._logger.warning("{}: Output '{}' contains NaN or Inf. Stop training"
+        if self._good_state is not None and self._num_rollbacks < self._max_rollbacks:
+            self._num_rollbacks += 1
+            self._logger.warning("{}: Output '{}' or parameters contain NaN or Inf. Rollback to last good state"
                                  .format(self.__class__.__name__, output))
-            engine.terminate()
+            for name, obj in self._rollback.items():
+                obj.load_state_dict(_replace(self._good_state[name], torch.Tensor, lambda t: t.clone()))
+            return
+
+        self._logger.warning("{}: Output '{}' contains NaN or Inf. Stop training"
+                             .format(self.__class__.__name__, output))
+        engine.terminate()
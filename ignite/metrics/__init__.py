@@ -1,4 +1,5 @@
 from ignite.metrics.binary_accuracy import BinaryAccuracy
+from ignite.metrics.binary_threshold_metrics import BinaryThresholdMetrics
 from ignite.metrics.categorical_accuracy import CategoricalAccuracy
 from ignite.metrics.loss import Loss
 from ignite.metrics.mean_absolute_error import MeanAbsoluteError
@@ -6,8 +7,11 @@ from ignite.metrics.mean_pairwise_distance import MeanPairwiseDistance
 from ignite.metrics.mean_squared_error import MeanSquaredError
 from ignite.metrics.metric import Metric
 from ignite.metrics.epoch_metric import EpochMetric
+from ignite.metrics.perplexity import Perplexity, TokenAccuracy
 from ignite.metrics.precision import Precision
+from ignite.metrics.quantile import Quantile
 from ignite.metrics.recall import Recall
+from ignite.metrics.retrieval import RecallAtK, RetrievalMAP
 from ignite.metrics.root_mean_squared_error import RootMeanSquaredError
 from ignite.metrics.top_k_categorical_accuracy import TopKCategoricalAccuracy
 from ignite.metrics.running_average import RunningAverage
@@ -0,0 +1,106 @@
+from __future__ import division
+
+import torch
+
+from ignite.metrics.metric import Metric
+from ignite.exceptions import NotComputableError
+
+
+class BinaryThresholdMetrics(Metric):
+    """
+    Calculates binary accuracy, precision, recall and F1 score for a set of decision thresholds at once.
+
+    A sample is predicted positive for a threshold `t` if `y_pred >= t`. Each batch is bucketized once
+    against the sorted thresholds, so the cost of an update is `O(batch_size * log(T) + T)` and the state
+    holds `O(T)` counts, `T` being the number of thresholds.
+
+    - `update` must receive output of the form `(y_pred, y)`.
+    - `y_pred` must be in the following shape (batch_size, ...) and it's elements must be between 0 and 1.
+    - `y` must be in the following shape (batch_size, ...) and contain 0 or 1.
+
+    `compute` returns a dictionary with the keys `thresholds`, `accuracy`, `precision`, `recall` and `f1`,
+    each mapping to a tensor of shape `(T,)`. Thresholds are sorted in increasing order.
+
+    Args:
+        thresholds (sequence of float or `torch.Tensor`, optional): the decision thresholds, default
+            101 values evenly spaced between 0 and 1.
+        output_transform (callable, optional): a callable that is used to transform the
+            :class:`ignite.engine.Engine`'s `process_function`'s output into the
+            form expected by the metric.
+
+    Examples:
+
+    .. code-block:: python
+
+        metric = BinaryThresholdMetrics(thresholds=torch.linspace(0, 1, 11))
+        metric.attach(evaluator, 'thresholds')
+        state = evaluator.run(val_loader)
+        curves = state.metrics['thresholds']
+        best_threshold = curves['thresholds'][curves['f1'].argmax()]
+
+    """
+    def __init__(self, thresholds=None, output_transform=lambda x: x):
+        if thresholds is None:
+            thresholds = torch.linspace(0, 1, 101)
+        thresholds = torch.as_tensor(thresholds, dtype=torch.float64).view(-1)
+        if thresholds.numel() == 0:
+            raise ValueError("Argument thresholds should contain at least one value")
+        self._thresholds = torch.sort(thresholds)[0]
+        super(BinaryThresholdMetrics, self).__init__(output_transform)
+
+    def reset(self):
+        self._positives_hist = None
+        self._negatives_hist = None
+        self._num_examples = 0
+
+    def update(self, output):
+        y_pred, y = output
+        y_pred = y_pred.reshape(-1)
+        y = y.reshape(-1).bool()
+
+        if self._thresholds.device != y_pred.device:
+            self._thresholds = self._thresholds.to(y_pred.device)
+
+        # Number of thresholds lower or equal to each prediction: the sample is predicted
+        # positive for every threshold of index strictly lower than its bucket
+        buckets = torch.bucketize(y_pred.to(self._thresholds.dtype), self._thresholds, right=True)
+        num_buckets = self._thresholds.numel() + 1
+        positives_hist = torch.bincount(buckets[y], minlength=num_buckets)
+        negatives_hist = torch.bincount(buckets[~y], minlength=num_buckets)
+
+        if self._positives_hist is None:
+            self._positives_hist = positives_hist
+            self._negatives_hist = negatives_hist
+        else:
+            self._positives_hist += positives_hist
+            self._negatives_hist += negatives_hist
+        self._num_examples += y.numel()
+
+    def _predicted_positives(self, hist):
+        # Count of samples with a bucket strictly greater than `i`, for each threshold index `i`
+        return hist.flip(0).cumsum(0).flip(0)[1:]
+
+    def compute(self):
+        if self._positives_hist is None:
+            raise NotComputableError('BinaryThresholdMetrics must have at least one example before it can be computed')
+
+        num_examples = self._num_examples
+        positives = self._positives_hist.sum().double()
+        tp = self._predicted_positives(self._positives_hist).double()
+        fp = self._predicted_positives(self._negatives_hist).double()
+        tn = (num_examples - positives) - fp
+
+        accuracy = (tp + tn) / num_examples
+        precision = tp / (tp + fp)
+        recall = tp / positives
+        f1 = 2 * precision * recall / (precision + recall)
+        for value in (precision, recall, f1):
+            value[value != value] = 0.0
+
+        return {
+            'thresholds': self._thresholds,
+            'accuracy': accuracy,
+            'precision': precision,
+            'recall': recall,
+            'f1': f1,
+        }
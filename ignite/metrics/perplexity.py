@@ -0,0 +1,129 @@
+from __future__ import division
+
+import math
+
+import torch
+import torch.nn.functional as F
+
+from ignite.metrics.metric import Metric
+from ignite.exceptions import NotComputableError
+
+# number of elements of the low precision logits upcast at once
+_UPCAST_CHUNK_NUMEL = 1 << 22
+
+
+class _TokenMetric(Metric):
+    """Base class of token-level metrics for sequence models.
+
+    Counts are accumulated on the device of the outputs and only read back in `compute`.
+    """
+    def __init__(self, ignore_index=-100, output_transform=lambda x: x):
+        self._ignore_index = ignore_index
+        super(_TokenMetric, self).__init__(output_transform)
+
+    def reset(self):
+        self._sum = None
+        self._num_tokens = None
+
+    def _unpack(self, output):
+        if len(output) == 2:
+            y_pred, y = output
+            mask = None
+        else:
+            y_pred, y, mask = output
+
+        if y_pred.shape[:-1] != y.shape:
+            raise ValueError("y_pred should be of shape y.shape + (num_classes,), got {} and {}"
+                             .format(tuple(y_pred.shape), tuple(y.shape)))
+
+        # detached, so that the counts do not keep the graph of the outputs of a trainer alive
+        y_pred = y_pred.detach()
+        y = y.reshape(-1)
+        if mask is not None:
+            y = y.masked_fill(~mask.reshape(-1).bool(), self._ignore_index)
+        return y_pred.reshape(-1, y_pred.shape[-1]), y
+
+    def _accumulate(self, value, num_tokens):
+        if self._sum is None:
+            self._sum = value
+            self._num_tokens = num_tokens
+        else:
+            self._sum += value
+            self._num_tokens += num_tokens
+
+    def _ratio(self):
+        num_tokens = self._num_tokens.item() if self._num_tokens is not None else 0
+        if num_tokens == 0:
+            raise NotComputableError('{} must have at least one token before it can be computed'
+                                     .format(self.__class__.__name__))
+        return self._sum.item() / num_tokens
+
+
+class Perplexity(_TokenMetric):
+    """
+    Calculates the token-level perplexity, `exp` of the average negative log-likelihood over non-padding tokens.
+
+    The average is weighted by the number of tokens, not by the number of sequences, so that padding and
+    chunks of different lengths (for example with :func:`ignite.contrib.engines.create_supervised_tbptt_trainer`)
+    are accounted for correctly.
+
+    - `update` must receive output of the form `(y_pred, y)` or `(y_pred, y, mask)`.
+    - `y_pred` must be in the following shape `y.shape + (num_classes,)` and contain logits, or log-probabilities
+      if `log_probs` is True.
+    - `y` contains the target class indices, tokens equal to `ignore_index` are not counted.
+    - `mask`, if given, has the same shape as `y` and is True for the tokens to count.
+
+    Args:
+        log_probs (bool, optional): if True, `y_pred` contains log-probabilities and the log-likelihood of the
+            targets is gathered without any pass over the vocabulary. Otherwise, `y_pred` contains logits.
+        ignore_index (int, optional): target value of the padding tokens (default: -100).
+        output_transform (callable, optional): a callable that is used to transform the
+            :class:`ignite.engine.Engine`'s `process_function`'s output into the
+            form expected by the metric.
+
+    """
+    def __init__(self, log_probs=False, ignore_index=-100, output_transform=lambda x: x):
+        self._log_probs = log_probs
+        super(Perplexity, self).__init__(ignore_index=ignore_index, output_transform=output_transform)
+
+    def update(self, output):
+        y_pred, y = self._unpack(output)
+        loss_fn = F.nll_loss if self._log_probs else F.cross_entropy
+        if y_pred.dtype in (torch.float16, torch.bfloat16):
+            # reduced in float32, by chunks of rows so that the logits are never copied as a whole
+            chunk_size = max(1, _UPCAST_CHUNK_NUMEL // y_pred.shape[1])
+            nll = y_pred.new_zeros((), dtype=torch.float)
+            for y_pred_chunk, y_chunk in zip(y_pred.split(chunk_size), y.split(chunk_size)):
+                nll += loss_fn(y_pred_chunk.float(), y_chunk, ignore_index=self._ignore_index, reduction='sum')
+        else:
+            nll = loss_fn(y_pred, y, ignore_index=self._ignore_index, reduction='sum')
+        self._accumulate(nll.double(), (y != self._ignore_index).sum())
+
+    def compute(self):
+        return math.exp(self._ratio())
+
+
+class TokenAccuracy(_TokenMetric):
+    """
+    Calculates the token-level accuracy over non-padding tokens.
+
+    - `update` must receive output of the form `(y_pred, y)` or `(y_pred, y, mask)`.
+    - `y_pred` must be in the following shape `y.shape + (num_classes,)`.
+    - `y` contains the target class indices, tokens equal to `ignore_index` are not counted.
+    - `mask`, if given, has the same shape as `y` and is True for the tokens to count.
+
+    Args:
+        ignore_index (int, optional): target value of the padding tokens (default: -100).
+        output_transform (callable, optional): a callable that is used to transform the
+            :class:`ignite.engine.Engine`'s `process_function`'s output into the
+            form expected by the metric.
+
+    """
+    def update(self, output):
+        y_pred, y = self._unpack(output)
+        valid = y != self._ignore_index
+        correct = (torch.argmax(y_pred, dim=1) == y) & valid
+        self._accumulate(correct.sum(), valid.sum())
+
+    def compute(self):
+        return self._ratio()
@@ -0,0 +1,174 @@
+from __future__ import division
+
+import numbers
+
+import torch
+
+from ignite.metrics.metric import Metric
+from ignite.exceptions import NotComputableError
+
+
+class _QuantileSketch(object):
+    """Mergeable quantile sketch made of a hierarchy of compactors.
+
+    Items stored at level `h` stand for `2 ** h` input values. When a level holds more than `capacity`
+    items, they are sorted and every other one is promoted to the next level, alternating the kept
+    offset to avoid biasing the estimates. The number of stored items is `O(capacity * log(n / capacity))`
+    for `n` ingested values.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.levels = []
+        self._offsets = []
+        self.count = 0
+
+    def _ensure_level(self, level, like):
+        while len(self.levels) <= level:
+            self.levels.append(like.new_empty((0,)))
+            self._offsets.append(0)
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.numel() > self.capacity:
+                items = torch.sort(items)[0]
+                # keep an odd leftover at the current level so that the total weight is preserved
+                num_promoted = items.numel() - items.numel() % 2
+                offset = self._offsets[level]
+                self._offsets[level] = 1 - offset
+                self._ensure_level(level + 1, items)
+                self.levels[level + 1] = torch.cat([self.levels[level + 1], items[offset:num_promoted:2]])
+                self.levels[level] = items[num_promoted:]
+            level += 1
+
+    def update(self, values):
+        values = values.detach().reshape(-1).to(torch.float64)
+        if values.numel() == 0:
+            return
+        self._ensure_level(0, values)
+        self.levels[0] = torch.cat([self.levels[0], values])
+        self.count += values.numel()
+        self._compact()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            self._ensure_level(level, items)
+            self.levels[level] = torch.cat([self.levels[level], items.to(self.levels[level].device)])
+        self.count += other.count
+        self._compact()
+
+    def weighted_items(self):
+        items = torch.cat(self.levels)
+        weights = torch.cat([torch.full_like(level_items, 2 ** level)
+                             for level, level_items in enumerate(self.levels)])
+        items, indices = torch.sort(items)
+        return items, weights[indices]
+
+    def quantile(self, q):
+        items, weights = self.weighted_items()
+        cum_weights = torch.cumsum(weights, dim=0)
+        q = torch.as_tensor(q, dtype=torch.float64, device=items.device)
+        indices = torch.searchsorted(cum_weights, q * cum_weights[-1])
+        return items[indices.clamp(max=items.numel() - 1)]
+
+    def histogram(self, bins, range=None):
+        items, weights = self.weighted_items()
+        if range is None:
+            range = (items[0].item(), items[-1].item())
+        edges = torch.linspace(range[0], range[1], bins + 1, dtype=torch.float64, device=items.device)
+        inside = (items >= edges[0]) & (items <= edges[-1])
+        # the last bin is closed on the right, as in `numpy.histogram`
+        indices = (torch.bucketize(items[inside], edges, right=True) - 1).clamp(max=bins - 1)
+        counts = torch.bincount(indices, weights=weights[inside], minlength=bins)
+        return counts, edges
+
+
+class Quantile(Metric):
+    """
+    Calculates quantiles of a stream of per-sample values, e.g. per-sample losses, with bounded memory.
+
+    Values are ingested batch by batch into a mergeable quantile sketch (a hierarchy of compactors in the
+    spirit of the KLL sketch), whose size grows logarithmically with the number of values. The rank error of
+    the estimates decreases with `capacity`.
+
+    - `update` must receive a `torch.Tensor` of per-sample values of any shape.
+
+    Args:
+        quantiles (float or list of float, optional): quantile or list of quantiles to compute, in `[0, 1]`.
+            If it is a float, `compute` returns a float, otherwise it returns a dictionary mapping each quantile
+            to its value.
+        capacity (int, optional): maximum number of items held by each level of the sketch (default: 256).
+        output_transform (callable, optional): a callable that is used to transform the
+            :class:`ignite.engine.Engine`'s `process_function`'s output into the
+            form expected by the metric.
+
+    Examples:
+
+    .. code-block:: python
+
+        def per_sample_loss(output):
+            y_pred, y = output
+            return F.cross_entropy(y_pred, y, reduction='none')
+
+        tail_loss = Quantile(quantiles=[0.5, 0.9, 0.99], output_transform=per_sample_loss)
+        tail_loss.attach(evaluator, 'loss_quantiles')
+
+    Sketches computed in different processes can be combined with :meth:`merge` before calling `compute`.
+    """
+    def __init__(self, quantiles=0.5, capacity=256, output_transform=lambda x: x):
+        qs = [quantiles] if isinstance(quantiles, numbers.Number) else list(quantiles)
+        if len(qs) == 0 or any(not (0.0 <= q <= 1.0) for q in qs):
+            raise ValueError("Argument quantiles should be a float or a non-empty list of floats in [0, 1]")
+        if capacity < 2:
+            raise ValueError("Argument capacity should be an integer greater than 1")
+
+        self._quantiles = quantiles
+        self._capacity = capacity
+        super(Quantile, self).__init__(output_transform)
+
+    def reset(self):
+        self._sketch = _QuantileSketch(self._capacity)
+
+    def update(self, output):
+        self._sketch.update(output)
+
+    def merge(self, other):
+        """Merges the values ingested by another `Quantile` metric into this one.
+
+        Args:
+            other (Quantile): a metric, for example gathered from another process.
+        """
+        if not isinstance(other, Quantile):
+            raise TypeError("Argument other should be a Quantile metric")
+        self._sketch.merge(other._sketch)
+
+    def _check_computable(self):
+        if self._sketch.count == 0:
+            raise NotComputableError('Quantile must have at least one example before it can be computed')
+
+    def quantile(self, q):
+        """Returns the estimated value of the quantile `q` (float or list of floats) of the ingested values."""
+        self._check_computable()
+        return self._sketch.quantile(q).tolist()
+
+    def histogram(self, bins=10, range=None):
+        """Returns the estimated histogram of the ingested values.
+
+        Args:
+            bins (int, optional): number of equal-width bins.
+            range (tuple of float, optional): lower and upper range of the bins. By default, the
+                estimated minimum and maximum values.
+
+        Returns:
+            tuple of `torch.Tensor`: the (weighted) counts of shape `(bins,)` and the bin edges of
+            shape `(bins + 1,)`.
+        """
+        self._check_computable()
+        return self._sketch.histogram(bins, range)
+
+    def compute(self):
+        values = self.quantile(self._quantiles)
+        if isinstance(self._quantiles, numbers.Number):
+            return values
+        return dict(zip(self._quantiles, values))
@@ -0,0 +1,237 @@
+from __future__ import division
+
+from multiprocessing.pool import ThreadPool
+
+import torch
+
+from ignite.metrics.metric import Metric
+from ignite.exceptions import NotComputableError
+
+
+def _similarity(queries, gallery, gallery_sq_norms, distance):
+    scores = torch.mm(queries, gallery.t())
+    if distance == 'euclidean':
+        # -||q - g||^2 up to the per-query constant ||q||^2, which does not change the ranking
+        scores = 2 * scores - gallery_sq_norms.view(1, -1)
+    return scores
+
+
+def _blockwise_topk(queries, gallery, k, distance='cosine', block_size=1024, num_workers=1, exclude_self=False):
+    """Indices of the `k` most similar gallery items of each query.
+
+    The similarity matrix is computed by blocks of `block_size` queries and `block_size` gallery items,
+    keeping a running top-k per query, so that peak memory is `O(block_size * (block_size + k))` per worker.
+    Query blocks are processed by `num_workers` threads.
+    If `exclude_self` is True, queries and gallery are the same set and an item is never retrieved for itself.
+    """
+    num_queries, num_gallery = queries.shape[0], gallery.shape[0]
+    gallery_sq_norms = (gallery * gallery).sum(dim=1) if distance == 'euclidean' else None
+
+    def _process_query_block(q_start):
+        q_block = queries[q_start:q_start + block_size]
+        best_scores = q_block.new_empty((q_block.shape[0], 0))
+        best_indices = torch.empty((q_block.shape[0], 0), dtype=torch.long, device=q_block.device)
+        for g_start in range(0, num_gallery, block_size):
+            g_stop = min(g_start + block_size, num_gallery)
+            scores = _similarity(q_block, gallery[g_start:g_stop],
+                                 gallery_sq_norms[g_start:g_stop] if gallery_sq_norms is not None else None,
+                                 distance)
+            if exclude_self and g_start < q_start + q_block.shape[0] and q_start < g_stop:
+                rows = torch.arange(q_block.shape[0], device=scores.device)
+                cols = rows + q_start - g_start
+                valid = (cols >= 0) & (cols < scores.shape[1])
+                scores[rows[valid], cols[valid]] = -float('inf')
+            block_scores, block_indices = torch.topk(scores, min(k, scores.shape[1]), dim=1)
+            best_scores = torch.cat([best_scores, block_scores], dim=1)
+            best_indices = torch.cat([best_indices, block_indices + g_start], dim=1)
+            best_scores, order = torch.topk(best_scores, min(k, best_scores.shape[1]), dim=1)
+            best_indices = torch.gather(best_indices, 1, order)
+        return best_indices
+
+    q_starts = list(range(0, num_queries, block_size))
+    if num_workers > 1 and len(q_starts) > 1:
+        pool = ThreadPool(num_workers)
+        try:
+            results = pool.map(_process_query_block, q_starts)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_process_query_block(q_start) for q_start in q_starts]
+    return torch.cat(results, dim=0)
+
+
+class _RetrievalMetric(Metric):
+    """Base class of retrieval metrics, accumulating embeddings and labels during an epoch.
+
+    Each accumulated embedding is used as a query against the gallery: either the fixed `gallery` passed
+    to the constructor or, by default, all other accumulated embeddings. An item is relevant to a query if
+    their labels are equal. Queries without any relevant item in the gallery are ignored.
+    """
+    def __init__(self, k, gallery=None, distance='cosine', block_size=1024, num_workers=1,
+                 output_transform=lambda x: x):
+        ks = [k] if isinstance(k, int) else list(k)
+        if len(ks) == 0 or any(not isinstance(v, int) or v < 1 for v in ks):
+            raise ValueError("Argument k should be a positive integer or a non-empty list of positive integers")
+        if distance not in ('cosine', 'euclidean'):
+            raise ValueError("Argument distance should be 'cosine' or 'euclidean'")
+        if block_size < 1:
+            raise ValueError("Argument block_size should be a positive integer")
+
+        self._k = k
+        self._ks = sorted(set(ks))
+        self._distance = distance
+        self._block_size = block_size
+        self._num_workers = num_workers
+        self._gallery = None
+        if gallery is not None:
+            embeddings, labels = gallery
+            self._gallery = (self._prepare_embeddings(embeddings), labels.view(-1))
+        super(_RetrievalMetric, self).__init__(output_transform)
+
+    def _prepare_embeddings(self, embeddings):
+        embeddings = embeddings.detach().float()
+        if self._distance == 'cosine':
+            embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+        return embeddings
+
+    def reset(self):
+        self._embeddings = []
+        self._labels = []
+
+    def update(self, output):
+        embeddings, labels = output
+        if embeddings.ndimension() != 2:
+            raise ValueError("Embeddings should be of shape (batch_size, embedding_size)")
+        self._embeddings.append(self._prepare_embeddings(embeddings))
+        self._labels.append(labels.detach().view(-1))
+
+    def _retrieve(self):
+        """Returns the relevance of the retrieved items, of shape `(num_queries, max_k)`, and the number of
+        relevant items in the gallery of each query with at least one relevant item."""
+        if len(self._embeddings) == 0:
+            raise NotComputableError('{} must have at least one example before it can be computed'
+                                     .format(self.__class__.__name__))
+
+        queries = torch.cat(self._embeddings, dim=0)
+        query_labels = torch.cat(self._labels, dim=0)
+        exclude_self = self._gallery is None
+        if exclude_self:
+            gallery, gallery_labels = queries, query_labels
+        else:
+            gallery, gallery_labels = self._gallery
+            gallery, gallery_labels = gallery.to(queries.device), gallery_labels.to(queries.device)
+
+        max_k = min(self._ks[-1], gallery.shape[0] - int(exclude_self))
+        if max_k < 1:
+            raise NotComputableError('{} needs at least one gallery item to be computed'
+                                     .format(self.__class__.__name__))
+        indices = _blockwise_topk(queries, gallery, max_k, distance=self._distance, block_size=self._block_size,
+                                  num_workers=self._num_workers, exclude_self=exclude_self)
+        relevant = torch.eq(gallery_labels[indices], query_labels.view(-1, 1))
+
+        unique_labels, inverse = torch.unique(torch.cat([query_labels, gallery_labels]), return_inverse=True)
+        gallery_counts = torch.bincount(inverse[query_labels.shape[0]:], minlength=unique_labels.shape[0])
+        num_relevant = gallery_counts[inverse[:query_labels.shape[0]]] - int(exclude_self)
+
+        has_relevant = num_relevant > 0
+        if not bool(has_relevant.any()):
+            raise NotComputableError('{} needs at least one query with a relevant gallery item'
+                                     .format(self.__class__.__name__))
+        return relevant[has_relevant], num_relevant[has_relevant]
+
+    def _format(self, values):
+        if isinstance(self._k, int):
+            return values[self._k]
+        return values
+
+
+class RecallAtK(_RetrievalMetric):
+    """
+    Calculates the retrieval Recall@K: the fraction of queries for which at least one of the `K` most
+    similar gallery items has the same label.
+
+    Embeddings are accumulated during the epoch and compared by blocks at compute time, so that the full
+    similarity matrix between queries and gallery is never materialized.
+
+    - `update` must receive output of the form `(embeddings, labels)`, with `embeddings` of shape
+      `(batch_size, embedding_size)` and `labels` of shape `(batch_size,)`.
+
+    Args:
+        k (int or list of int, optional): the value of `K`, or a list of values. If `k` is an integer, `compute`
+            returns a float, otherwise a dictionary mapping each `K` to its recall.
+        gallery (tuple of `torch.Tensor`, optional): fixed gallery `(embeddings, labels)` to retrieve from.
+            By default, each accumulated embedding is used as a query against all the others.
+        distance (str, optional): 'cosine' (default) or 'euclidean'.
+        block_size (int, optional): number of queries and of gallery items per block of the similarity
+            matrix. Peak memory is proportional to `block_size ** 2` per worker.
+        num_workers (int, optional): number of threads processing blocks of queries.
+        output_transform (callable, optional): a callable that is used to transform the
+            :class:`ignite.engine.Engine`'s `process_function`'s output into the
+            form expected by the metric.
+
+    Examples:
+
+    .. code-block:: python
+
+        recall = RecallAtK(k=[1, 5, 10], block_size=4096, num_workers=4)
+        recall.attach(evaluator, 'recall')
+
+    """
+    def __init__(self, k=1, gallery=None, distance='cosine', block_size=1024, num_workers=1,
+                 output_transform=lambda x: x):
+        super(RecallAtK, self).__init__(k, gallery=gallery, distance=distance, block_size=block_size,
+                                        num_workers=num_workers, output_transform=output_transform)
+
+    def compute(self):
+        relevant, _ = self._retrieve()
+        # whether a relevant item is found within the first `i + 1` retrieved items
+        found = torch.cumsum(relevant.long(), dim=1) > 0
+        hits = found.sum(dim=0).tolist()
+        num_queries = relevant.shape[0]
+        return self._format({k: hits[min(k, len(hits)) - 1] / num_queries for k in self._ks})
+
+
+class RetrievalMAP(_RetrievalMetric):
+    """
+    Calculates the retrieval mean average precision at `K` (mAP@K).
+
+    For each query, the average precision is computed over the `K` most similar gallery items and normalized
+    by `min(K, R)`, `R` being the number of gallery items with the same label as the query. Embeddings are
+    accumulated during the epoch and compared by blocks at compute time, see :class:`RecallAtK`.
+
+    - `update` must receive output of the form `(embeddings, labels)`, with `embeddings` of shape
+      `(batch_size, embedding_size)` and `labels` of shape `(batch_size,)`.
+
+    Args:
+        k (int or list of int, optional): the cut-off `K`, or a list of cut-offs. If `k` is an integer,
+            `compute` returns a float, otherwise a dictionary mapping each `K` to its mAP.
+        gallery (tuple of `torch.Tensor`, optional): fixed gallery `(embeddings, labels)` to retrieve from.
+            By default, each accumulated embedding is used as a query against all the others.
+        distance (str, optional): 'cosine' (default) or 'euclidean'.
+        block_size (int, optional): number of queries and of gallery items per block of the similarity
+            matrix. Peak memory is proportional to `block_size ** 2` per worker.
+        num_workers (int, optional): number of threads processing blocks of queries.
+        output_transform (callable, optional): a callable that is used to transform the
+            :class:`ignite.engine.Engine`'s `process_function`'s output into the
+            form expected by the metric.
+
+    """
+    def __init__(self, k=100, gallery=None, distance='cosine', block_size=1024, num_workers=1,
+                 output_transform=lambda x: x):
+        super(RetrievalMAP, self).__init__(k, gallery=gallery, distance=distance, block_size=block_size,
+                                           num_workers=num_workers, output_transform=output_transform)
+
+    def compute(self):
+        relevant, num_relevant = self._retrieve()
+        relevant = relevant.double()
+        ranks = torch.arange(1, relevant.shape[1] + 1, dtype=torch.float64, device=relevant.device)
+        precision_at_rank = torch.cumsum(relevant, dim=1) / ranks
+        cum_precision = torch.cumsum(precision_at_rank * relevant, dim=1)
+
+        values = {}
+        for k in self._ks:
+            cut_off = min(k, relevant.shape[1])
+            normalizer = num_relevant.clamp(max=k).double()
+            values[k] = (cum_precision[:, cut_off - 1] / normalizer).mean().item()
+        return self._format(values)
@@ -11,24 +11,65 @@ class TopKCategoricalAccuracy(Metric):
     Calculates the top-k categorical accuracy.
 
     - `update` must receive output of the form `(y_pred, y)`.
+
+    Args:
+        k (int or list of int, optional): the value of `k`, or a list of values of `k` to compute the accuracy for.
+            All values are derived from a single call to `torch.topk` with the largest `k`. Values larger than
+            the number of classes count every example as correct.
+        output_transform (callable, optional): a callable that is used to transform the
+            :class:`ignite.engine.Engine`'s `process_function`'s output into the
+            form expected by the metric.
+
+    If `k` is an integer, `compute` returns a float. Otherwise, it returns a dictionary mapping each `k` to
+    its accuracy.
+
+    Examples:
+
+    .. code-block:: python
+
+        acc = TopKCategoricalAccuracy(k=[1, 5, 10])
+        acc.attach(evaluator, 'top_k_accuracy')
+        # evaluator.state.metrics['top_k_accuracy'] == {1: ..., 5: ..., 10: ...}
+
     """
     def __init__(self, k=5, output_transform=lambda x: x):
-        super(TopKCategoricalAccuracy, self).__init__(output_transform)
+        if isinstance(k, int):
+            ks = [k]
+        else:
+            ks = list(k)
+        if len(ks) == 0 or any(not isinstance(v, int) or v < 1 for v in ks):
+            raise ValueError("Argument k should be a positive integer or a non-empty list of positive integers")
+
         self._k = k
+        self._ks = sorted(set(ks))
+        super(TopKCategoricalAccuracy, self).__init__(output_transform)
 
     def reset(self):
-        self._num_correct = 0
+        self._num_correct = None
         self._num_examples = 0
 
     def update(self, output):
         y_pred, y = output
-        sorted_indices = torch.topk(y_pred, self._k, dim=1)[1]
-        expanded_y = y.view(-1, 1).expand(-1, self._k)
-        correct = torch.sum(torch.eq(sorted_indices, expanded_y), dim=1)
-        self._num_correct += torch.sum(correct).item()
-        self._num_examples += correct.shape[0]
+        max_k = self._ks[-1]
+        # values of `k` larger than the number of classes retrieve all the classes
+        sorted_indices = torch.topk(y_pred, min(max_k, y_pred.shape[1]), dim=1)[1]
+        # Each row holds at most one hit: the rank at which the target was retrieved
+        hits = torch.eq(sorted_indices, y.view(-1, 1)).sum(dim=0)
+        # Number of examples whose target is within the first `i + 1` predictions
+        num_correct = torch.cumsum(hits, dim=0)
+        if num_correct.shape[0] < max_k:
+            num_correct = torch.cat([num_correct, num_correct[-1:].expand(max_k - num_correct.shape[0])])
+        if self._num_correct is None:
+            self._num_correct = num_correct
+        else:
+            self._num_correct += num_correct
+        self._num_examples += sorted_indices.shape[0]
 
     def compute(self):
         if self._num_examples == 0:
             raise NotComputableError('TopKCategoricalAccuracy must have at least one example before it can be computed')
-        return self._num_correct / self._num_examples
+        num_correct = self._num_correct.tolist()
+        accuracies = {k: num_correct[k - 1] / self._num_examples for k in self._ks}
+        if isinstance(self._k, int):
+            return accuracies[self._k]
+        return accuracies
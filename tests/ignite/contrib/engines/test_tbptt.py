@@ -7,7 +7,10 @@ import torch.nn.functional as F
 import pytest
 import mock
 
-from ignite.contrib.engines import create_supervised_tbptt_trainer, Tbptt_Events
+from ignite.contrib.engines import create_supervised_tbptt_trainer, create_supervised_tbptt_evaluator, \
+    Tbptt_Events, StreamBatches
+from ignite.engine import Events
+from ignite.metrics import MeanSquaredError
 from ignite.contrib.engines.tbptt import _detach_hidden
 
 
@@ -141,3 +144,297 @@ def test_create_supervised_tbptt_trainer_with_cpu():
 @pytest.mark.skipif(not torch.cuda.is_available(), reason="Skip if no GPU")
 def test_create_supervised_tbptt_trainer_with_gpu():
     _test_create_supervised_tbptt_trainer("cuda")
+
+
+def _rnn_and_data():
+    torch.manual_seed(12)
+    model = nn.RNN(1, 1)
+    optimizer = optim.SGD(model.parameters(), 0.1)
+    X = torch.rand(7, 2, 1)
+    y = torch.rand(7, 2, 1)
+    return model, optimizer, [(X, y)]
+
+
+def test_create_supervised_tbptt_trainer_output():
+    model, optimizer, data = _rnn_and_data()
+    trainer = create_supervised_tbptt_trainer(model, optimizer, F.mse_loss, tbtt_step=2)
+    chunk_losses = []
+
+    @trainer.on(Tbptt_Events.TIME_ITERATION_COMPLETED)
+    def save_chunk_loss(engine):
+        chunk_losses.append(engine.state.output)
+
+    trainer.run(data)
+    assert len(chunk_losses) == 4
+    assert isinstance(trainer.state.output, float)
+    assert trainer.state.output == pytest.approx(sum(chunk_losses) / 4)
+
+
+def test_create_supervised_tbptt_trainer_without_time_handlers():
+    model, optimizer, data = _rnn_and_data()
+    trainer = create_supervised_tbptt_trainer(model, optimizer, F.mse_loss, tbtt_step=2)
+    fire_event = mock.MagicMock(wraps=trainer.fire_event)
+    trainer.fire_event = fire_event
+
+    trainer.run(data)
+    assert isinstance(trainer.state.output, float)
+    # time events are not fired without handlers
+    assert fire_event.call_count == 0
+
+
+def test_stream_batches():
+    stream = torch.arange(23)
+
+    with pytest.raises(ValueError):
+        StreamBatches(stream.view(1, -1), batch_size=2, seq_len=3)
+
+    with pytest.raises(ValueError):
+        StreamBatches(stream, batch_size=2, seq_len=3, dim=2)
+
+    with pytest.raises(ValueError):
+        StreamBatches(stream, batch_size=20, seq_len=3)
+
+    data = StreamBatches(stream, batch_size=2, seq_len=4, dim=1)
+    batches = list(data)
+    # 2 sub-streams of 11 tokens: [0, 10] and [11, 21], 10 input steps each
+    assert len(data) == len(batches) == 3
+    assert batches[0][0].tolist() == [[0, 1, 2, 3], [11, 12, 13, 14]]
+    assert batches[0][1].tolist() == [[1, 2, 3, 4], [12, 13, 14, 15]]
+    assert batches[1][0].tolist() == [[4, 5, 6, 7], [15, 16, 17, 18]]
+    assert batches[2][0].tolist() == [[8, 9], [19, 20]]
+    assert batches[2][1].tolist() == [[9, 10], [20, 21]]
+
+    batches_t = list(StreamBatches(stream, batch_size=2, seq_len=4))
+    for (x, y), (x_t, y_t) in zip(batches, batches_t):
+        assert torch.equal(x.t(), x_t)
+        assert torch.equal(y.t(), y_t)
+
+
+def test_create_supervised_tbptt_trainer_stateful():
+    model = nn.RNN(1, 1)
+    forward_mock = mock.MagicMock()
+    forward_mock.return_value = None
+    model.register_forward_hook(forward_mock)
+
+    optimizer = optim.SGD(model.parameters(), 0.1)
+    trainer = create_supervised_tbptt_trainer(model, optimizer, F.mse_loss, tbtt_step=2, stateful=True)
+
+    X = torch.ones(4, 2, 1)
+    y = torch.ones(4, 2, 1)
+    data = [(X, y)] * 3
+
+    trainer.run(data, max_epochs=2)
+
+    assert forward_mock.call_count == 12
+    n_inputs = [len(args[1]) for args, kwargs in forward_mock.call_args_list]
+    # hidden state is only reset at the start of each epoch
+    assert n_inputs == [1] + [2] * 5 + [1] + [2] * 5
+    for args, kwargs in forward_mock.call_args_list:
+        if len(args[1]) == 2:
+            assert args[1][1].is_leaf
+    assert trainer.state.hidden.grad_fn is None
+
+
+def test_create_supervised_tbptt_trainer_stateful_reset():
+    model = nn.RNN(1, 1)
+    forward_mock = mock.MagicMock()
+    forward_mock.return_value = None
+    model.register_forward_hook(forward_mock)
+
+    optimizer = optim.SGD(model.parameters(), 0.1)
+    trainer = create_supervised_tbptt_trainer(model, optimizer, F.mse_loss, tbtt_step=2, stateful=True)
+
+    @trainer.on(Events.ITERATION_COMPLETED)
+    def reset(engine):
+        if engine.state.iteration == 2:
+            engine.state.hidden = None
+
+    data = [(torch.ones(2, 2, 1), torch.ones(2, 2, 1))] * 4
+    trainer.run(data)
+    n_inputs = [len(args[1]) for args, kwargs in forward_mock.call_args_list]
+    assert n_inputs == [1, 2, 1, 2]
+
+
+@mock.patch("ignite.contrib.engines.tbptt._detach_hidden")
+@pytest.mark.parametrize("accumulation_steps, n_steps", [(1, 5), (2, 3), (5, 1), (None, 1)])
+def test_create_supervised_tbptt_trainer_accumulation_callcounts(mock_detach_hidden, accumulation_steps, n_steps):
+    model = mock.MagicMock()
+    model.return_value = (1, 1)
+    optimizer = mock.MagicMock()
+    loss = mock.MagicMock()
+
+    trainer = create_supervised_tbptt_trainer(model, optimizer, loss, tbtt_step=2,
+                                              accumulation_steps=accumulation_steps)
+    data = [(torch.ones(9, 2, 1), torch.ones(9, 2, 1))]
+    trainer.run(data)
+
+    assert model.call_count == 5
+    assert optimizer.zero_grad.call_count == n_steps
+    assert optimizer.step.call_count == n_steps
+
+
+def test_create_supervised_tbptt_trainer_accumulation_bad_args():
+    with pytest.raises(ValueError):
+        create_supervised_tbptt_trainer(mock.MagicMock(), mock.MagicMock(), mock.MagicMock(), tbtt_step=2,
+                                        accumulation_steps=0)
+
+
+def test_create_supervised_tbptt_trainer_accumulation_gradient():
+    # accumulating over all chunks gives the average of the chunk gradients
+    torch.manual_seed(12)
+    X = torch.rand(6, 2, 1)
+    y = torch.rand(6, 2, 1)
+    model = nn.RNN(1, 1)
+    init_state = {k: v.clone() for k, v in model.state_dict().items()}
+
+    expected_grads = [torch.zeros_like(p) for p in model.parameters()]
+    hidden = None
+    for x_t, y_t in zip(X.split(2), y.split(2)):
+        y_pred_t, hidden = model(x_t) if hidden is None else model(x_t, hidden.detach())
+        grads = torch.autograd.grad(F.mse_loss(y_pred_t, y_t), list(model.parameters()))
+        for e, g in zip(expected_grads, grads):
+            e += g / 3
+
+    optimizer = optim.SGD(model.parameters(), 1.0)
+    trainer = create_supervised_tbptt_trainer(model, optimizer, F.mse_loss, tbtt_step=2, accumulation_steps=None)
+    trainer.run([(X, y)])
+
+    for (name, p), e in zip(model.named_parameters(), expected_grads):
+        assert torch.allclose(p.grad, e)
+        assert torch.allclose(p.data, init_state[name] - e)
+
+
+def _lengths_data(time_length=6):
+    torch.manual_seed(12)
+    X = torch.rand(time_length, 3, 1)
+    y = torch.rand(time_length, 3, 1)
+    lengths = torch.tensor([2, 5, 4])
+    return X, y, lengths
+
+
+def test_create_supervised_tbptt_trainer_lengths():
+    model = nn.RNN(1, 1)
+    optimizer = optim.SGD(model.parameters(), 0.1)
+    forward_mock = mock.MagicMock()
+    forward_mock.return_value = None
+    model.register_forward_hook(forward_mock)
+
+    trainer = create_supervised_tbptt_trainer(model, optimizer, F.mse_loss, tbtt_step=2)
+    X, y, lengths = _lengths_data(time_length=8)
+    trainer.run([(X, y, lengths)])
+
+    # the last chunk, only padding, is skipped, finished sequences are dropped
+    assert forward_mock.call_count == 3
+    inputs = [forward_mock.call_args_list[i][0][1] for i in range(3)]
+    assert inputs[0][0].shape == (2, 3, 1)
+    for i, batch_size in zip([1, 2], [2, 1]):
+        x, h = inputs[i]
+        assert x.shape == (2, batch_size, 1)
+        assert h.shape == (1, batch_size, 1)
+    # sequences are sorted by decreasing length
+    assert torch.equal(inputs[0][0], X[:2, [1, 2, 0]])
+    assert torch.equal(inputs[2][0], X[4:6, [1]])
+
+
+def test_create_supervised_tbptt_trainer_lengths_batch_first():
+    model = nn.GRU(1, 1, batch_first=True)
+    optimizer = optim.SGD(model.parameters(), 0.1)
+    forward_mock = mock.MagicMock()
+    forward_mock.return_value = None
+    model.register_forward_hook(forward_mock)
+
+    trainer = create_supervised_tbptt_trainer(model, optimizer, F.mse_loss, tbtt_step=3, dim=1)
+    X, y, lengths = _lengths_data()
+    trainer.run([(X.transpose(0, 1), y.transpose(0, 1), lengths)])
+
+    assert forward_mock.call_count == 2
+    x, h = forward_mock.call_args_list[1][0][1]
+    assert x.shape == (2, 3, 1)
+    assert h.shape == (1, 2, 1)
+
+
+def test_create_supervised_tbptt_trainer_packed():
+    class PackedRNN(nn.Module):
+        def __init__(self):
+            super(PackedRNN, self).__init__()
+            self.rnn = nn.LSTM(1, 2)
+
+        def forward(self, x, hidden=None):
+            return self.rnn(x, hidden)
+
+    def loss_fn(y_pred, y):
+        return F.mse_loss(y_pred.data[:, :1], y.data)
+
+    model = PackedRNN()
+    optimizer = optim.SGD(model.parameters(), 0.1)
+    inputs = []
+    model.register_forward_hook(lambda m, i, o: inputs.append(i[0]))
+
+    trainer = create_supervised_tbptt_trainer(model, optimizer, loss_fn, tbtt_step=2, packed=True)
+    X, y, lengths = _lengths_data()
+    trainer.run([(X, y, lengths)])
+
+    assert len(inputs) == 3
+    # only the real time steps are computed
+    assert [x.data.shape[0] for x in inputs] == [6, 4, 1]
+    assert isinstance(trainer.state.output, float)
+
+
+def test_create_supervised_tbptt_trainer_lengths_stateful():
+    model = nn.RNN(1, 1)
+    optimizer = optim.SGD(model.parameters(), 0.1)
+    trainer = create_supervised_tbptt_trainer(model, optimizer, F.mse_loss, tbtt_step=2, stateful=True)
+    with pytest.raises(ValueError):
+        trainer.run([_lengths_data()])
+
+
+def test_create_supervised_tbptt_evaluator():
+    torch.manual_seed(12)
+    model = nn.RNN(1, 1)
+    X = torch.rand(7, 2, 1)
+    y = torch.rand(7, 2, 1)
+    with torch.no_grad():
+        y_pred, _ = model(X)
+    # MeanSquaredError counts examples along the first (time) dimension
+    expected_mse = (y_pred - y).pow(2).sum().item() / 7
+
+    forward_mock = mock.MagicMock()
+    forward_mock.return_value = None
+    model.register_forward_hook(forward_mock)
+
+    evaluator = create_supervised_tbptt_evaluator(model, tbtt_step=2, metrics={'mse': MeanSquaredError()})
+    chunk_outputs = []
+
+    @evaluator.on(Tbptt_Events.TIME_ITERATION_COMPLETED)
+    def save_chunk_output(engine):
+        chunk_outputs.append(engine.state.output)
+
+    state = evaluator.run([(X, y)])
+
+    # the hidden state is carried over, the chunks give the full sequence output
+    assert forward_mock.call_count == 4
+    assert len(chunk_outputs) == 4
+    assert all(not y_pred_t.requires_grad for y_pred_t, _ in chunk_outputs)
+    assert torch.allclose(torch.cat([y_pred_t for y_pred_t, _ in chunk_outputs]), y_pred)
+    assert state.metrics['mse'] == pytest.approx(expected_mse)
+    assert state.output[0].shape == (1, 2, 1)
+
+
+def test_create_supervised_tbptt_evaluator_lengths():
+    torch.manual_seed(12)
+    model = nn.RNN(1, 1)
+    X, y, lengths = _lengths_data()
+    with torch.no_grad():
+        y_pred, _ = model(X[:5, 1:2])
+
+    evaluator = create_supervised_tbptt_evaluator(model, tbtt_step=2)
+    chunk_outputs = []
+
+    @evaluator.on(Tbptt_Events.TIME_ITERATION_COMPLETED)
+    def save_chunk_output(engine):
+        chunk_outputs.append(engine.state.output)
+
+    evaluator.run([(X, y, lengths)])
+    assert [y_pred_t.shape[1] for y_pred_t, _ in chunk_outputs] == [3, 2, 1]
+    # the longest sequence is the first one after sorting
+    assert torch.allclose(torch.cat([y_pred_t[:, :1] for y_pred_t, _ in chunk_outputs])[:5], y_pred)
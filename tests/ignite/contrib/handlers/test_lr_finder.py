@@ -0,0 +1,102 @@
+import pytest
+import torch
+import torch.nn as nn
+
+from ignite.contrib.handlers import FastaiLRFinder
+from ignite.engine import Events, create_supervised_trainer
+
+
+def _setup():
+    torch.manual_seed(12)
+    model = nn.Linear(4, 1)
+    optimizer = torch.optim.SGD(model.parameters(), lr=1e-4, momentum=0.9)
+    trainer = create_supervised_trainer(model, optimizer, nn.MSELoss())
+    w = torch.randn(4, 1)
+    data = []
+    for _ in range(50):
+        x = torch.randn(8, 4)
+        data.append((x, x.mm(w)))
+    return model, optimizer, trainer, data
+
+
+def test_bad_args():
+    model, optimizer, trainer, _ = _setup()
+    lr_finder = FastaiLRFinder()
+
+    for kwargs in [dict(step_mode='cos'), dict(smooth_f=1.0), dict(diverge_th=0.5), dict(num_iter=0),
+                   dict(start_lr=0.0)]:
+        with pytest.raises(ValueError):
+            with lr_finder.attach(trainer, model, optimizer, **kwargs):
+                pass
+
+    with pytest.raises(RuntimeError):
+        lr_finder.lr_suggestion()
+
+
+@pytest.mark.parametrize("step_mode", ['exp', 'linear'])
+def test_lr_finder(step_mode):
+    model, optimizer, trainer, data = _setup()
+    model_state = {k: v.clone() for k, v in model.state_dict().items()}
+    lr_finder = FastaiLRFinder()
+
+    with lr_finder.attach(trainer, model, optimizer, num_iter=40, end_lr=10.0, step_mode=step_mode) as t:
+        assert t is trainer
+        t.run(data, max_epochs=2)
+
+    results = lr_finder.get_results()
+    lrs, losses = results['lr'], results['loss']
+    assert 2 <= len(lrs) == len(losses) <= 40
+    assert lrs[0] == pytest.approx(1e-4)
+    assert all(b > a for a, b in zip(lrs[:-1], lrs[1:]))
+    # with a learning rate of 10, the loss diverges before the end of the range test
+    assert len(lrs) < 40
+    assert 1e-4 < lr_finder.lr_suggestion() < 10.0
+
+    # states are restored and handlers removed
+    for k, v in model.state_dict().items():
+        assert torch.equal(v, model_state[k])
+    assert optimizer.param_groups[0]['lr'] == 1e-4
+    assert len(optimizer.state) == 0
+    assert not trainer.has_event_handler(lr_finder._log_lr_and_loss)
+
+    trainer.run(data, max_epochs=1)
+    assert trainer.state.iteration == len(data)
+    assert optimizer.param_groups[0]['lr'] == 1e-4
+
+
+def test_lr_finder_num_iter():
+    model, optimizer, trainer, data = _setup()
+    lr_finder = FastaiLRFinder()
+
+    with lr_finder.attach(trainer, model, optimizer, num_iter=10, start_lr=1e-5, end_lr=1e-3) as t:
+        t.run(data, max_epochs=1)
+
+    lrs = lr_finder.get_results()['lr']
+    assert len(lrs) == 10
+    assert lrs[0] == pytest.approx(1e-5)
+    assert lrs[-1] == pytest.approx(1e-3)
+
+
+def test_lr_finder_data_without_len():
+    model, optimizer, trainer, data = _setup()
+    lr_finder = FastaiLRFinder()
+
+    with lr_finder.attach(trainer, model, optimizer, num_iter=10, start_lr=1e-5, end_lr=1e-3) as t:
+        t.run((batch for batch in data), max_epochs=1)
+
+    assert len(lr_finder.get_results()['lr']) == 10
+
+
+def test_lr_finder_zero_lr_exp():
+    model, optimizer, trainer, data = _setup()
+    optimizer.param_groups[0]['lr'] = 0.0
+    lr_finder = FastaiLRFinder()
+
+    with pytest.raises(ValueError):
+        with lr_finder.attach(trainer, model, optimizer) as t:
+            t.run(data, max_epochs=1)
+
+    # a linear ramp can start from zero
+    with lr_finder.attach(trainer, model, optimizer, step_mode='linear', end_lr=1e-3) as t:
+        t.run(data, max_epochs=1)
+    assert lr_finder.get_results()['lr'][0] == 0.0
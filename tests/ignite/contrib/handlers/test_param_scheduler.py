@@ -1,9 +1,13 @@
+from collections import deque
+
 import pytest
 
 import torch
+from torch.optim.lr_scheduler import StepLR, CosineAnnealingLR, ExponentialLR
 
 from ignite.engine import Engine, Events
-from ignite.contrib.handlers.param_scheduler import LinearCyclicalScheduler, CosineAnnealingScheduler
+from ignite.contrib.handlers.param_scheduler import LinearCyclicalScheduler, CosineAnnealingScheduler, \
+    PiecewiseLinear, ConcatScheduler, LRScheduler, create_lr_scheduler_with_warmup
 
 
 def test_linear_scheduler():
@@ -96,3 +100,263 @@ def test_save_param_history():
     assert len(state_lrs) == len(lrs)
     # Unpack singleton lists
     assert [group[0] for group in state_lrs] == lrs
+
+
+def _run_lrs(scheduler, optimizer, num_iters, max_epochs=1):
+    lrs = []
+
+    def save_lr(engine):
+        lrs.append(optimizer.param_groups[0]['lr'])
+
+    trainer = Engine(lambda engine, batch: None)
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, scheduler)
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, save_lr)
+    trainer.run([0] * num_iters, max_epochs=max_epochs)
+    return lrs
+
+
+@pytest.mark.parametrize("scheduler_cls", [LinearCyclicalScheduler, CosineAnnealingScheduler])
+@pytest.mark.parametrize("cycle_mult", [1, 2])
+def test_simulate_values(scheduler_cls, cycle_mult):
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+    scheduler = scheduler_cls(optimizer, 'lr', 1, 0, 10, cycle_mult=cycle_mult)
+
+    values = scheduler.simulate_values(45)
+    # simulation does not modify the scheduler
+    assert scheduler.event_index == 0 and scheduler.cycle == 0 and scheduler.cycle_size == 10
+
+    lrs = _run_lrs(scheduler, optimizer, 45)
+    assert values.shape == (45,)
+    assert lrs == list(map(pytest.approx, values.tolist()))
+
+
+def test_precompute():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+    scheduler = CosineAnnealingScheduler(optimizer, 'lr', 1, 0, 10, cycle_mult=2)
+    expected = scheduler.simulate_values(50)
+
+    scheduler = CosineAnnealingScheduler(optimizer, 'lr', 1, 0, 10, cycle_mult=2)
+    scheduler.precompute(20)
+    scheduler._values[5] = 42.0  # values are looked up in the table
+    lrs = _run_lrs(scheduler, optimizer, 25, max_epochs=2)
+
+    expected[5] = 42.0
+    assert lrs == list(map(pytest.approx, expected.tolist()))
+
+
+def test_state_dict():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+    scheduler = LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 10, cycle_mult=2)
+    expected = _run_lrs(scheduler, optimizer, 40)
+
+    scheduler = LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 10, cycle_mult=2)
+    lrs = _run_lrs(scheduler, optimizer, 15)
+    state_dict = scheduler.state_dict()
+    assert state_dict == {'event_index': 5, 'num_events': 15, 'cycle': 1, 'cycle_size': 20}
+
+    scheduler = LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 10, cycle_mult=2)
+    scheduler.load_state_dict(state_dict)
+    lrs += _run_lrs(scheduler, optimizer, 25)
+    assert lrs == list(map(pytest.approx, expected))
+
+
+def test_bounded_param_history():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+
+    scheduler = LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 10, save_history=True, history_size=5)
+    trainer = Engine(lambda engine, batch: None)
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, scheduler)
+    trainer.run([0] * 10, max_epochs=2)
+
+    state_lrs = trainer.state.param_history['lr']
+    assert isinstance(state_lrs, deque)
+    assert [group[0] for group in state_lrs] == list(map(pytest.approx, [0.0, 0.2, 0.4, 0.6, 0.8]))
+
+
+def test_unbounded_param_history_is_list():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+
+    scheduler = LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 10, save_history=True)
+    trainer = Engine(lambda engine, batch: None)
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, scheduler)
+    trainer.run([0] * 10, max_epochs=2)
+
+    state_lrs = trainer.state.param_history['lr']
+    assert isinstance(state_lrs, list)
+    assert len(state_lrs) == 20
+    assert [group[0] for group in state_lrs[-5:]] == list(map(pytest.approx, [0.0, 0.2, 0.4, 0.6, 0.8]))
+
+
+def test_piecewise_linear():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+
+    with pytest.raises(ValueError):
+        PiecewiseLinear(optimizer, 'lr', milestones_values=[])
+
+    with pytest.raises(ValueError):
+        PiecewiseLinear(optimizer, 'lr', milestones_values=[(5, 1.0), (5, 0.0)])
+
+    scheduler = PiecewiseLinear(optimizer, 'lr', milestones_values=[(2, 0.5), (6, 1.0), (10, 0.0)])
+    lrs = _run_lrs(scheduler, optimizer, 12)
+    assert lrs == list(map(pytest.approx, [
+        0.5, 0.5, 0.5, 0.625, 0.75, 0.875, 1.0, 0.75, 0.5, 0.25, 0.0, 0.0
+    ]))
+    assert scheduler.simulate_values(12).tolist() == list(map(pytest.approx, lrs))
+
+
+def test_concat_scheduler():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+
+    warmup = PiecewiseLinear(optimizer, 'lr', milestones_values=[(0, 0.0), (3, 0.6)])
+    cyclical = LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 10)
+    scheduler = ConcatScheduler([warmup, cyclical], durations=[4])
+    expected = scheduler.simulate_values(14)
+
+    lrs = _run_lrs(scheduler, optimizer, 14)
+    assert lrs == list(map(pytest.approx, [
+        0.0, 0.2, 0.4, 0.6,
+        1.0, 0.8, 0.6, 0.4, 0.2, 0.0, 0.2, 0.4, 0.6, 0.8,
+    ]))
+    assert lrs == list(map(pytest.approx, expected.tolist()))
+
+
+def test_concat_scheduler_state_dict():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+
+    def _scheduler():
+        return ConcatScheduler([PiecewiseLinear(optimizer, 'lr', milestones_values=[(0, 0.0), (3, 0.6)]),
+                                LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 4, cycle_mult=2)],
+                               durations=[4])
+
+    expected = _run_lrs(_scheduler(), optimizer, 20)
+
+    scheduler = _scheduler()
+    lrs = _run_lrs(scheduler, optimizer, 9)
+    state_dict = scheduler.state_dict()
+    scheduler = _scheduler()
+    scheduler.load_state_dict(state_dict)
+    lrs += _run_lrs(scheduler, optimizer, 11)
+    assert lrs == list(map(pytest.approx, expected))
+
+    scheduler = _scheduler()
+    scheduler.precompute(20)
+    assert _run_lrs(scheduler, optimizer, 20) == list(map(pytest.approx, expected))
+
+
+def test_concat_scheduler_bad_args():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=0)
+    other_optimizer = torch.optim.SGD([tensor], lr=0)
+    s1 = LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 10)
+    s2 = LinearCyclicalScheduler(optimizer, 'lr', 1, 0, 10)
+
+    with pytest.raises(ValueError):
+        ConcatScheduler([s1], durations=[])
+
+    with pytest.raises(TypeError):
+        ConcatScheduler([s1, 42], durations=[10])
+
+    with pytest.raises(ValueError):
+        ConcatScheduler([s1, s2], durations=[10, 10])
+
+    with pytest.raises(ValueError):
+        ConcatScheduler([s1, s2], durations=[0])
+
+    with pytest.raises(ValueError):
+        ConcatScheduler([s1, LinearCyclicalScheduler(other_optimizer, 'lr', 1, 0, 10)], durations=[10])
+
+    with pytest.raises(ValueError):
+        ConcatScheduler([s1, LinearCyclicalScheduler(optimizer, 'momentum', 1, 0, 10)], durations=[10])
+
+
+def test_lr_scheduler():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=1.0)
+
+    with pytest.raises(TypeError):
+        LRScheduler(optimizer)
+
+    step_scheduler = StepLR(optimizer, step_size=3, gamma=0.1)
+    scheduler = LRScheduler(step_scheduler)
+    expected = scheduler.simulate_values(8)
+    assert optimizer.param_groups[0]['lr'] == 1.0
+
+    lrs = _run_lrs(scheduler, optimizer, 8)
+    assert lrs == list(map(pytest.approx, [1.0, 1.0, 1.0, 0.1, 0.1, 0.1, 0.01, 0.01]))
+    assert lrs == list(map(pytest.approx, expected.tolist()))
+
+    # resume with the state of the optimizer
+    state_dict = scheduler.state_dict()
+    optimizer_state_dict = optimizer.state_dict()
+    optimizer = torch.optim.SGD([tensor], lr=1.0)
+    scheduler = LRScheduler(StepLR(optimizer, step_size=3, gamma=0.1))
+    optimizer.load_state_dict(optimizer_state_dict)
+    scheduler.load_state_dict(state_dict)
+    assert _run_lrs(scheduler, optimizer, 2) == list(map(pytest.approx, [0.01, 0.001]))
+
+
+def test_create_lr_scheduler_with_warmup():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=1.0)
+
+    with pytest.raises(ValueError):
+        create_lr_scheduler_with_warmup(StepLR(optimizer, step_size=3), 0.0, 1.0, warmup_duration=1)
+
+    with pytest.raises(TypeError):
+        create_lr_scheduler_with_warmup(42, 0.0, 1.0, warmup_duration=5)
+
+    scheduler = create_lr_scheduler_with_warmup(StepLR(optimizer, step_size=3, gamma=0.1),
+                                                warmup_start_value=0.0, warmup_end_value=1.0, warmup_duration=5,
+                                                save_history=True)
+    trainer = Engine(lambda engine, batch: None)
+    trainer.add_event_handler(Events.ITERATION_STARTED, scheduler)
+    trainer.run([0] * 11, max_epochs=1)
+
+    lrs = [group[0] for group in trainer.state.param_history['lr']]
+    assert lrs == list(map(pytest.approx, [
+        0.0, 0.25, 0.5, 0.75, 1.0,
+        1.0, 1.0, 1.0, 0.1, 0.1, 0.1,
+    ]))
+
+
+@pytest.mark.parametrize('make_lr_scheduler', [
+    lambda optimizer: StepLR(optimizer, step_size=3, gamma=0.1),
+    lambda optimizer: CosineAnnealingLR(optimizer, T_max=4),
+    lambda optimizer: ExponentialLR(optimizer, gamma=0.5),
+])
+def test_create_lr_scheduler_with_warmup_end_value(make_lr_scheduler):
+    # the native scheduler takes over from warmup_end_value, not from the learning rate of the optimizer
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=1.0)
+    scheduler = create_lr_scheduler_with_warmup(make_lr_scheduler(optimizer),
+                                                warmup_start_value=0.0, warmup_end_value=0.4, warmup_duration=5,
+                                                save_history=True)
+    simulated_lrs = scheduler.simulate_values(11)
+
+    trainer = Engine(lambda engine, batch: None)
+    trainer.add_event_handler(Events.ITERATION_STARTED, scheduler)
+    trainer.run([0] * 11, max_epochs=1)
+
+    lrs = [group[0] for group in trainer.state.param_history['lr']]
+    assert lrs == list(map(pytest.approx, simulated_lrs))
+    assert lrs[:6] == list(map(pytest.approx, [0.0, 0.1, 0.2, 0.3, 0.4, 0.4]))
+    assert max(lrs) == pytest.approx(0.4)
+
+
+def test_create_lr_scheduler_with_warmup_step_lr_values():
+    tensor = torch.zeros([1], requires_grad=True)
+    optimizer = torch.optim.SGD([tensor], lr=1.0)
+    scheduler = create_lr_scheduler_with_warmup(StepLR(optimizer, step_size=3, gamma=0.1),
+                                                warmup_start_value=0.0, warmup_end_value=0.4, warmup_duration=5)
+    assert list(scheduler.simulate_values(11)) == list(map(pytest.approx, [
+        0.0, 0.1, 0.2, 0.3, 0.4,
+        0.4, 0.4, 0.4, 0.04, 0.04, 0.04,
+    ]))
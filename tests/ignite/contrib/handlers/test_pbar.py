@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import threading
+import time
+
 import numpy as np
 import pytest
 import torch
@@ -66,3 +69,111 @@ def test_pbar_with_metric():
 
     with pytest.raises(KeyError):
         trainer.run(data=data, max_epochs=1)
+
+
+def _captured_lines(capsys):
+    captured = capsys.readouterr()
+    err = captured.err.split('\r')
+    err = list(map(lambda x: x.strip(), err))
+    return list(filter(None, err))
+
+
+def test_bad_args():
+    with pytest.raises(ValueError):
+        ProgressBar(refresh_interval=-1)
+
+    with pytest.raises(ValueError):
+        ProgressBar(refresh_every=0)
+
+    with pytest.raises(ValueError):
+        ProgressBar(refresh_interval=None, background=True)
+
+
+def test_pbar_refresh_every(capsys):
+
+    engine = Engine(update_fn)
+    pbar = ProgressBar(refresh_interval=None, refresh_every=4)
+    pbar.attach(engine, ['a'])
+
+    engine.run(list(range(10)), max_epochs=1)
+
+    lines = [line for line in _captured_lines(capsys) if line.startswith('Epoch')]
+    assert [line.split(']')[0] for line in lines] == ['Epoch 1: [1/10', 'Epoch 1: [5/10', 'Epoch 1: [9/10']
+
+
+def test_pbar_refresh_every_iteration(capsys):
+
+    engine = Engine(update_fn)
+    pbar = ProgressBar(refresh_interval=None)
+    pbar.attach(engine, ['a'])
+
+    engine.run(list(range(3)), max_epochs=1)
+
+    lines = [line for line in _captured_lines(capsys) if line.startswith('Epoch')]
+    assert [line.split(']')[0] for line in lines] == ['Epoch 1: [1/3', 'Epoch 1: [2/3', 'Epoch 1: [3/3']
+
+
+def test_pbar_no_len(capsys):
+
+    def data():
+        for i in range(3):
+            yield i
+
+    class Data(object):
+        def __iter__(self):
+            return data()
+
+    engine = Engine(update_fn)
+    pbar = ProgressBar(refresh_interval=None)
+    pbar.attach(engine, ['a'])
+
+    engine.run(Data(), max_epochs=1)
+
+    lines = [line for line in _captured_lines(capsys) if line.startswith('Epoch')]
+    assert lines[-1].startswith('Epoch 1: [3] ')
+    assert ', a=1.00e+00 [00:00]' in lines[-1]
+
+
+def test_pbar_background(capsys):
+
+    def slow_update_fn(engine, batch):
+        engine.state.metrics['a'] = batch
+        time.sleep(0.02)
+
+    engine = Engine(slow_update_fn)
+    pbar = ProgressBar(refresh_interval=0.01, background=True)
+    pbar.attach(engine, ['a'])
+
+    engine.run(list(range(10)), max_epochs=2)
+    assert pbar._thread is None
+
+    lines = [line for line in _captured_lines(capsys) if line.startswith('Epoch')]
+    assert len(lines) > 2
+    assert any(line.startswith('Epoch 2: ') for line in lines)
+
+
+def test_pbar_background_exception():
+
+    def failing_update_fn(engine, batch):
+        if engine.state.iteration == 3:
+            raise ValueError("bad batch")
+
+    engine = Engine(failing_update_fn)
+    pbar = ProgressBar(refresh_interval=0.01, background=True)
+    pbar.attach(engine, [])
+
+    num_threads = threading.active_count()
+    with pytest.raises(ValueError):
+        engine.run(list(range(10)), max_epochs=1)
+    assert pbar._thread is None
+    assert pbar.pbar is None
+    assert threading.active_count() == num_threads
+
+
+def test_pbar_background_missing_metric():
+    engine = Engine(update_fn)
+    pbar = ProgressBar(background=True)
+    pbar.attach(engine, ['b'])
+
+    with pytest.raises(KeyError):
+        engine.run([0], max_epochs=1)
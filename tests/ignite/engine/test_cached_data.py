@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+import pytest
+import torch
+from mock import MagicMock
+
+from ignite.engine import Engine, Events, CachedData
+
+Batch = namedtuple('Batch', ['x', 'y'])
+
+
+@pytest.fixture
+def dirname():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+class CountingData(object):
+    def __init__(self, num_batches=4):
+        self.num_batches = num_batches
+        self.num_passes = 0
+
+    def __len__(self):
+        return self.num_batches
+
+    def __iter__(self):
+        self.num_passes += 1
+        for i in range(self.num_batches):
+            yield Batch({'a': torch.full((2, 3), float(i)), 'name': 'b{}'.format(i)}, torch.arange(i + 1))
+
+
+def _assert_batches_equal(batches, expected):
+    assert len(batches) == len(expected)
+    for batch, other in zip(batches, expected):
+        assert isinstance(batch, Batch)
+        assert torch.equal(batch.x['a'], other.x['a'])
+        assert batch.x['name'] == other.x['name']
+        assert torch.equal(batch.y, other.y)
+
+
+@pytest.mark.parametrize('storage', ['memory', 'shared', 'mmap'])
+def test_cached_data_replay(storage, dirname):
+    data = CountingData()
+    cached_data = CachedData(data, storage=storage, dirname=dirname)
+    expected = list(data)
+
+    assert len(cached_data) == 4
+    _assert_batches_equal(list(cached_data), expected)
+    assert data.num_passes == 2
+    assert cached_data.cached
+    assert cached_data.nbytes == 4 * 6 * 4 + 10 * 8
+
+    for _ in range(2):
+        _assert_batches_equal(list(cached_data), expected)
+    assert data.num_passes == 2
+    if storage == 'shared':
+        assert list(cached_data)[0].x['a'].is_shared()
+
+    cached_data.clear()
+    assert not cached_data.cached
+    # the memory-mapped file is anonymous
+    assert os.listdir(dirname) == []
+    _assert_batches_equal(list(cached_data), expected)
+    assert data.num_passes == 3
+
+
+def test_cached_data_interrupted():
+    data = CountingData()
+    cached_data = CachedData(data)
+    for i, _ in enumerate(cached_data):
+        if i == 1:
+            break
+    assert not cached_data.cached
+
+    list(cached_data)
+    assert cached_data.cached
+    assert data.num_passes == 2
+
+
+def test_cached_data_max_bytes():
+    data = CountingData()
+    cached_data = CachedData(data, max_bytes=100)
+    expected = list(data)
+    _assert_batches_equal(list(cached_data), expected)
+    assert cached_data.evicted
+    assert not cached_data.cached
+
+    _assert_batches_equal(list(cached_data), expected)
+    assert data.num_passes == 3
+
+
+def test_cached_data_bad_args():
+    with pytest.raises(ValueError):
+        CachedData([], storage='disk')
+
+    with pytest.raises(ValueError):
+        CachedData([], max_bytes=-1)
+
+
+def test_cached_data_engine():
+    data = CountingData()
+    cached_data = CachedData(data, storage='mmap')
+    process_function = MagicMock(side_effect=lambda engine, batch: batch.x['a'].sum().item())
+    evaluator = Engine(process_function)
+    outputs = []
+    evaluator.add_event_handler(Events.ITERATION_COMPLETED, lambda engine: outputs.append(engine.state.output))
+
+    for _ in range(3):
+        evaluator.run(cached_data)
+
+    assert data.num_passes == 1
+    assert process_function.call_count == 12
+    assert outputs == [0.0, 6.0, 12.0, 18.0] * 3
+
+
+@pytest.mark.parametrize('storage', ['memory', 'shared', 'mmap'])
+def test_cached_data_recording_pass_modified(storage):
+    data = CountingData()
+    expected = list(data)
+    cached_data = CachedData(data, storage=storage)
+
+    for batch in cached_data:
+        assert not batch.x['a'].is_shared()
+        # the process function modifies its batch in place
+        batch.x['a'].fill_(-1.0)
+    assert cached_data.cached
+    _assert_batches_equal(list(cached_data), expected)
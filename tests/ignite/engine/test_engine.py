@@ -130,6 +130,41 @@ def test_adding_multiple_event_handlers():
         handler.assert_called_once_with(engine)
 
 
+def test_has_and_remove_event_handler():
+    engine = DummyEngine()
+    handler = MagicMock()
+    other_handler = MagicMock()
+
+    with raises(ValueError):
+        engine.remove_event_handler(handler, Events.STARTED)
+
+    engine.add_event_handler(Events.STARTED, handler)
+    engine.add_event_handler(Events.STARTED, other_handler)
+    assert engine.has_event_handler(handler)
+    assert engine.has_event_handler(handler, Events.STARTED)
+    assert not engine.has_event_handler(handler, Events.COMPLETED)
+
+    with raises(ValueError):
+        engine.remove_event_handler(MagicMock(), Events.STARTED)
+
+    engine.remove_event_handler(handler, Events.STARTED)
+    assert not engine.has_event_handler(handler)
+    engine.run(1)
+    assert handler.call_count == 0
+    other_handler.assert_called_once_with(engine)
+
+
+def test_remove_exception_handler():
+    engine = Engine(MagicMock(side_effect=ValueError()))
+    handler = MagicMock()
+    engine.add_event_handler(Events.EXCEPTION_RAISED, handler)
+    engine.remove_event_handler(handler, Events.EXCEPTION_RAISED)
+
+    # without any handler left, the exception is raised again
+    with raises(ValueError):
+        engine.run([1])
+
+
 def test_args_and_kwargs_are_passed_to_event():
     engine = DummyEngine()
     kwargs = {'a': 'a', 'b': 'b'}
@@ -1,5 +1,7 @@
+import io
 import os
 import tempfile
+import threading
 
 import pytest
 import torch
@@ -7,7 +9,8 @@ import torch.nn as nn
 import shutil
 
 from ignite.engine import Engine, Events
-from ignite.handlers import ModelCheckpoint
+from ignite.handlers import ModelCheckpoint, load_checkpoint
+from ignite.handlers.checkpoint import _TensorStore
 
 _PREFIX = 'PREFIX'
 
@@ -345,3 +348,335 @@ def test_save_model_optimizer_lr_scheduler_with_state_dict(dirname):
         lr_scheduler_value = lr_scheduler_state_dict[key]
         loaded_lr_scheduler_value = loaded_lr_scheduler_state_dict[key]
         assert lr_scheduler_value == loaded_lr_scheduler_value
+
+
+def test_async_save_last_k(dirname):
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=2, save_interval=2, async_save=True)
+    to_save = {'name': 42}
+
+    for _ in range(8):
+        h(None, to_save)
+    h.flush()
+
+    expected = ['{}_{}_{}.pth'.format(_PREFIX, 'name', i)
+                for i in [6, 8]]
+
+    assert sorted(os.listdir(dirname)) == expected
+
+
+def test_async_save_snapshot(dirname):
+    model = DummyModel()
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, save_interval=1,
+                        save_as_state_dict=True, async_save=True)
+
+    expected = {k: v.clone() for k, v in model.state_dict().items()}
+    h(None, {'model': model})
+    # modifying the model after the call does not change the checkpoint
+    for p in model.parameters():
+        p.data.fill_(123.0)
+    h.flush()
+
+    loaded = torch.load(os.path.join(dirname, '{}_model_1.pth'.format(_PREFIX)))
+    assert set(loaded.keys()) == set(expected.keys())
+    for k, v in expected.items():
+        assert torch.equal(loaded[k], v)
+
+
+def test_async_save_flush_on_completed(dirname):
+    engine = Engine(lambda engine, batch: None)
+    handler = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=2, save_interval=1,
+                              save_as_state_dict=True, async_save=True, max_pending_saves=1)
+    model = DummyModel()
+    engine.add_event_handler(Events.EPOCH_COMPLETED, handler, {'model': model})
+
+    engine.run([0], max_epochs=4)
+
+    # pending saves are flushed by the handler itself at the end of the run
+    assert handler._writer._tasks.unfinished_tasks == 0
+    expected = ['{}_{}_{}.pth'.format(_PREFIX, 'model', i)
+                for i in [3, 4]]
+    assert sorted(os.listdir(dirname)) == expected
+
+
+def test_async_save_error(dirname):
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, save_interval=1, async_save=True)
+    h(None, {'name': (42, lambda _: 42)})
+    with pytest.raises(Exception):
+        h.flush()
+
+    assert os.listdir(dirname) == []
+
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, _PREFIX, save_interval=1, require_empty=False, async_save=True, max_pending_saves=0)
+
+
+class _FailingPickle(object):
+    """Fails to pickle, once `event` is set."""
+    def __init__(self, event):
+        self.event = event
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        self.event.wait()
+        raise RuntimeError("failed write")
+
+
+def test_async_save_after_error(dirname):
+    event = threading.Event()
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=1, save_interval=1, async_save=True,
+                        max_pending_saves=4)
+    h(None, {'name': _FailingPickle(event)})
+    # queued behind the failing save, this save and the removal of the first file are dropped
+    h(None, {'name': 42})
+    event.set()
+    with pytest.raises(RuntimeError):
+        h.flush()
+    assert os.listdir(dirname) == []
+    assert h._saved == []
+
+    for _ in range(2):
+        h(None, {'name': 42})
+    h.flush()
+    assert os.listdir(dirname) == ['{}_{}_{}.pth'.format(_PREFIX, 'name', 4)]
+
+    # the error is also raised by the next call
+    event = threading.Event()
+    event.set()
+    h(None, {'name': _FailingPickle(event)})
+    h._writer._tasks.join()
+    with pytest.raises(RuntimeError):
+        h(None, {'name': 42})
+    assert os.listdir(dirname) == ['{}_{}_{}.pth'.format(_PREFIX, 'name', 4)]
+    h(None, {'name': 42})
+    h.flush()
+    assert os.listdir(dirname) == ['{}_{}_{}.pth'.format(_PREFIX, 'name', 7)]
+
+
+def test_deduplicate(dirname):
+    model = nn.Sequential(nn.Linear(10, 10), nn.Linear(10, 1))
+    optimizer = torch.optim.SGD(model[1].parameters(), lr=0.1)
+    # first layer is frozen
+    for p in model[0].parameters():
+        p.requires_grad = False
+
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=2, save_interval=1,
+                        save_as_state_dict=True, deduplicate=True)
+    blobs_dirname = os.path.join(dirname, '{}_blobs'.format(_PREFIX))
+
+    def _step():
+        optimizer.zero_grad()
+        model(torch.rand(4, 10)).sum().backward()
+        optimizer.step()
+
+    h(None, {'model': model})
+    # 4 tensors: weights and biases of the two layers
+    assert len(os.listdir(blobs_dirname)) == 4
+
+    for i in range(3):
+        _step()
+        h(None, {'model': model})
+
+    # 2 shared frozen tensors + 2 trained tensors for each of the 2 retained checkpoints
+    assert len(os.listdir(blobs_dirname)) == 6
+    expected = ['{}_blobs'.format(_PREFIX)] + ['{}_{}_{}.pth'.format(_PREFIX, 'model', i) for i in [3, 4]]
+    assert sorted(os.listdir(dirname)) == expected
+
+    loaded = load_checkpoint(os.path.join(dirname, '{}_model_4.pth'.format(_PREFIX)))
+    model_state_dict = model.state_dict()
+    assert list(loaded.keys()) == list(model_state_dict.keys())
+    for k, v in model_state_dict.items():
+        assert torch.equal(loaded[k], v)
+
+    new_model = nn.Sequential(nn.Linear(10, 10), nn.Linear(10, 1))
+    new_model.load_state_dict(loaded)
+
+
+def test_deduplicate_async(dirname):
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=1, save_interval=1,
+                        save_as_state_dict=True, deduplicate=True, async_save=True)
+    model = DummyModel()
+    for _ in range(3):
+        h(None, {'model': model})
+    h.flush()
+
+    assert len(os.listdir(os.path.join(dirname, '{}_blobs'.format(_PREFIX)))) == 2
+    loaded = load_checkpoint(os.path.join(dirname, '{}_model_3.pth'.format(_PREFIX)))
+    for k, v in model.state_dict().items():
+        assert torch.equal(loaded[k], v)
+
+
+def test_tensor_store_overwrite_and_failed_dump(dirname):
+    store = _TensorStore(dirname)
+    path = os.path.join(dirname, 'manifest.pth')
+
+    store.dump({'a': torch.zeros(3), 'b': torch.ones(2)}, io.BytesIO(), path)
+    assert len(os.listdir(dirname)) == 2
+
+    # saving again to the same path releases the blobs no longer referenced
+    store.dump({'a': torch.zeros(3), 'b': torch.full((2,), 2.0)}, io.BytesIO(), path)
+    assert len(os.listdir(dirname)) == 2
+    store.release(path)
+    assert os.listdir(dirname) == []
+
+    store.dump({'a': torch.zeros(3)}, io.BytesIO(), path)
+    # the manifest can not be pickled, the new blob is removed
+    with pytest.raises(Exception):
+        store.dump({'a': torch.zeros(3), 'b': torch.ones(4), 'c': lambda x: x}, io.BytesIO(), 'other.pth')
+    assert len(os.listdir(dirname)) == 1
+    store.release(path)
+    assert os.listdir(dirname) == []
+
+
+def test_deduplicate_resume(dirname):
+    model = DummyModel()
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=2, save_interval=1,
+                        save_as_state_dict=True, deduplicate=True, compression='zlib')
+    h(None, {'model': model})
+    blobs = sorted(os.listdir(os.path.join(dirname, '{}_blobs'.format(_PREFIX))))
+
+    # resumed into the populated directory, the blobs of the previous manifests are not removed
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=1, save_interval=1,
+                        save_as_state_dict=True, deduplicate=True, require_empty=False)
+    expected = {k: v.clone() for k, v in model.state_dict().items()}
+    h(None, {'net': model})
+    with torch.no_grad():
+        model.net.weight.add_(1.0)
+    h(None, {'net': model})
+    assert set(blobs) < set(os.listdir(os.path.join(dirname, '{}_blobs'.format(_PREFIX))))
+
+    loaded = load_checkpoint(os.path.join(dirname, '{}_model_1.pth'.format(_PREFIX)))
+    for k, v in expected.items():
+        assert torch.equal(loaded[k], v)
+
+
+def test_deduplicate_requires_state_dict(dirname):
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, _PREFIX, save_interval=1, deduplicate=True)
+
+
+def test_load_checkpoint_plain(dirname):
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, save_interval=1)
+    h(None, {'obj': 42})
+    assert load_checkpoint(os.path.join(dirname, '{}_obj_1.pth'.format(_PREFIX))) == 42
+
+
+def test_bundle(dirname):
+    model = DummyModel()
+    optim = torch.optim.SGD(model.parameters(), lr=0.001)
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=2, save_interval=1,
+                        save_as_state_dict=True, bundle=True)
+
+    for _ in range(3):
+        h(None, {'model': model, 'optimizer': optim})
+
+    expected = ['{}_{}.pth'.format(_PREFIX, i) for i in [2, 3]]
+    assert sorted(os.listdir(dirname)) == expected
+
+    loaded = load_checkpoint(os.path.join(dirname, expected[-1]))
+    assert sorted(loaded.keys()) == ['model', 'optimizer']
+    for k, v in model.state_dict().items():
+        assert torch.equal(loaded['model'][k], v)
+    assert loaded['optimizer']['param_groups'] == optim.state_dict()['param_groups']
+
+
+@pytest.mark.parametrize('codec', ['zlib', 'bz2', 'lzma'])
+def test_compression(dirname, codec, monkeypatch):
+    pytest.importorskip(codec)
+    import ignite.handlers.checkpoint as checkpoint
+    # several chunks compressed by different threads
+    monkeypatch.setattr(checkpoint, '_COMPRESSION_CHUNK_SIZE', 1000)
+
+    model = nn.Linear(100, 10)
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, save_interval=1, save_as_state_dict=True,
+                        compression=codec, compression_threads=3, fsync=True)
+    h(None, {'model': model})
+
+    path = os.path.join(dirname, '{}_model_1.pth'.format(_PREFIX))
+    with open(path, 'rb') as f:
+        assert f.read(len(checkpoint._COMPRESSED_MAGIC)) == checkpoint._COMPRESSED_MAGIC
+
+    loaded = load_checkpoint(path, num_threads=2)
+    for k, v in model.state_dict().items():
+        assert torch.equal(loaded[k], v)
+
+
+def test_bundle_deduplicate_compression(dirname):
+    model = DummyModel()
+    h = ModelCheckpoint(dirname, _PREFIX, create_dir=False, n_saved=1, save_interval=1, save_as_state_dict=True,
+                        deduplicate=True, bundle=True, compression='zlib', async_save=True)
+    for _ in range(2):
+        h(None, {'model': model, 'model_copy': model})
+    h.flush()
+
+    loaded = load_checkpoint(os.path.join(dirname, '{}_2.pth'.format(_PREFIX)))
+    for name in ('model', 'model_copy'):
+        for k, v in model.state_dict().items():
+            assert torch.equal(loaded[name][k], v)
+    assert len(os.listdir(os.path.join(dirname, '{}_blobs'.format(_PREFIX)))) == 2
+
+
+def test_bad_compression(dirname):
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, _PREFIX, save_interval=1, compression='zip')
+
+
+class _FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _run_adaptive(dirname, monkeypatch, num_calls, save_cost, call_interval, **kwargs):
+    import ignite.handlers.checkpoint as checkpoint_module
+
+    clock = _FakeClock()
+    monkeypatch.setattr(checkpoint_module, 'perf_counter', clock)
+    h = ModelCheckpoint(dirname, _PREFIX, n_saved=num_calls, **kwargs)
+    save = h._save
+
+    def _slow_save(obj, path):
+        save(obj, path)
+        clock.now += save_cost
+
+    h._save = _slow_save
+    model = DummyModel()
+    for _ in range(num_calls):
+        h(None, {'model': model})
+        clock.now += call_interval
+    return sorted(int(fname.split('_')[-1][:-4]) for fname in os.listdir(dirname))
+
+
+def test_adaptive_max_overhead(dirname, monkeypatch):
+    # a save costs 1s: at most 10% of wall time is spent saving with at least 9s between saves
+    steps = _run_adaptive(dirname, monkeypatch, 25, save_cost=1.0, call_interval=1.0, max_overhead=0.1)
+    assert steps == [1, 10, 19]
+
+
+def test_adaptive_max_time_at_risk(dirname, monkeypatch):
+    # no more than 5s of work are lost, including the cost of the save and the next call
+    steps = _run_adaptive(dirname, monkeypatch, 12, save_cost=1.0, call_interval=1.0, max_time_at_risk=5.0)
+    assert steps == [1, 5, 9]
+
+
+def test_adaptive_both(dirname, monkeypatch):
+    steps = _run_adaptive(dirname, monkeypatch, 12, save_cost=1.0, call_interval=1.0,
+                          max_overhead=0.1, max_time_at_risk=5.0)
+    assert steps == [1, 5, 9]
+
+
+def test_adaptive_bad_args(dirname):
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, _PREFIX, max_overhead=1.5)
+
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, _PREFIX, max_time_at_risk=0)
+
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, _PREFIX, save_interval=1, max_overhead=0.1)
+
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, _PREFIX, score_function=lambda engine: 0, max_time_at_risk=60)
@@ -0,0 +1,157 @@
+import gc
+import os
+import signal
+import tempfile
+import shutil
+import weakref
+
+import pytest
+import torch
+import torch.nn as nn
+
+from ignite.engine import Engine, Events
+from ignite.handlers import EmergencyCheckpoint
+
+_PREFIX = 'PREFIX'
+
+
+@pytest.fixture
+def dirname():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def _model_and_optimizer():
+    model = nn.Linear(3, 2)
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    return model, optimizer
+
+
+def test_args_validation(dirname):
+    model, _ = _model_and_optimizer()
+
+    with pytest.raises(RuntimeError):
+        EmergencyCheckpoint(dirname, _PREFIX, {})
+
+    with pytest.raises(ValueError):
+        EmergencyCheckpoint(dirname, _PREFIX, {'model': 42})
+
+    with pytest.raises(ValueError):
+        EmergencyCheckpoint(dirname, _PREFIX, {'model': model}, deadline=0)
+
+
+def test_sigterm(dirname):
+    model, optimizer = _model_and_optimizer()
+    handler = EmergencyCheckpoint(dirname, _PREFIX, {'model': model, 'optimizer': optimizer})
+
+    def update(engine, batch):
+        if engine.state.iteration == 7:
+            os.kill(os.getpid(), signal.SIGTERM)
+        return batch
+
+    engine = Engine(update)
+    handler.attach(engine)
+    previous_handler = signal.getsignal(signal.SIGTERM)
+    state = engine.run(list(range(5)), max_epochs=4)
+
+    # the run stops at the end of the iteration during which the signal is received
+    assert state.iteration == 7
+    assert handler.interrupted
+    assert signal.getsignal(signal.SIGTERM) == previous_handler
+    assert handler.last_checkpoint == os.path.join(dirname, '{}_emergency_7.pth'.format(_PREFIX))
+    assert os.listdir(dirname) == ['{}_emergency_7.pth'.format(_PREFIX)]
+
+    checkpoint = torch.load(handler.last_checkpoint)
+    assert checkpoint['engine'] == {'epoch': 2, 'iteration': 7, 'max_epochs': 4}
+    for k, v in model.state_dict().items():
+        assert torch.equal(checkpoint['model'][k], v)
+    assert checkpoint['optimizer'] == optimizer.state_dict()
+
+
+def test_sigterm_with_terminate(dirname):
+    model, _ = _model_and_optimizer()
+    handler = EmergencyCheckpoint(dirname, _PREFIX, {'model': model})
+
+    def update(engine, batch):
+        if engine.state.iteration == 3:
+            os.kill(os.getpid(), signal.SIGTERM)
+        return batch
+
+    engine = Engine(update)
+    # another handler asks the engine to terminate in the same iteration
+    engine.add_event_handler(Events.ITERATION_COMPLETED,
+                             lambda engine: engine.terminate() if engine.state.iteration == 3 else None)
+    handler.attach(engine)
+    state = engine.run(list(range(5)), max_epochs=2)
+
+    assert state.iteration == 3
+    assert os.listdir(dirname) == ['{}_emergency_3.pth'.format(_PREFIX)]
+
+
+def test_no_signal(dirname):
+    model, _ = _model_and_optimizer()
+    handler = EmergencyCheckpoint(dirname, _PREFIX, {'model': model})
+    engine = Engine(lambda engine, batch: batch)
+    handler.attach(engine)
+    state = engine.run(list(range(5)), max_epochs=2)
+
+    assert state.iteration == 10
+    assert not handler.interrupted
+    assert handler.last_checkpoint is None
+    assert os.listdir(dirname) == []
+
+
+def test_exception(dirname):
+    model, _ = _model_and_optimizer()
+    handler = EmergencyCheckpoint(dirname, _PREFIX, {'model': model})
+
+    def update(engine, batch):
+        if engine.state.iteration == 3:
+            raise ValueError("bad batch")
+        return batch
+
+    engine = Engine(update)
+    handler.attach(engine)
+    with pytest.raises(ValueError):
+        engine.run(list(range(5)), max_epochs=2)
+
+    assert not handler.interrupted
+    assert os.listdir(dirname) == ['{}_emergency_3.pth'.format(_PREFIX)]
+    assert torch.load(handler.last_checkpoint)['engine']['iteration'] == 3
+
+
+def test_exception_not_kept_alive(dirname):
+    model, _ = _model_and_optimizer()
+    handler = EmergencyCheckpoint(dirname, _PREFIX, {'model': model})
+    refs = []
+
+    def update(engine, batch):
+        # a local of the frame raising the exception, kept alive by its traceback
+        marker = torch.zeros(1)
+        refs.append(weakref.ref(marker))
+        raise ValueError("bad batch")
+
+    engine = Engine(update)
+    handler.attach(engine)
+    try:
+        engine.run([0], max_epochs=1)
+    except ValueError:
+        pass
+    gc.collect()
+    assert refs[0]() is None
+
+
+def test_no_save_on_exception(dirname):
+    model, _ = _model_and_optimizer()
+    handler = EmergencyCheckpoint(dirname, _PREFIX, {'model': model}, save_on_exception=False)
+
+    def update(engine, batch):
+        raise ValueError("bad batch")
+
+    engine = Engine(update)
+    handler.attach(engine)
+    with pytest.raises(ValueError):
+        engine.run([0], max_epochs=1)
+    assert os.listdir(dirname) == []
+    assert signal.getsignal(signal.SIGTERM) != handler._on_signal
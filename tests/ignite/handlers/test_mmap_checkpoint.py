@@ -0,0 +1,128 @@
+import os
+import tempfile
+import shutil
+
+import pytest
+import torch
+import torch.nn as nn
+
+from ignite.handlers import ModelCheckpoint, load_checkpoint, save_mmap_checkpoint, load_mmap_checkpoint, \
+    load_mmap_state_dict
+
+
+@pytest.fixture
+def dirname():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def _model():
+    torch.manual_seed(12)
+    return nn.Sequential(nn.Linear(7, 13), nn.BatchNorm1d(13), nn.Linear(13, 3))
+
+
+def test_save_load(dirname):
+    obj = {
+        'float': torch.rand(3, 5),
+        'half': torch.rand(7).half(),
+        'long': torch.arange(11),
+        'bool': torch.tensor([True, False, True]),
+        'empty': torch.empty(0, 4),
+        'scalar': torch.tensor(3.5),
+        'nested': [torch.ones(2), (torch.zeros(1), 'abc')],
+        'number': 42,
+    }
+    path = os.path.join(dirname, 'ckpt.pth')
+    save_mmap_checkpoint(obj, path, alignment=128)
+    loaded = load_mmap_checkpoint(path)
+
+    for k in ('float', 'half', 'long', 'bool', 'empty', 'scalar'):
+        assert loaded[k].dtype == obj[k].dtype
+        assert torch.equal(loaded[k], obj[k])
+        if loaded[k].numel() > 0:
+            assert loaded[k].data_ptr() % 128 == 0
+    assert torch.equal(loaded['nested'][0], obj['nested'][0])
+    assert isinstance(loaded['nested'][1], tuple)
+    assert loaded['nested'][1][1] == 'abc'
+    assert loaded['number'] == 42
+
+    # tensors are copy-on-write views of the file
+    loaded['float'].fill_(0.0)
+    assert torch.equal(load_mmap_checkpoint(path)['float'], obj['float'])
+
+
+def test_load_state_dict(dirname):
+    model = _model()
+    path = os.path.join(dirname, 'model.pth')
+    save_mmap_checkpoint(model.state_dict(), path)
+
+    for assign in (False, True):
+        new_model = nn.Sequential(nn.Linear(7, 13), nn.BatchNorm1d(13), nn.Linear(13, 3))
+        load_mmap_state_dict(new_model, path, assign=assign)
+        for k, v in model.state_dict().items():
+            assert torch.equal(new_model.state_dict()[k], v)
+
+    optimizer = torch.optim.Adam(model.parameters())
+    model(torch.rand(4, 7)).sum().backward()
+    optimizer.step()
+    path = os.path.join(dirname, 'optimizer.pth')
+    save_mmap_checkpoint(optimizer.state_dict(), path)
+    new_optimizer = torch.optim.Adam(model.parameters())
+    load_mmap_state_dict(new_optimizer, path)
+    assert torch.equal(new_optimizer.state_dict()['state'][0]['exp_avg'], optimizer.state_dict()['state'][0]['exp_avg'])
+
+
+def test_not_mmap_file(dirname):
+    path = os.path.join(dirname, 'plain.pth')
+    torch.save({'a': torch.ones(1)}, path)
+    with pytest.raises(ValueError):
+        load_mmap_checkpoint(path)
+
+
+def test_model_checkpoint_save_format(dirname):
+    model = _model()
+    h = ModelCheckpoint(dirname, 'prefix', save_interval=1, save_as_state_dict=True, save_format='mmap')
+    h(None, {'model': model})
+
+    path = os.path.join(dirname, 'prefix_model_1.pth')
+    for loaded in (load_mmap_checkpoint(path), load_checkpoint(path)):
+        for k, v in model.state_dict().items():
+            assert torch.equal(loaded[k], v)
+
+    h = ModelCheckpoint(dirname, 'compressed', save_interval=1, save_as_state_dict=True, save_format='mmap',
+                        compression='zlib')
+    h(None, {'model': model})
+    loaded = load_checkpoint(os.path.join(dirname, 'compressed_model_1.pth'))
+    for k, v in model.state_dict().items():
+        assert torch.equal(loaded[k], v)
+
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, 'bad', save_interval=1, save_format='pickle')
+
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, 'bad', save_interval=1, save_as_state_dict=True, save_format='mmap',
+                        deduplicate=True)
+
+    with pytest.raises(ValueError):
+        ModelCheckpoint(dirname, 'bad', save_interval=1, save_format='mmap')
+
+
+def test_load_checkpoint_mmap_map_location(dirname):
+    model = _model()
+    path = os.path.join(dirname, 'model.pth')
+    save_mmap_checkpoint(model.state_dict(), path)
+
+    for map_location in ['cpu', torch.device('cpu'), {'cpu': 'cpu'}]:
+        loaded = load_checkpoint(path, map_location=map_location)
+        for k, v in model.state_dict().items():
+            assert torch.equal(loaded[k], v)
+
+    # meta tensors have no data but keep the device
+    loaded = load_checkpoint(path, map_location='meta')
+    assert all(v.device.type == 'meta' for v in loaded.values())
+    loaded = load_checkpoint(path, map_location={'cpu': 'meta'})
+    assert all(v.device.type == 'meta' for v in loaded.values())
+
+    with pytest.raises(ValueError):
+        load_checkpoint(path, map_location=lambda storage, location: storage)
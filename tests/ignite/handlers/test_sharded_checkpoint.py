@@ -0,0 +1,181 @@
+import os
+import tempfile
+import shutil
+
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+from mock import MagicMock
+
+from ignite.handlers import ShardedCheckpoint, load_sharded_checkpoint
+from ignite.handlers.sharded_checkpoint import _partition
+
+_PREFIX = 'PREFIX'
+
+
+@pytest.fixture
+def dirname():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def _model_and_optimizer():
+    torch.manual_seed(12)
+    model = nn.Sequential(nn.Linear(7, 13), nn.BatchNorm1d(13), nn.Linear(13, 3))
+    optimizer = torch.optim.Adam(model.parameters())
+    model(torch.rand(4, 7)).sum().backward()
+    optimizer.step()
+    return model, optimizer
+
+
+def _assert_state_equal(a, b):
+    if isinstance(a, torch.Tensor):
+        assert torch.equal(a, b)
+    elif isinstance(a, dict):
+        assert set(a.keys()) == set(b.keys())
+        for k in a:
+            _assert_state_equal(a[k], b[k])
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            _assert_state_equal(x, y)
+    else:
+        assert a == b
+
+
+def test_partition():
+    sizes = [100, 10, 60, 40, 5, 5]
+    ranks = _partition(sizes, 2)
+    loads = [sum(s for s, r in zip(sizes, ranks) if r == rank) for rank in range(2)]
+    assert loads == [110, 110]
+    assert _partition(sizes, 1) == [0] * len(sizes)
+    assert sorted(set(_partition(sizes, 3))) == [0, 1, 2]
+
+
+def test_args_validation(dirname):
+    with pytest.raises(ValueError):
+        ShardedCheckpoint(dirname, _PREFIX, rank=2, world_size=2)
+
+    with pytest.raises(ValueError):
+        ShardedCheckpoint(dirname, _PREFIX, save_interval=0)
+
+    with pytest.raises(ValueError):
+        ShardedCheckpoint(os.path.join(dirname, 'missing'), _PREFIX, create_dir=False)
+
+    open(os.path.join(dirname, '{}_1_manifest.pth'.format(_PREFIX)), 'w').close()
+    with pytest.raises(ValueError):
+        ShardedCheckpoint(dirname, _PREFIX)
+
+
+def test_single_process(dirname):
+    model, optimizer = _model_and_optimizer()
+    h = ShardedCheckpoint(dirname, _PREFIX, save_interval=2, n_saved=1)
+    engine = MagicMock()
+
+    with pytest.raises(RuntimeError):
+        h(engine, {})
+
+    for _ in range(4):
+        h(engine, {'model': model, 'optimizer': optimizer})
+
+    assert sorted(os.listdir(dirname)) == ['{}_4_manifest.pth'.format(_PREFIX),
+                                           '{}_4_shard0of1.pth'.format(_PREFIX)]
+
+    state = load_sharded_checkpoint(os.path.join(dirname, '{}_4_manifest.pth'.format(_PREFIX)))
+    _assert_state_equal(state['model'], model.state_dict())
+    _assert_state_equal(state['optimizer'], optimizer.state_dict())
+
+    new_model, new_optimizer = _model_and_optimizer()
+    new_model.load_state_dict(state['model'])
+    new_optimizer.load_state_dict(state['optimizer'])
+
+
+def test_simulated_ranks(dirname):
+    model, optimizer = _model_and_optimizer()
+    world_size = 3
+    # without a process group, ranks are simulated sequentially, rank 0 writing the manifest last
+    handlers = [ShardedCheckpoint(dirname, _PREFIX, n_saved=2, require_empty=False, rank=r, world_size=world_size)
+                for r in range(world_size)]
+    for _ in range(3):
+        for h in reversed(handlers):
+            h(None, {'model': model, 'optimizer': optimizer})
+
+    fnames = sorted(os.listdir(dirname))
+    expected = ['{}_{}_manifest.pth'.format(_PREFIX, i) for i in (2, 3)]
+    expected += ['{}_{}_shard{}of3.pth'.format(_PREFIX, i, r) for i in (2, 3) for r in range(3)]
+    assert fnames == sorted(expected)
+
+    # each shard only contains a part of the tensors
+    num_tensors = len(model.state_dict()) + sum(len(s) for s in optimizer.state_dict()['state'].values())
+    shard_sizes = [len(torch.load(os.path.join(dirname, '{}_3_shard{}of3.pth'.format(_PREFIX, r))))
+                   for r in range(world_size)]
+    assert all(0 < s < num_tensors for s in shard_sizes)
+    assert sum(shard_sizes) == num_tensors
+
+    state = load_sharded_checkpoint(os.path.join(dirname, '{}_3_manifest.pth'.format(_PREFIX)))
+    _assert_state_equal(state['model'], model.state_dict())
+    _assert_state_equal(state['optimizer'], optimizer.state_dict())
+
+
+def _run_rank(rank, world_size, init_file, dirname):
+    dist.init_process_group('gloo', init_method='file://' + init_file, rank=rank, world_size=world_size)
+    try:
+        model, optimizer = _model_and_optimizer()
+        h = ShardedCheckpoint(dirname, _PREFIX)
+        h(None, {'model': model, 'optimizer': optimizer})
+    finally:
+        dist.destroy_process_group()
+
+
+@pytest.mark.skipif(not dist.is_available(), reason="torch.distributed is not available")
+def test_resume_with_other_world_size(dirname):
+    model, optimizer = _model_and_optimizer()
+    handlers = [ShardedCheckpoint(dirname, _PREFIX, n_saved=2, require_empty=False, rank=r, world_size=3)
+                for r in range(3)]
+    for _ in range(2):
+        for h in reversed(handlers):
+            h(None, {'model': model, 'optimizer': optimizer})
+
+    # resumed with 2 processes, the checkpoints with 3 processes are overwritten
+    handlers = [ShardedCheckpoint(dirname, _PREFIX, n_saved=1, require_empty=False, rank=r, world_size=2)
+                for r in range(2)]
+    for h in reversed(handlers):
+        h(None, {'model': model, 'optimizer': optimizer})
+
+    fnames = sorted(os.listdir(dirname))
+    expected = ['{}_{}_manifest.pth'.format(_PREFIX, i) for i in (1, 2)]
+    expected += ['{}_1_shard{}of2.pth'.format(_PREFIX, r) for r in range(2)]
+    expected += ['{}_2_shard{}of3.pth'.format(_PREFIX, r) for r in range(3)]
+    assert fnames == sorted(expected)
+
+    for h in reversed(handlers):
+        h(None, {'model': model, 'optimizer': optimizer})
+    fnames = sorted(os.listdir(dirname))
+    expected = ['{}_2_manifest.pth'.format(_PREFIX)] + ['{}_2_shard{}of2.pth'.format(_PREFIX, r) for r in range(2)]
+    assert fnames == sorted(expected)
+    state = load_sharded_checkpoint(os.path.join(dirname, '{}_2_manifest.pth'.format(_PREFIX)))
+    for k, v in model.state_dict().items():
+        assert torch.equal(state['model'][k], v)
+
+
+def test_distributed(dirname):
+    world_size = 2
+    init_file = os.path.join(dirname, 'init')
+    ckpt_dirname = os.path.join(dirname, 'ckpt')
+    mp.spawn(_run_rank, args=(world_size, init_file, ckpt_dirname), nprocs=world_size)
+
+    assert sorted(os.listdir(ckpt_dirname)) == ['{}_1_manifest.pth'.format(_PREFIX),
+                                                '{}_1_shard0of2.pth'.format(_PREFIX),
+                                                '{}_1_shard1of2.pth'.format(_PREFIX)]
+
+    # re-sharded by a single process
+    model, optimizer = _model_and_optimizer()
+    state = load_sharded_checkpoint(os.path.join(ckpt_dirname, '{}_1_manifest.pth'.format(_PREFIX)))
+    _assert_state_equal(state['model'], model.state_dict())
+    h = ShardedCheckpoint(ckpt_dirname, _PREFIX, require_empty=False)
+    model.load_state_dict(state['model'])
+    h(None, {'model': model})
+    assert os.path.exists(os.path.join(ckpt_dirname, '{}_1_shard0of1.pth'.format(_PREFIX)))
@@ -1,5 +1,7 @@
+import copy
 
 import numpy as np
+import pytest
 import torch
 
 from ignite.engine import Engine, Events, State
@@ -122,3 +124,177 @@ def test_without_terminate_on_nan_inf():
 
     trainer.run(data, max_epochs=2)
     assert trainer.state.iteration == len(data) * 2
+
+
+def test_without_terminate_on_large_finite_values():
+    # the norms of these tensors overflow, but their values are finite
+    data = [torch.tensor([1e20, 1e20]), [torch.full((10,), 3e38), torch.tensor([6e4, 6e4]).half()]]
+
+    def update_fn(engine, batch):
+        return batch
+
+    for check_every in [1, 2]:
+        trainer = Engine(update_fn)
+        h = TerminateOnNan(check_every=check_every)
+        trainer.add_event_handler(Events.ITERATION_COMPLETED, h)
+
+        trainer.run(data, max_epochs=2)
+        assert trainer.state.iteration == len(data) * 2
+
+
+def test_bad_args():
+    with pytest.raises(ValueError):
+        TerminateOnNan(check_every=0)
+
+    with pytest.raises(ValueError):
+        TerminateOnNan(rollback={'a': 1})
+
+
+def test_deferred_check():
+
+    data = [1.0, torch.rand(4), torch.tensor(float('nan')), torch.rand(4), 1.0, 2.0, 3.0, 4.0]
+
+    def update_fn(engine, batch):
+        return batch
+
+    trainer = Engine(update_fn)
+    h = TerminateOnNan(check_every=4)
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, h)
+
+    trainer.run(data, max_epochs=2)
+    # NaN at iteration 3 is only seen at the check of iteration 4
+    assert trainer.state.iteration == 4
+
+
+def test_deferred_check_at_epoch_end():
+
+    data = [1.0, 2.0, float('inf')]
+
+    def update_fn(engine, batch):
+        return batch
+
+    trainer = Engine(update_fn)
+    h = TerminateOnNan(check_every=100)
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, h)
+
+    trainer.run(data, max_epochs=3)
+    assert trainer.state.iteration == 3
+    assert trainer.state.epoch == 1
+
+
+def test_check_parameters():
+
+    model = torch.nn.Linear(3, 1)
+
+    def update_fn(engine, batch):
+        model.zero_grad()
+        model(torch.tensor([[1.0, 2.0, batch]])).sum().backward()
+        return 0.0
+
+    trainer = Engine(update_fn)
+    h = TerminateOnNan(parameters=model.parameters())
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, h)
+
+    # output is finite, but not the gradient of the weights
+    trainer.run([1.0, 2.0, float('inf'), 3.0], max_epochs=1)
+    assert trainer.state.iteration == 3
+
+
+def test_rollback():
+
+    torch.manual_seed(12)
+    model = torch.nn.Linear(3, 1)
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    states = []
+
+    def update_fn(engine, batch):
+        optimizer.zero_grad()
+        loss = model(torch.tensor([[1.0, 2.0, batch]])).sum()
+        loss.backward()
+        optimizer.step()
+        states.append(copy.deepcopy(model.state_dict()))
+        return loss
+
+    trainer = Engine(update_fn)
+    h = TerminateOnNan(check_every=2, parameters=model.parameters(),
+                       rollback={'model': model, 'optimizer': optimizer})
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, h)
+    restored = {}
+
+    @trainer.on(Events.ITERATION_COMPLETED)
+    def save_restored(engine):
+        if engine.state.iteration == 4:
+            restored.update(copy.deepcopy(model.state_dict()))
+
+    trainer.run([1.0, 2.0, float('nan'), 3.0, 4.0, 5.0], max_epochs=1)
+    # the NaN batch is detected at iteration 4 and the model is restored to its state after iteration 2
+    assert not trainer.should_terminate
+    assert trainer.state.iteration == 6
+    for k, v in model.state_dict().items():
+        assert torch.equal(restored[k], states[1][k])
+        assert torch.isfinite(v).all()
+
+
+def test_rollback_max_rollbacks():
+
+    model = torch.nn.Linear(3, 1)
+
+    def update_fn(engine, batch):
+        return batch
+
+    trainer = Engine(update_fn)
+    h = TerminateOnNan(rollback={'model': model}, max_rollbacks=2)
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, h)
+
+    trainer.run([1.0] + [float('nan')] * 5, max_epochs=1)
+    # two rollbacks, then termination
+    assert trainer.state.iteration == 4
+
+
+def test_terminate_on_nan_structseq_output():
+    data = [torch.rand(3, 2), torch.tensor([[1.0, float('nan')]])]
+
+    def update_fn(engine, batch):
+        return torch.max(batch, 0)
+
+    trainer = Engine(update_fn)
+    trainer.add_event_handler(Events.ITERATION_COMPLETED, TerminateOnNan())
+    trainer.run(data, max_epochs=2)
+    assert trainer.should_terminate
+    assert trainer.state.iteration == 2
+
+
+def test_terminate_on_nan_complex_output():
+    trainer = Engine(lambda engine, batch: None)
+    trainer.state = State()
+    h = TerminateOnNan()
+
+    trainer.state.output = [1.0 + 2.0j, torch.tensor([1.0 + 1.0j])]
+    h(trainer)
+    assert not trainer.should_terminate
+
+    trainer.state.output = complex(1.0, float('nan'))
+    h(trainer)
+    assert trainer.should_terminate
+
+
+@pytest.mark.parametrize("foreach_norm", [None, "fails"])
+def test_terminate_on_nan_without_foreach_norm(foreach_norm, monkeypatch):
+    if foreach_norm is None:
+        monkeypatch.delattr(torch, "_foreach_norm", raising=False)
+    else:
+        def _foreach_norm(tensors, ord):
+            raise RuntimeError("unsupported")
+        monkeypatch.setattr(torch, "_foreach_norm", _foreach_norm, raising=False)
+
+    trainer = Engine(lambda engine, batch: None)
+    trainer.state = State()
+    h = TerminateOnNan()
+
+    trainer.state.output = [torch.tensor([1e20, 1e20]), torch.tensor([6e4]).half()]
+    h(trainer)
+    assert not trainer.should_terminate
+
+    trainer.state.output = [torch.ones(3), torch.tensor([float('inf')])]
+    h(trainer)
+    assert trainer.should_terminate
@@ -0,0 +1,70 @@
+from __future__ import division
+
+from ignite.exceptions import NotComputableError
+from ignite.metrics import BinaryThresholdMetrics
+import numpy as np
+import pytest
+import torch
+
+
+def test_zero_div():
+    metric = BinaryThresholdMetrics()
+    with pytest.raises(NotComputableError):
+        metric.compute()
+
+
+def test_bad_thresholds():
+    with pytest.raises(ValueError):
+        BinaryThresholdMetrics(thresholds=[])
+
+
+def _reference(y_pred, y, threshold):
+    pred = y_pred >= threshold
+    tp = np.sum(pred & (y == 1))
+    fp = np.sum(pred & (y == 0))
+    fn = np.sum(~pred & (y == 1))
+    tn = np.sum(~pred & (y == 0))
+    precision = tp / (tp + fp) if tp + fp > 0 else 0.0
+    recall = tp / (tp + fn) if tp + fn > 0 else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+    return (tp + tn) / len(y), precision, recall, f1
+
+
+def test_compute():
+    metric = BinaryThresholdMetrics(thresholds=[0.75, 0.25, 0.5])
+
+    y_pred = torch.FloatTensor([0.2, 0.4, 0.6, 0.8])
+    y = torch.LongTensor([0, 1, 0, 1])
+    metric.update((y_pred, y))
+    result = metric.compute()
+
+    assert result['thresholds'].tolist() == [0.25, 0.5, 0.75]
+    assert result['accuracy'].tolist() == pytest.approx([0.75, 0.5, 0.75])
+    assert result['precision'].tolist() == pytest.approx([2 / 3, 0.5, 1.0])
+    assert result['recall'].tolist() == pytest.approx([1.0, 0.5, 0.5])
+    assert result['f1'].tolist() == pytest.approx([0.8, 0.5, 2 / 3])
+
+
+def test_compute_batches_match_reference():
+    torch.manual_seed(12)
+    thresholds = torch.linspace(0, 1, 21)
+    metric = BinaryThresholdMetrics(thresholds=thresholds)
+
+    y_preds = torch.rand(5, 8, 3)
+    ys = torch.randint(0, 2, size=(5, 8, 3)).type(torch.LongTensor)
+    for y_pred, y in zip(y_preds, ys):
+        metric.update((y_pred, y))
+    result = metric.compute()
+
+    y_pred_np = y_preds.numpy().ravel()
+    y_np = ys.numpy().ravel()
+    for i, threshold in enumerate(result['thresholds'].tolist()):
+        accuracy, precision, recall, f1 = _reference(y_pred_np, y_np, threshold)
+        assert result['accuracy'][i].item() == pytest.approx(accuracy)
+        assert result['precision'][i].item() == pytest.approx(precision)
+        assert result['recall'][i].item() == pytest.approx(recall)
+        assert result['f1'][i].item() == pytest.approx(f1)
+
+    metric.reset()
+    with pytest.raises(NotComputableError):
+        metric.compute()
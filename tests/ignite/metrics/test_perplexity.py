@@ -0,0 +1,108 @@
+from __future__ import division
+
+import math
+
+from ignite.exceptions import NotComputableError
+from ignite.metrics import Perplexity, TokenAccuracy
+import pytest
+import torch
+import torch.nn.functional as F
+
+
+def test_zero_div():
+    with pytest.raises(NotComputableError):
+        Perplexity().compute()
+
+    with pytest.raises(NotComputableError):
+        TokenAccuracy().compute()
+
+    metric = Perplexity()
+    metric.update((torch.randn(2, 3, 5), torch.full((2, 3), -100, dtype=torch.long)))
+    with pytest.raises(NotComputableError):
+        metric.compute()
+
+
+def test_bad_shapes():
+    with pytest.raises(ValueError):
+        Perplexity().update((torch.randn(2, 5, 3), torch.zeros(3, 2, dtype=torch.long)))
+
+
+def test_perplexity_ignore_index():
+    torch.manual_seed(12)
+    logits = torch.randn(6, 4, 10)
+    y = torch.randint(0, 10, size=(6, 4))
+    y[4:, 1] = -100
+    y[5:, 3] = -100
+
+    metric = Perplexity()
+    # two chunks of different valid lengths along the time dimension
+    metric.update((logits[:3], y[:3]))
+    metric.update((logits[3:], y[3:]))
+
+    valid = y != -100
+    expected = F.cross_entropy(logits[valid], y[valid])
+    assert metric.compute() == pytest.approx(math.exp(expected.item()))
+
+
+def test_perplexity_mask_and_log_probs():
+    torch.manual_seed(12)
+    logits = torch.randn(5, 3, 7)
+    y = torch.randint(0, 7, size=(5, 3))
+    mask = torch.rand(5, 3) > 0.3
+
+    from_logits = Perplexity()
+    from_logits.update((logits, y, mask))
+    from_log_probs = Perplexity(log_probs=True)
+    from_log_probs.update((F.log_softmax(logits, dim=-1), y, mask))
+
+    expected = math.exp(F.cross_entropy(logits[mask], y[mask]).item())
+    assert from_logits.compute() == pytest.approx(expected)
+    assert from_log_probs.compute() == pytest.approx(expected)
+
+
+def test_token_accuracy():
+    y_pred = torch.tensor([[[0.1, 0.9], [0.8, 0.2]],
+                           [[0.3, 0.7], [0.6, 0.4]]])
+    y = torch.tensor([[1, 1], [0, -100]])
+
+    metric = TokenAccuracy()
+    metric.update((y_pred, y))
+    assert metric.compute() == pytest.approx(1 / 3)
+
+    metric.reset()
+    mask = torch.tensor([[True, False], [True, True]])
+    metric.update((y_pred, torch.tensor([[1, 1], [1, 0]]), mask))
+    assert metric.compute() == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("dtype", [torch.float16, torch.bfloat16])
+def test_perplexity_low_precision(dtype, monkeypatch):
+    # upcast by chunks of 3 rows
+    monkeypatch.setattr('ignite.metrics.perplexity._UPCAST_CHUNK_NUMEL', 3 * 11)
+    torch.manual_seed(12)
+    y_pred = torch.randn(2, 5, 11).to(dtype)
+    y = torch.randint(0, 11, (2, 5))
+    y[1, 3:] = -100
+
+    perplexity = Perplexity()
+    perplexity.update((y_pred, y))
+    nll = F.cross_entropy(y_pred.float().reshape(-1, 11), y.reshape(-1), ignore_index=-100)
+    assert perplexity.compute() == pytest.approx(math.exp(nll.item()), rel=1e-5)
+
+    # double precision logits are not downcast
+    perplexity.reset()
+    perplexity.update((y_pred.double(), y))
+    assert perplexity.compute() == pytest.approx(math.exp(nll.item()), rel=1e-5)
+
+
+@pytest.mark.parametrize("metric_cls", [Perplexity, TokenAccuracy])
+def test_token_metrics_detach_outputs(metric_cls):
+    y_pred = torch.randn(2, 5, 11, requires_grad=True)
+    y = torch.randint(0, 11, (2, 5))
+
+    metric = metric_cls()
+    for _ in range(2):
+        metric.update((y_pred * 2, y))
+    assert metric._sum.grad_fn is None
+    assert not metric._sum.requires_grad
+    metric.compute()
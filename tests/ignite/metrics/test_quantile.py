@@ -0,0 +1,88 @@
+from __future__ import division
+
+from ignite.exceptions import NotComputableError
+from ignite.metrics import Quantile
+import numpy as np
+import pytest
+import torch
+
+
+def test_zero_div():
+    metric = Quantile()
+    with pytest.raises(NotComputableError):
+        metric.compute()
+
+
+def test_bad_args():
+    with pytest.raises(ValueError):
+        Quantile(quantiles=1.5)
+
+    with pytest.raises(ValueError):
+        Quantile(quantiles=[])
+
+    with pytest.raises(ValueError):
+        Quantile(capacity=1)
+
+
+def test_exact_below_capacity():
+    metric = Quantile(quantiles=[0.0, 0.5, 1.0], capacity=100)
+    metric.update(torch.arange(1, 11).float())
+    assert metric.compute() == {0.0: 1.0, 0.5: 5.0, 1.0: 10.0}
+
+    metric = Quantile(quantiles=0.9)
+    metric.update(torch.arange(1, 11).float())
+    assert metric.compute() == 9.0
+
+
+def test_compute_matches_numpy():
+    torch.manual_seed(12)
+    quantiles = [0.01, 0.1, 0.5, 0.9, 0.99]
+    metric = Quantile(quantiles=quantiles, capacity=128)
+
+    values = torch.randn(100, 500).exp()
+    for batch in values:
+        metric.update(batch)
+    result = metric.compute()
+
+    sorted_values = np.sort(values.numpy().ravel())
+    for q in quantiles:
+        # rank of the estimate among the true values should be close to the requested rank
+        rank = np.searchsorted(sorted_values, result[q]) / len(sorted_values)
+        assert rank == pytest.approx(q, abs=0.02)
+
+    num_stored = sum(level.numel() for level in metric._sketch.levels)
+    assert num_stored < 0.05 * values.numel()
+
+
+def test_merge():
+    torch.manual_seed(12)
+    values = torch.rand(20000)
+
+    m1 = Quantile(quantiles=[0.25, 0.75])
+    m2 = Quantile(quantiles=[0.25, 0.75])
+    m1.update(values[:12000])
+    m2.update(values[12000:])
+    m1.merge(m2)
+
+    result = m1.compute()
+    assert result[0.25] == pytest.approx(0.25, abs=0.02)
+    assert result[0.75] == pytest.approx(0.75, abs=0.02)
+
+    with pytest.raises(TypeError):
+        m1.merge(values)
+
+
+def test_histogram():
+    metric = Quantile()
+    metric.update(torch.tensor([0.0, 0.5, 1.0, 1.5, 2.0, 2.0]))
+    counts, edges = metric.histogram(bins=2)
+    assert edges.tolist() == [0.0, 1.0, 2.0]
+    assert counts.tolist() == [2.0, 4.0]
+
+    torch.manual_seed(12)
+    metric.reset()
+    values = torch.rand(50000)
+    metric.update(values)
+    counts, edges = metric.histogram(bins=4, range=(0.0, 1.0))
+    assert counts.sum().item() == pytest.approx(50000)
+    assert counts.tolist() == pytest.approx([12500] * 4, rel=0.05)
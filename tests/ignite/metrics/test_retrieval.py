@@ -0,0 +1,119 @@
+from __future__ import division
+
+from ignite.exceptions import NotComputableError
+from ignite.metrics import RecallAtK, RetrievalMAP
+from ignite.metrics.retrieval import _blockwise_topk
+import numpy as np
+import pytest
+import torch
+
+
+def _brute_force(queries, gallery, query_labels, gallery_labels, exclude_self, distance='cosine'):
+    if distance == 'cosine':
+        queries = torch.nn.functional.normalize(queries, dim=1)
+        gallery = torch.nn.functional.normalize(gallery, dim=1)
+        scores = torch.mm(queries, gallery.t())
+    else:
+        scores = -torch.cdist(queries, gallery)
+    if exclude_self:
+        scores.fill_diagonal_(-float('inf'))
+    order = torch.argsort(scores, dim=1, descending=True)
+    if exclude_self:
+        order = order[:, :-1]
+    relevant = (gallery_labels[order] == query_labels.view(-1, 1)).numpy()
+    num_relevant = relevant.sum(axis=1)
+    return relevant[num_relevant > 0], num_relevant[num_relevant > 0]
+
+
+def _recall(relevant, k):
+    return np.mean(relevant[:, :k].any(axis=1))
+
+
+def _map(relevant, num_relevant, k):
+    aps = []
+    for rel, n in zip(relevant, num_relevant):
+        rel = rel[:k]
+        precisions = np.cumsum(rel) / np.arange(1, len(rel) + 1)
+        aps.append(np.sum(precisions * rel) / min(k, n))
+    return np.mean(aps)
+
+
+def test_zero_div():
+    with pytest.raises(NotComputableError):
+        RecallAtK().compute()
+
+    with pytest.raises(NotComputableError):
+        RetrievalMAP().compute()
+
+
+def test_bad_args():
+    with pytest.raises(ValueError):
+        RecallAtK(k=0)
+
+    with pytest.raises(ValueError):
+        RecallAtK(distance='manhattan')
+
+    with pytest.raises(ValueError):
+        RetrievalMAP(block_size=0)
+
+
+@pytest.mark.parametrize('distance', ['cosine', 'euclidean'])
+def test_blockwise_topk(distance):
+    torch.manual_seed(12)
+    queries = torch.randn(37, 8)
+    gallery = torch.randn(53, 8)
+    if distance == 'cosine':
+        scores = torch.mm(queries, gallery.t())
+    else:
+        scores = -torch.cdist(queries, gallery)
+    expected = torch.topk(scores, 5, dim=1)[1]
+
+    for block_size, num_workers in [(1000, 1), (7, 1), (7, 3)]:
+        indices = _blockwise_topk(queries, gallery, 5, distance=distance, block_size=block_size,
+                                  num_workers=num_workers)
+        assert torch.equal(indices, expected)
+
+
+def test_blockwise_topk_exclude_self():
+    torch.manual_seed(12)
+    embeddings = torch.randn(29, 4)
+    indices = _blockwise_topk(embeddings, embeddings, 28, block_size=5, exclude_self=True)
+    assert not (indices == torch.arange(29).view(-1, 1)).any()
+
+
+@pytest.mark.parametrize('distance', ['cosine', 'euclidean'])
+def test_compute_leave_one_out(distance):
+    torch.manual_seed(12)
+    embeddings = torch.randn(60, 8)
+    labels = torch.randint(0, 6, size=(60,))
+
+    recall = RecallAtK(k=[1, 5, 10], distance=distance, block_size=7, num_workers=2)
+    mean_ap = RetrievalMAP(k=10, distance=distance, block_size=7)
+    for metric in (recall, mean_ap):
+        for e, l in zip(embeddings.split(16), labels.split(16)):
+            metric.update((e, l))
+
+    relevant, num_relevant = _brute_force(embeddings, embeddings, labels, labels, True, distance)
+    result = recall.compute()
+    for k in (1, 5, 10):
+        assert result[k] == pytest.approx(_recall(relevant, k))
+    assert mean_ap.compute() == pytest.approx(_map(relevant, num_relevant, 10))
+
+
+def test_compute_with_gallery():
+    torch.manual_seed(12)
+    gallery = torch.randn(40, 8)
+    gallery_labels = torch.randint(0, 4, size=(40,))
+    queries = torch.randn(20, 8)
+    query_labels = torch.randint(0, 5, size=(20,))
+
+    recall = RecallAtK(k=3, gallery=(gallery, gallery_labels), block_size=6)
+    mean_ap = RetrievalMAP(k=[5, 50], gallery=(gallery, gallery_labels), block_size=6)
+    for metric in (recall, mean_ap):
+        metric.update((queries, query_labels))
+
+    relevant, num_relevant = _brute_force(queries, gallery, query_labels, gallery_labels, False)
+    assert recall.compute() == pytest.approx(_recall(relevant, 3))
+    result = mean_ap.compute()
+    assert result[5] == pytest.approx(_map(relevant, num_relevant, 5))
+    assert result[50] == pytest.approx(_map(relevant, num_relevant, 50))
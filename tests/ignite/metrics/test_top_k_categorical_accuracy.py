@@ -1,3 +1,5 @@
+from __future__ import division
+
 from ignite.exceptions import NotComputableError
 from ignite.metrics import TopKCategoricalAccuracy
 import pytest
@@ -25,3 +27,58 @@ def test_compute():
     acc.update((y_pred, y))
     assert isinstance(acc.compute(), float)
     assert acc.compute() == 1.0
+
+
+def test_compute_multiple_k():
+    acc = TopKCategoricalAccuracy(k=[1, 2, 3])
+
+    y_pred = torch.FloatTensor([[0.2, 0.4, 0.6, 0.8], [0.8, 0.6, 0.4, 0.2], [0.1, 0.2, 0.3, 0.4]])
+    y = torch.LongTensor([3, 1, 0])
+    acc.update((y_pred, y))
+    result = acc.compute()
+    assert isinstance(result, dict)
+    assert result == {1: 1 / 3, 2: 2 / 3, 3: 2 / 3}
+
+    y_pred = torch.FloatTensor([[0.4, 0.8, 0.2, 0.6]])
+    y = torch.LongTensor([2])
+    acc.update((y_pred, y))
+    assert acc.compute() == {1: 0.25, 2: 0.5, 3: 0.5}
+
+
+def test_multiple_k_matches_single_k():
+    torch.manual_seed(0)
+    y_pred = torch.rand(100, 20)
+    y = torch.randint(0, 20, size=(100,)).type(torch.LongTensor)
+
+    multi = TopKCategoricalAccuracy(k=(1, 5, 10))
+    multi.update((y_pred, y))
+    result = multi.compute()
+
+    for k in (1, 5, 10):
+        single = TopKCategoricalAccuracy(k=k)
+        single.update((y_pred, y))
+        assert result[k] == pytest.approx(single.compute())
+
+
+def test_k_larger_than_num_classes():
+    acc = TopKCategoricalAccuracy(k=[1, 3, 10])
+
+    y_pred = torch.FloatTensor([[0.2, 0.4, 0.6, 0.8], [0.8, 0.6, 0.4, 0.2], [0.1, 0.2, 0.3, 0.4]])
+    y = torch.LongTensor([3, 1, 0])
+    acc.update((y_pred, y))
+    assert acc.compute() == {1: 1 / 3, 3: 2 / 3, 10: 1.0}
+
+    acc.update((y_pred, y))
+    assert acc.compute() == {1: 1 / 3, 3: 2 / 3, 10: 1.0}
+
+    acc = TopKCategoricalAccuracy(k=5)
+    acc.update((y_pred, y))
+    assert acc.compute() == 1.0
+
+
+def test_bad_k():
+    with pytest.raises(ValueError):
+        TopKCategoricalAccuracy(k=0)
+
+    with pytest.raises(ValueError):
+        TopKCategoricalAccuracy(k=[])
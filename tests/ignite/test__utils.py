@@ -1,6 +1,13 @@
+from collections import namedtuple, OrderedDict
+
 import pytest
 import torch
-from ignite._utils import convert_tensor, to_onehot
+from ignite._utils import convert_tensor, to_onehot, tree_flatten, tree_unflatten, _coalesced_to
+
+try:
+    import dataclasses
+except ImportError:
+    dataclasses = None
 
 
 def test_convert_tensor():
@@ -17,6 +24,12 @@ def test_convert_tensor():
     assert torch.is_tensor(tensor)
 
     x = (torch.Tensor([0.0]), torch.Tensor([0.0]))
+    tuple_ = convert_tensor(x)
+    assert isinstance(tuple_, tuple)
+    assert torch.is_tensor(tuple_[0])
+    assert torch.is_tensor(tuple_[1])
+
+    x = [torch.Tensor([0.0]), torch.Tensor([0.0])]
     list_ = convert_tensor(x)
     assert isinstance(list_, list)
     assert torch.is_tensor(list_[0])
@@ -34,6 +47,132 @@ def test_convert_tensor():
         convert_tensor(12345)
 
 
+def _many_tensors_batch():
+    return {
+        'a': torch.rand(2, 3),
+        'b': [torch.arange(4), torch.rand(5), torch.zeros(0)],
+        'c': (torch.arange(3).view(3, 1), torch.rand(3, 2).t()),
+        'd': 'text',
+    }
+
+
+def test_convert_tensor_coalesce():
+    batch = _many_tensors_batch()
+    # moving to the cpu does not coalesce
+    out = convert_tensor(batch, device='cpu', coalesce=True)
+    assert out['a'] is batch['a']
+
+    # meta tensors have shapes and dtypes but no data
+    out = convert_tensor(batch, device='meta', coalesce=True)
+    expected = convert_tensor(batch, device='meta')
+    assert out['d'] == 'text'
+    assert isinstance(out['c'], tuple)
+    for x, y in zip([out['a']] + out['b'] + list(out['c']), [expected['a']] + expected['b'] + list(expected['c'])):
+        assert x.device.type == 'meta'
+        assert x.shape == y.shape
+        assert x.dtype == y.dtype
+
+
+def test_coalesced_to_single_transfer():
+    batch = _many_tensors_batch()
+    tensors = [batch['a']] + batch['b'] + list(batch['c'])
+    out = _coalesced_to(tensors, torch.device('meta'))
+    assert [x.shape for x in out] == [x.shape for x in tensors]
+    # one transfer per dtype, the tensors are views of the transferred buffers
+    float_bases = set(id(x._base) for x in out if x.dtype == torch.float)
+    long_bases = set(id(x._base) for x in out if x.dtype == torch.long)
+    assert len(float_bases) == 1 and len(long_bases) == 1
+    assert float_bases != long_bases
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Skip if no GPU")
+def test_convert_tensor_coalesce_cuda():
+    batch = _many_tensors_batch()
+    for non_blocking in [False, True]:
+        out = convert_tensor(batch, device='cuda', non_blocking=non_blocking, coalesce=True)
+        torch.cuda.synchronize()
+        assert out['a'].is_cuda
+        assert torch.equal(out['a'].cpu(), batch['a'])
+        for x, y in zip(out['b'] + list(out['c']), batch['b'] + list(batch['c'])):
+            assert x.is_cuda
+            assert torch.equal(x.cpu(), y)
+
+
+Point = namedtuple('Point', ['x', 'y'])
+
+
+def test_tree_flatten():
+    batch = OrderedDict([('p', Point(torch.rand(2), [torch.rand(1), 'a'])), ('q', (torch.rand(3), 1)), ('r', {})])
+    leaves, spec = tree_flatten(batch)
+    assert len(leaves) == spec.num_leaves == 5
+    assert leaves[0] is batch['p'].x
+    assert leaves[2] == 'a'
+    assert leaves[4] == 1
+
+    rebuilt = tree_unflatten(leaves, spec)
+    assert isinstance(rebuilt, OrderedDict)
+    assert list(rebuilt.keys()) == ['p', 'q', 'r']
+    assert isinstance(rebuilt['p'], Point)
+    assert isinstance(rebuilt['p'].y, list)
+    assert isinstance(rebuilt['q'], tuple)
+    assert rebuilt['r'] == {}
+    assert rebuilt['p'].x is batch['p'].x
+
+    # same layout, same cached spec
+    _, other_spec = tree_flatten(OrderedDict([('p', Point(1, [2, 3])), ('q', (4, 5)), ('r', {})]))
+    assert other_spec is spec
+    _, other_spec = tree_flatten({'p': Point(1, [2, 3]), 'q': (4, 5), 'r': {}})
+    assert other_spec is not spec
+
+    with pytest.raises(ValueError):
+        tree_unflatten(leaves[:-1], spec)
+
+
+@pytest.mark.skipif(dataclasses is None, reason="Skip if no dataclasses")
+def test_tree_flatten_dataclass():
+    Batch = dataclasses.make_dataclass('Batch', [('x', torch.Tensor), ('y', torch.Tensor)])
+    batch = Batch(torch.rand(2), torch.rand(3))
+    leaves, spec = tree_flatten(batch)
+    assert len(leaves) == 2
+
+    out = convert_tensor(batch, device='meta')
+    assert isinstance(out, Batch)
+    assert out.x.device.type == 'meta'
+    assert out.y.shape == (3,)
+
+
+def test_convert_tensor_namedtuple():
+    x = Point(torch.Tensor([0.0]), {'a': torch.Tensor([1.0])})
+    out = convert_tensor(x, device='cpu')
+    assert isinstance(out, Point)
+    assert torch.equal(out.y['a'], x.y['a'])
+
+
+def test_tree_flatten_structseq():
+    # structseqs are tuple subclasses without `_fields`, they are rebuilt as lists
+    output = torch.max(torch.rand(3, 2), 0)
+    leaves, spec = tree_flatten(output)
+    assert len(leaves) == 2
+    assert leaves[0] is output.values
+    assert leaves[1] is output.indices
+
+    out = convert_tensor(output, device='cpu')
+    assert isinstance(out, list)
+    assert torch.equal(out[0], output.values)
+
+    out = convert_tensor({'topk': torch.rand(5).topk(2), 'sort': torch.rand(5).sort()})
+    assert isinstance(out['topk'], list)
+    assert isinstance(out['sort'], list)
+
+
+def test_tree_flatten_equal_keys():
+    x = torch.Tensor([0.0])
+    for key in [1, True, 1.0]:
+        out = convert_tensor({key: x})
+        assert list(out.keys()) == [key]
+        assert type(list(out.keys())[0]) is type(key)
+
+
 def test_to_onehot():
     indices = torch.LongTensor([0, 1, 2, 3])
     actual = to_onehot(indices, 4)